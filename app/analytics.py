@@ -0,0 +1,108 @@
+"""
+Streaming sales analytics
+Orders or raw line records are consumed once into group-by aggregates and
+a bounded top-N heap; partial results from parallel workers can be merged
+"""
+
+import heapq
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.refactored import DiscountCode, Order, PriceCalculator
+
+
+class SalesAggregator:
+    """Single-pass sales report over orders or line records"""
+
+    def __init__(self, top_orders: int = 10):
+        self.top_orders_size = top_orders
+        self.order_count = 0
+        self.free_shipping_orders = 0
+        self.gross_revenue = 0.0
+        self.net_revenue = 0.0
+        self.product_revenue: Dict[str, float] = {}
+        self.product_quantity: Dict[str, int] = {}
+        self.discount_usage: Dict[str, int] = {}
+        self.discount_amount: Dict[str, float] = {}
+        # Min-heap of (total, order_id) holding only the largest orders
+        self._top_orders: List[Tuple[float, str]] = []
+
+    def consume_order(self, order: Order, discount_code: Optional[str] = None):
+        """Consume one order, priced with `discount_code` or else the order's own code"""
+        discount_code = discount_code or order.discount_code
+        calculator = order._get_calculator()
+        self._consume(order.order_id, calculator.items, calculator.get_breakdown(discount_code), discount_code)
+
+    def consume_orders(self, orders: Iterable[Order], discount_codes: Optional[Dict[str, str]] = None):
+        """Consume orders, looking up each order's discount code by order_id"""
+        discount_codes = discount_codes or {}
+        for order in orders:
+            self.consume_order(order, discount_codes.get(order.order_id))
+
+    def consume_lines(self, records: Iterable[Dict]):
+        """Consume line records grouped by order_id, e.g. rows of a daily export
+
+        Each record carries order_id, product, price, quantity and an optional
+        discount_code; lines of one order must be contiguous.
+        """
+        for order_id, lines in groupby(records, key=lambda record: record["order_id"]):
+            items = list(lines)
+            discount_code = items[0].get("discount_code")
+            self._consume(order_id, items, PriceCalculator(items).get_breakdown(discount_code), discount_code)
+
+    def _consume(self, order_id: str, items: List[Dict], breakdown: Dict[str, float], discount_code: Optional[str]):
+        product_revenue = self.product_revenue
+        product_quantity = self.product_quantity
+        for item in items:
+            name = item["product"]
+            product_revenue[name] = product_revenue.get(name, 0.0) + item["price"] * item["quantity"]
+            product_quantity[name] = product_quantity.get(name, 0) + item["quantity"]
+
+        self.order_count += 1
+        self.gross_revenue += breakdown["subtotal"]
+        # Goods revenue after promotions and discount codes, before tax and shipping
+        self.net_revenue += breakdown["subtotal"] - breakdown["promotion"] - breakdown["discount"]
+        if breakdown["shipping"] == 0:
+            self.free_shipping_orders += 1
+        if discount_code in DiscountCode.__members__:
+            self.discount_usage[discount_code] = self.discount_usage.get(discount_code, 0) + 1
+            self.discount_amount[discount_code] = self.discount_amount.get(discount_code, 0.0) + breakdown["discount"]
+        self._offer_top_order(breakdown["total"], order_id)
+
+    def _offer_top_order(self, total: float, order_id: str):
+        entry = (total, order_id)
+        if len(self._top_orders) < self.top_orders_size:
+            heapq.heappush(self._top_orders, entry)
+        elif self._top_orders and entry > self._top_orders[0]:
+            heapq.heapreplace(self._top_orders, entry)
+
+    @property
+    def free_shipping_share(self) -> float:
+        return self.free_shipping_orders / self.order_count if self.order_count else 0.0
+
+    def top_products(self, count: int, by_quantity: bool = False) -> List[Tuple[str, float]]:
+        """Best-selling products by revenue, or by units sold"""
+        source = self.product_quantity if by_quantity else self.product_revenue
+        return heapq.nlargest(count, source.items(), key=lambda entry: entry[1])
+
+    def top_orders(self) -> List[Tuple[str, float]]:
+        """Largest orders as (order_id, total), biggest first"""
+        return [(order_id, total) for total, order_id in sorted(self._top_orders, reverse=True)]
+
+    def merge(self, other: "SalesAggregator") -> "SalesAggregator":
+        """Fold a partial result from another worker into this one"""
+        self.order_count += other.order_count
+        self.free_shipping_orders += other.free_shipping_orders
+        self.gross_revenue += other.gross_revenue
+        self.net_revenue += other.net_revenue
+        for target, source in (
+            (self.product_revenue, other.product_revenue),
+            (self.product_quantity, other.product_quantity),
+            (self.discount_usage, other.discount_usage),
+            (self.discount_amount, other.discount_amount),
+        ):
+            for key, value in source.items():
+                target[key] = target.get(key, 0) + value
+        for total, order_id in other._top_orders:
+            self._offer_top_order(total, order_id)
+        return self
@@ -0,0 +1,34 @@
+"""
+Batch pricing
+Prices many flat-rate orders without promotions in one call through
+PriceCalculator.breakdown_from(), without building a calculator object
+per order
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from app.refactored import PriceCalculator, discount_rate
+
+# (subtotal, discount, tax, shipping, total)
+Quote = Tuple[float, float, float, float, float]
+
+# get_breakdown() keys in Quote order
+QUOTE_FIELDS = ("subtotal", "discount", "tax", "shipping", "total")
+
+
+def price_line_sets(
+    line_sets: Sequence[Sequence[Tuple[float, int]]],
+    discount_codes: Optional[Sequence[Optional[str]]] = None,
+) -> List[Quote]:
+    """Quote every (price, quantity) line set, matching PriceCalculator.get_breakdown()"""
+    codes = discount_codes if discount_codes is not None else [None] * len(line_sets)
+    return [
+        quote_subtotal(sum(price * quantity for price, quantity in lines), discount_rate(code))
+        for lines, code in zip(line_sets, codes)
+    ]
+
+
+def quote_subtotal(subtotal: float, rate: float) -> Quote:
+    """Discount, tax and shipping for a known subtotal and discount rate"""
+    breakdown = PriceCalculator.breakdown_from(subtotal, rate=rate)
+    return tuple(breakdown[key] for key in QUOTE_FIELDS)
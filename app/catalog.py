@@ -0,0 +1,120 @@
+"""
+Product catalog
+Each product is stored once with an interned name and a compact integer
+id that order lines reference; an inverted product -> orders index lets
+a bulk price refresh touch only the open orders that contain the product
+"""
+
+import sys
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from app.refactored import Order, OrderEvent, OrderStatus
+
+# Called on a catalog miss with the product name; returns (price, attributes) or None
+ProductLoader = Callable[[str], Optional[Tuple[float, Dict]]]
+
+
+class Product:
+    """Single shared record for a product"""
+
+    __slots__ = ("product_id", "name", "price", "attributes")
+
+    def __init__(self, product_id: int, name: str, price: float, attributes: Dict):
+        self.product_id = product_id
+        self.name = name
+        self.price = price
+        self.attributes = attributes
+
+
+class ProductCatalog:
+    """Products by compact id and by name, with loader-backed cached lookups"""
+
+    def __init__(self, loader: Optional[ProductLoader] = None):
+        self._loader = loader
+        self._products: List[Product] = []
+        self._by_name: Dict[str, int] = {}
+        # product_id -> {order_id: order} for orders still open to repricing
+        self._open_orders: Dict[int, Dict[str, Order]] = {}
+        # order_id -> product ids it is filed under, to unfile it when it closes
+        self._order_products: Dict[str, Set[int]] = {}
+        # Names the loader did not know, so misses are not retried
+        self._missing: Set[str] = set()
+        self.loader_calls = 0
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def add(self, name: str, price: float, **attributes) -> Product:
+        if price <= 0:
+            raise ValueError("Price must be positive")
+        if name in self._by_name:
+            raise ValueError(f"Product {name} already exists")
+        product = Product(len(self._products), sys.intern(name), price, attributes)
+        self._missing.discard(name)
+        self._products.append(product)
+        self._by_name[product.name] = product.product_id
+        return product
+
+    def get(self, product_id: int) -> Product:
+        return self._products[product_id]
+
+    def find(self, name: str) -> Optional[Product]:
+        """Look a product up by name, consulting the loader once per missing name"""
+        product_id = self._by_name.get(name)
+        if product_id is not None:
+            return self._products[product_id]
+        if self._loader is None or name in self._missing:
+            return None
+        self.loader_calls += 1
+        loaded = self._loader(name)
+        if loaded is None:
+            self._missing.add(name)
+            return None
+        price, attributes = loaded
+        return self.add(name, price, **attributes)
+
+    def add_to_order(self, order: Order, product_id: int, quantity: int):
+        """Add a catalog product to an order at its current price"""
+        product = self._products[product_id]
+        order.add_item(product.name, product.price, quantity, product.attributes.get("category"), product.product_id)
+        self._track(order, product_id)
+
+    def track_order(self, order: Order):
+        """File a pending order built elsewhere, e.g. recovered or from_lines(), under its catalog products"""
+        if order._status is not OrderStatus.PENDING:
+            return
+        for item in order.items:
+            if item.product_id is not None:
+                self._track(order, item.product_id)
+
+    def _track(self, order: Order, product_id: int):
+        products = self._order_products.get(order.order_id)
+        if products is None:
+            products = self._order_products[order.order_id] = set()
+            order.add_listener(self._on_order_event)
+        products.add(product_id)
+        self._open_orders.setdefault(product_id, {})[order.order_id] = order
+
+    def _on_order_event(self, order: Order, event: OrderEvent, payload: Dict):
+        """Prices are locked once an order leaves pending"""
+        if event is OrderEvent.ITEM_ADDED and payload["item"].product_id is not None:
+            self._track(order, payload["item"].product_id)
+        elif event is OrderEvent.STATUS_CHANGED and payload["status"] is not OrderStatus.PENDING:
+            order.remove_listener(self._on_order_event)
+            for product_id in self._order_products.pop(order.order_id):
+                del self._open_orders[product_id][order.order_id]
+
+    def orders_with(self, product_id: int) -> List[Order]:
+        return list(self._open_orders.get(product_id, {}).values())
+
+    def update_prices(self, prices: Dict[int, float]) -> int:
+        """Set new prices and re-price affected open orders, returning orders changed"""
+        if any(price <= 0 for price in prices.values()):
+            raise ValueError("Price must be positive")
+        changed = set()
+        for product_id, price in prices.items():
+            self._products[product_id].price = price
+            for order in self.orders_with(product_id):
+                if order.reprice_product(product_id, price):
+                    changed.add(order.order_id)
+        return len(changed)
@@ -0,0 +1,115 @@
+"""
+Multi-currency pricing
+Rate tables are loaded once, whole orders are converted in one step and
+converted totals are cached per (order version, currency) for the most
+recently quoted orders
+"""
+
+import csv
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.refactored import BREAKDOWN_KEYS, Order
+
+# ISO 4217 currencies without minor units; everything else rounds to cents
+ZERO_DECIMAL_CURRENCIES = frozenset({"JPY", "KRW", "VND", "CLP", "ISK", "HUF", "TWD"})
+
+
+class ExchangeRateTable:
+    """Compact lookup of exchange rates relative to a single base currency"""
+
+    def __init__(self, rates: Dict[str, float], base: str = "USD"):
+        codes = sorted(set(rates) | {base})
+        for code in codes:
+            if code != base and rates[code] <= 0:
+                raise ValueError(f"Exchange rate for {code} must be positive")
+
+        self.base = base
+        self._index = {code: position for position, code in enumerate(codes)}
+        self._rates = array("d", (1.0 if code == base else rates[code] for code in codes))
+        self._decimals = array("b", (0 if code in ZERO_DECIMAL_CURRENCIES else 2 for code in codes))
+
+    @classmethod
+    def from_csv(cls, path: str, base: str = "USD") -> "ExchangeRateTable":
+        """Load a `currency,rate` table once from disk"""
+        with open(path, newline="") as handle:
+            rates = {row[0].strip().upper(): float(row[1]) for row in csv.reader(handle) if row and row[0].strip()}
+        return cls(rates, base)
+
+    @property
+    def currencies(self) -> List[str]:
+        return list(self._index)
+
+    def _lookup(self, currency: str) -> Tuple[float, int]:
+        """Resolve a currency code to (rate, decimals)"""
+        try:
+            position = self._index[currency]
+        except KeyError:
+            raise ValueError(f"Unknown currency: {currency}") from None
+        return self._rates[position], self._decimals[position]
+
+    def rate(self, currency: str) -> float:
+        return self._lookup(currency)[0]
+
+    def convert(self, amount: float, currency: str) -> float:
+        """Convert a single base-currency amount"""
+        return self.convert_many((amount,), currency)[0]
+
+    def convert_many(self, amounts: Iterable[float], currency: str) -> List[float]:
+        """Convert many base-currency amounts with a single rate lookup"""
+        rate, decimals = self._lookup(currency)
+        return [round(amount * rate, decimals) for amount in amounts]
+
+
+class MultiCurrencyPricer:
+    """Prices orders in any currency of the table, caching per order version"""
+
+    def __init__(self, table: ExchangeRateTable, max_orders: int = 10000):
+        if max_orders <= 0:
+            raise ValueError("Cache size must be positive")
+        self.table = table
+        self.max_orders = max_orders
+        # order_id -> (version, {(currency or None for unconverted, discount_code): quote}), least recent first
+        self._cache: "OrderedDict[str, Tuple[int, Dict]]" = OrderedDict()
+
+    def _entries_for(self, order: Order) -> Dict[Tuple[Optional[str], Optional[str]], Dict[str, float]]:
+        """Return the cache bucket of the order, dropping it if the order changed"""
+        cached = self._cache.get(order.order_id)
+        if cached is None or cached[0] != order.version:
+            cached = (order.version, {})
+            self._cache[order.order_id] = cached
+            if len(self._cache) > self.max_orders:
+                self._cache.popitem(last=False)
+        self._cache.move_to_end(order.order_id)
+        return cached[1]
+
+    def quote(self, order: Order, currency: str, discount_code: Optional[str] = None) -> Dict[str, float]:
+        """Return subtotal, discount, tax, shipping and total in `currency`
+
+        The order's own discount code applies unless another one is given.
+        """
+        discount_code = discount_code or order.discount_code
+        entries = self._entries_for(order)
+        key = (currency, discount_code)
+        if key not in entries:
+            # Unconverted breakdown is shared by every currency of this version
+            base_key = (None, discount_code)
+            if base_key not in entries:
+                entries[base_key] = order._get_calculator().get_breakdown(discount_code)
+            base = entries[base_key]
+            converted = self.table.convert_many((base[name] for name in BREAKDOWN_KEYS), currency)
+            entries[key] = dict(zip(BREAKDOWN_KEYS, converted))
+        return entries[key]
+
+    def quote_all(self, order: Order, currencies: Iterable[str], discount_code: Optional[str] = None) -> Dict[str, Dict]:
+        """Quote one order in several currencies, pricing it only once"""
+        return {currency: self.quote(order, currency, discount_code) for currency in currencies}
+
+    def convert_lines(self, order: Order, currency: str) -> List[float]:
+        """Convert every line total of the order in one step"""
+        return self.table.convert_many((item.get_line_total() for item in order.items), currency)
+
+    def forget(self, order_id: str):
+        """Drop cached quotes for an order that is no longer displayed"""
+        self._cache.pop(order_id, None)
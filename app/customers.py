@@ -0,0 +1,77 @@
+"""
+Per-customer rollups
+Running totals are updated from order events as orders are created,
+edited or cancelled, so account pages never re-price order history
+"""
+
+import heapq
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.refactored import PRICE_EVENTS, Order, OrderEvent, OrderStatus
+
+
+class CustomerStats:
+    """Precomputed aggregates for one customer email"""
+
+    def __init__(self, customer_email: str, customer_name: str):
+        self.customer_email = customer_email
+        self.customer_name = customer_name
+        self.order_count = 0
+        self.cancelled_count = 0
+        self.lifetime_spend = 0.0
+        self.last_order_at: Optional[datetime] = None
+
+    @property
+    def average_order_value(self) -> float:
+        return self.lifetime_spend / self.order_count if self.order_count else 0.0
+
+
+class CustomerRollups:
+    """Incrementally maintained customer aggregates keyed on customer_email"""
+
+    def __init__(self):
+        self._customers: Dict[str, CustomerStats] = {}
+        # Amount each live order currently contributes to its customer's spend
+        self._contributions: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._customers)
+
+    def get(self, customer_email: str) -> Optional[CustomerStats]:
+        return self._customers.get(customer_email)
+
+    def track(self, order: Order):
+        """Count a newly created order and follow its later changes"""
+        if order.order_id in self._contributions:
+            raise ValueError(f"Order {order.order_id} is already tracked")
+        if order.status == OrderStatus.CANCELLED.value:
+            return
+
+        stats = self._customers.get(order.customer_email)
+        if stats is None:
+            stats = self._customers[order.customer_email] = CustomerStats(order.customer_email, order.customer_name)
+
+        total = order.calculate_total_with_discount()
+        self._contributions[order.order_id] = total
+        stats.order_count += 1
+        stats.lifetime_spend += total
+        if stats.last_order_at is None or order.created_at > stats.last_order_at:
+            stats.last_order_at = order.created_at
+        order.add_listener(self._on_order_event)
+
+    def _on_order_event(self, order: Order, event: OrderEvent, payload: Dict):
+        stats = self._customers[order.customer_email]
+        if event in PRICE_EVENTS:
+            total = order.calculate_total_with_discount()
+            stats.lifetime_spend += total - self._contributions[order.order_id]
+            self._contributions[order.order_id] = total
+        elif event is OrderEvent.STATUS_CHANGED and payload["status"] is OrderStatus.CANCELLED:
+            stats.lifetime_spend -= self._contributions.pop(order.order_id)
+            stats.order_count -= 1
+            stats.cancelled_count += 1
+            order.remove_listener(self._on_order_event)
+
+    def top_customers(self, count: int) -> List[CustomerStats]:
+        """Highest lifetime spend first"""
+        return heapq.nlargest(count, self._customers.values(), key=lambda stats: stats.lifetime_spend)
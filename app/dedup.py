@@ -0,0 +1,160 @@
+"""
+Duplicate order detection
+An order's canonical fingerprint (customer email, sorted lines, discount
+code) is checked against a sliding time window of Bloom filters, each
+paired with an exact set of fingerprints. The Bloom filter answers most
+checks on its own; the exact set confirms its positives, so duplicates
+are never misreported and the filter's false-positive rate is measured
+as checks go by rather than assumed.
+"""
+
+import math
+import time
+from collections import deque
+from hashlib import blake2b
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+from app.refactored import Order
+
+FINGERPRINT_SIZE = 16
+
+
+def order_fingerprint(order: Order) -> bytes:
+    """Digest of what makes two submissions the same cart, ignoring line order and ids"""
+    lines = sorted((item.product_name, repr(item.price), str(item.quantity)) for item in order.items)
+    parts = [order.customer_email.strip().lower(), order.discount_code or ""]
+    parts.extend("\x1f".join(line) for line in lines)
+    return blake2b("\x1e".join(parts).encode("utf-8"), digest_size=FINGERPRINT_SIZE).digest()
+
+
+class BloomFilter:
+    """Bit array sized for `capacity` items at `error_rate`, probed by double hashing"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("Capacity must be positive and error rate in (0, 1)")
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, fingerprint: bytes) -> List[int]:
+        """Bit positions of a fingerprint; it must carry at least 16 bytes of hash"""
+        first = int.from_bytes(fingerprint[:8], "little")
+        second = int.from_bytes(fingerprint[8:16], "little") | 1
+        size = self.size
+        return [(first + probe * second) % size for probe in range(self.hashes)]
+
+    def add_positions(self, positions: List[int]):
+        bits = self.bits
+        for position in positions:
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def has_positions(self, positions: List[int]) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in positions)
+
+    def add(self, fingerprint: bytes):
+        self.add_positions(self.positions(fingerprint))
+
+    def __contains__(self, fingerprint: bytes) -> bool:
+        return self.has_positions(self.positions(fingerprint))
+
+
+class _Bucket:
+    """Fingerprints first seen in one slice of the window"""
+
+    __slots__ = ("start", "bloom", "exact")
+
+    def __init__(self, start: float, bloom: BloomFilter, exact: Optional[Set[bytes]]):
+        self.start = start
+        self.bloom = bloom
+        self.exact = exact
+
+
+class DuplicateDetector:
+    """Constant-time duplicate checks over the last `window` seconds
+
+    The window is split into `slices` buckets that expire whole, so a
+    fingerprint is remembered for between window and window + window/slices
+    seconds. expected_per_window sizes the filters; error_rate is the
+    target false-positive rate of a check across all live buckets. With
+    exact=False no fingerprints are kept, memory stays at the filters'
+    size, and Bloom positives are reported as duplicates unconfirmed.
+    """
+
+    def __init__(
+        self,
+        window: float = 600.0,
+        expected_per_window: int = 100000,
+        error_rate: float = 0.001,
+        slices: int = 4,
+        exact: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if window <= 0 or slices <= 0:
+            raise ValueError("Window and slices must be positive")
+        self.window = window
+        self.slice_span = window / slices
+        self.slice_capacity = max(1, math.ceil(expected_per_window / slices))
+        # Up to slices + 1 buckets are live at once and a check can hit any of them
+        self.slice_error_rate = error_rate / (slices + 1)
+        self.exact = exact
+        self.clock = clock
+        self._buckets: Deque[_Bucket] = deque()
+        self.checks = 0
+        self.duplicates = 0
+        self.false_positives = 0
+
+    def _current_bucket(self, now: float) -> _Bucket:
+        buckets = self._buckets
+        while buckets and buckets[0].start + self.slice_span <= now - self.window:
+            buckets.popleft()
+        if not buckets or now >= buckets[-1].start + self.slice_span:
+            start = now - now % self.slice_span
+            bloom = BloomFilter(self.slice_capacity, self.slice_error_rate)
+            buckets.append(_Bucket(start, bloom, set() if self.exact else None))
+        return buckets[-1]
+
+    def check(self, order: Order, now: Optional[float] = None) -> bool:
+        """True if the order repeats one seen in the window; otherwise remember it"""
+        return self.check_fingerprint(order_fingerprint(order), now)
+
+    def check_fingerprint(self, fingerprint: bytes, now: Optional[float] = None) -> bool:
+        now = self.clock() if now is None else now
+        current = self._current_bucket(now)
+        # Every bucket shares one filter geometry, so positions are computed once
+        positions = current.bloom.positions(fingerprint)
+        self.checks += 1
+
+        filter_hit = False
+        for bucket in reversed(self._buckets):
+            if bucket.bloom.has_positions(positions):
+                if bucket.exact is None or fingerprint in bucket.exact:
+                    self.duplicates += 1
+                    return True
+                filter_hit = True
+        if filter_hit:
+            self.false_positives += 1
+
+        current.bloom.add_positions(positions)
+        if current.exact is not None:
+            current.exact.add(fingerprint)
+        return False
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Share of new fingerprints the filters alone would have called duplicates"""
+        new = self.checks - self.duplicates
+        return self.false_positives / new if new else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "checks": self.checks,
+            "duplicates": self.duplicates,
+            "false_positives": self.false_positives,
+            "false_positive_rate": self.false_positive_rate,
+            "buckets": len(self._buckets),
+            "filter_bytes": sum(len(bucket.bloom.bits) for bucket in self._buckets),
+        }
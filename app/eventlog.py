@@ -0,0 +1,213 @@
+"""
+Event-sourced order log
+Order mutations are appended to log segments as JSON lines; periodic
+snapshots of all open orders let recovery replay only the tail
+"""
+
+import glob
+import json
+import os
+from typing import Callable, Dict, Optional
+
+from app.refactored import Order, OrderEvent, OrderStatus
+
+CLOSED_STATUSES = frozenset({OrderStatus.DELIVERED, OrderStatus.CANCELLED})
+
+CREATED = "created"
+
+
+def encode_event(order: Order, event: OrderEvent, payload: Dict) -> Dict:
+    """Turn a listener notification into a JSON-friendly record"""
+    record = {"type": event.value, "order_id": order.order_id}
+    if event is OrderEvent.ITEM_ADDED:
+        item = payload["item"]
+        record["line"] = [item.product_name, item.price, item.quantity, item.category, item.product_id]
+    elif event is OrderEvent.QUANTITY_CHANGED:
+        record["index"] = payload["index"]
+        record["quantity"] = payload["quantity"]
+    elif event is OrderEvent.DISCOUNT_APPLIED:
+        record["code"] = payload["code"]
+    elif event is OrderEvent.PRICE_CHANGED:
+        record["product_id"] = payload["product_id"]
+        record["price"] = payload["price"]
+    elif event is OrderEvent.STATUS_CHANGED:
+        record["status"] = payload["status"].value
+    return record
+
+
+def _apply_item_added(order: Order, record: Dict):
+    order.add_item(*record["line"])
+
+
+def _apply_quantity_changed(order: Order, record: Dict):
+    order.update_quantity(record["index"], record["quantity"])
+
+
+def _apply_discount(order: Order, record: Dict):
+    order.set_discount_code(record["code"])
+
+
+def _apply_price(order: Order, record: Dict):
+    order.reprice_product(record["product_id"], record["price"])
+
+
+def _apply_status(order: Order, record: Dict):
+    order.transition_to(record["status"])
+
+
+APPLIERS: Dict[str, Callable[[Order, Dict], None]] = {
+    OrderEvent.ITEM_ADDED.value: _apply_item_added,
+    OrderEvent.QUANTITY_CHANGED.value: _apply_quantity_changed,
+    OrderEvent.DISCOUNT_APPLIED.value: _apply_discount,
+    OrderEvent.PRICE_CHANGED.value: _apply_price,
+    OrderEvent.STATUS_CHANGED.value: _apply_status,
+}
+
+
+def apply_record(orders: Dict[str, Order], record: Dict, tax_engine=None, promotion_engine=None):
+    """Replay one logged record onto the set of open orders, rebuilding them with the given engines"""
+    if record["type"] == CREATED:
+        orders[record["order_id"]] = Order.from_state(record["state"], tax_engine, promotion_engine)
+        return
+    order = orders.get(record["order_id"])
+    if order is None:
+        return
+    APPLIERS[record["type"]](order, record)
+    if OrderStatus(order.status) in CLOSED_STATUSES:
+        del orders[order.order_id]
+
+
+def check_engines(order: Order, tax_engine, promotion_engine):
+    """Reject orders that recovery could not rebuild with the same pricing"""
+    if order.tax_engine is not tax_engine:
+        raise ValueError(f"Order {order.order_id} uses a different tax engine than the log")
+    if order.promotion_engine is not promotion_engine:
+        raise ValueError(f"Order {order.order_id} uses a different promotion engine than the log")
+
+
+class OrderEventLog:
+    """Append-only log of order mutations with periodic snapshots
+
+    Files in `directory`:
+      events-<first seq>.log   JSON line per event, one segment per snapshot
+      snapshot-<seq>.json      state of every open order after event <seq>
+
+    Engines are not serializable, so every logged order must use the
+    log's tax_engine and promotion_engine; recovered orders are rebuilt
+    with them.
+    """
+
+    def __init__(self, directory: str, snapshot_every: Optional[int] = 1000, tax_engine=None, promotion_engine=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.tax_engine = tax_engine
+        self.promotion_engine = promotion_engine
+        self._orders: Dict[str, Order] = {}
+        self._seq = 0
+        self._since_snapshot = 0
+        self._segment = None
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def _path(self, prefix: str, seq: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"{prefix}-{seq:012d}.{suffix}")
+
+    def _files(self, prefix: str, suffix: str):
+        return sorted(glob.glob(os.path.join(self.directory, f"{prefix}-*.{suffix}")))
+
+    def _open_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+        # A segment with this name can only hold a torn first line or nothing at all
+        self._segment = open(self._path("events", self._seq + 1, "log"), "w", encoding="utf-8")
+
+    def recover(self) -> Dict[str, Order]:
+        """Load the latest snapshot, replay newer events and resume logging"""
+        orders: Dict[str, Order] = {}
+        snapshot_seq = 0
+        snapshots = self._files("snapshot", "json")
+        if snapshots:
+            with open(snapshots[-1], encoding="utf-8") as handle:
+                snapshot = json.load(handle)
+            snapshot_seq = snapshot["seq"]
+            orders = {
+                state["order_id"]: Order.from_state(state, self.tax_engine, self.promotion_engine)
+                for state in snapshot["orders"]
+            }
+
+        seq = snapshot_seq
+        for segment in self._files("events", "log"):
+            with open(segment, encoding="utf-8") as handle:
+                for line in handle:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write at the end of a segment from a crash
+                        break
+                    if record["seq"] <= snapshot_seq:
+                        continue
+                    apply_record(orders, record, self.tax_engine, self.promotion_engine)
+                    seq = record["seq"]
+
+        self._seq = seq
+        self._since_snapshot = seq - snapshot_seq
+        # Continue in a fresh segment rather than after a possibly torn line
+        self._open_segment()
+        for order in orders.values():
+            self._watch(order)
+        return dict(orders)
+
+    def attach(self, order: Order):
+        """Log the order's current state and every later mutation"""
+        if self._segment is None:
+            raise RuntimeError("Call recover() before attaching orders")
+        check_engines(order, self.tax_engine, self.promotion_engine)
+        self._append({"type": CREATED, "order_id": order.order_id, "state": order.to_state()})
+        self._watch(order)
+
+    def _watch(self, order: Order):
+        self._orders[order.order_id] = order
+        order.add_listener(self._on_order_event)
+
+    def _on_order_event(self, order: Order, event: OrderEvent, payload: Dict):
+        # Stop tracking closed orders first so a snapshot taken by this append skips them
+        if OrderStatus(order.status) in CLOSED_STATUSES:
+            order.remove_listener(self._on_order_event)
+            del self._orders[order.order_id]
+        self._append(encode_event(order, event, payload))
+
+    def _append(self, record: Dict):
+        self._seq += 1
+        record["seq"] = self._seq
+        self._segment.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._segment.flush()
+        self._since_snapshot += 1
+        if self.snapshot_every and self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def snapshot(self):
+        """Write every open order to a snapshot and start a new log segment"""
+        path = self._path("snapshot", self._seq, "json")
+        temporary = path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(
+                {"seq": self._seq, "orders": [order.to_state() for order in self._orders.values()]},
+                handle,
+                separators=(",", ":"),
+            )
+        os.replace(temporary, path)
+
+        self._open_segment()
+        self._since_snapshot = 0
+        current_segment = self._segment.name
+        for old in self._files("snapshot", "json")[:-1] + self._files("events", "log"):
+            if old != current_segment:
+                os.remove(old)
+
+    def close(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
@@ -0,0 +1,126 @@
+"""
+Inventory reservations
+Stock counts live in a compact array indexed by product, and whole orders
+are reserved atomically under striped locks instead of one global lock
+"""
+
+import itertools
+import threading
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+
+class InsufficientStockError(ValueError):
+    """Raised when a batch reservation cannot be fully satisfied"""
+
+    def __init__(self, shortages: Dict[str, Tuple[int, int]]):
+        self.shortages = shortages
+        details = ", ".join(f"{name} (requested {wanted}, available {left})" for name, (wanted, left) in shortages.items())
+        super().__init__(f"Insufficient stock: {details}")
+
+
+class Reservation:
+    """Quantities held for one order until they are released or committed"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, quantities: Dict[int, int]):
+        self.reservation_id = next(self._ids)
+        self.quantities = quantities
+        self.active = True
+        self._lock = threading.Lock()
+
+    def _close(self) -> bool:
+        """Mark the reservation inactive, returning whether this call did so"""
+        with self._lock:
+            was_active = self.active
+            self.active = False
+        return was_active
+
+
+class Inventory:
+    """Thread-safe stock index with all-or-nothing batch reservations"""
+
+    def __init__(self, stock: Dict[str, int], stripes: int = 64):
+        if stripes <= 0:
+            raise ValueError("Stripe count must be positive")
+        self._index: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._stock = array("q")
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        # Only guards growth of the index, never taken on the reservation path
+        self._catalog_lock = threading.Lock()
+        for name, quantity in stock.items():
+            self.add_product(name, quantity)
+
+    def add_product(self, name: str, quantity: int = 0):
+        """Register a product, or restock it if it already exists"""
+        with self._catalog_lock:
+            if name not in self._index:
+                self._names.append(name)
+                self._stock.append(0)
+                self._index[name] = len(self._names) - 1
+        self.restock(name, quantity)
+
+    def _lock_for(self, position: int) -> threading.Lock:
+        return self._locks[position % len(self._locks)]
+
+    def restock(self, name: str, quantity: int):
+        if quantity < 0:
+            raise ValueError("Restock quantity cannot be negative")
+        position = self._index[name]
+        with self._lock_for(position):
+            self._stock[position] += quantity
+
+    def available(self, name: str) -> int:
+        position = self._index.get(name)
+        return 0 if position is None else self._stock[position]
+
+    def reserve(self, lines: Iterable[Tuple[str, int]]) -> Reservation:
+        """Reserve every line or nothing, locking only the stripes involved"""
+        wanted: Dict[int, int] = {}
+        unknown: Dict[str, Tuple[int, int]] = {}
+        for name, quantity in lines:
+            if quantity <= 0:
+                raise ValueError("Quantity must be positive")
+            position = self._index.get(name)
+            if position is None:
+                requested = unknown.get(name, (0, 0))[0] + quantity
+                unknown[name] = (requested, 0)
+            else:
+                wanted[position] = wanted.get(position, 0) + quantity
+        if unknown:
+            raise InsufficientStockError(unknown)
+
+        # Sorted acquisition order keeps concurrent batches deadlock-free
+        locks = [self._locks[stripe] for stripe in sorted({position % len(self._locks) for position in wanted})]
+        for lock in locks:
+            lock.acquire()
+        try:
+            stock = self._stock
+            shortages = {
+                self._names[position]: (quantity, stock[position])
+                for position, quantity in wanted.items()
+                if stock[position] < quantity
+            }
+            if shortages:
+                raise InsufficientStockError(shortages)
+            for position, quantity in wanted.items():
+                stock[position] -= quantity
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+        return Reservation(wanted)
+
+    def release(self, reservation: Reservation):
+        """Return reserved quantities to stock, e.g. when checkout is abandoned"""
+        if not reservation._close():
+            return
+        for position, quantity in reservation.quantities.items():
+            with self._lock_for(position):
+                self._stock[position] += quantity
+
+    def commit(self, reservation: Reservation):
+        """Make a reservation permanent once the order is paid"""
+        reservation._close()
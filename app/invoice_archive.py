@@ -0,0 +1,228 @@
+"""
+Compressed invoice archive
+Invoices are kept as structured records rather than rendered text; each
+record is deflated on its own against a preset dictionary trained on
+earlier invoices, so repeated product names, customers and totals cost a
+back-reference even in a single small record, and any invoice can be read
+back by id without decompressing its neighbours
+
+File layout (little-endian):
+  header: b"INVA", u32 dictionary length, dictionary bytes
+  entry:  u16 invoice id length, u32 payload length, id (utf-8), raw deflate payload
+"""
+
+import json
+import os
+import re
+import struct
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.refactored import Invoice, format_reductions
+
+MAGIC = b"INVA"
+HEADER = struct.Struct("<4sI")
+ENTRY = struct.Struct("<HI")
+# Largest preset dictionary deflate can use
+MAX_DICTIONARY = 32768
+WBITS = -15
+
+RECORD_FIELDS = (
+    "invoice_id",
+    "created_at",
+    "order_id",
+    "customer_name",
+    "customer_email",
+    "lines",
+    "subtotal",
+    "tax",
+    "shipping",
+    "total",
+    "discount_code",
+    "discount",
+    "promotion",
+)
+
+# JSON scalars of an encoded record, the units the dictionary is built from
+FRAGMENT = re.compile(r'"(?:[^"\\]|\\.)*"|[^,\[\]"]+')
+
+
+def invoice_record(invoice: Invoice) -> Dict:
+    """Everything generate_invoice() prints, as plain data"""
+    order = invoice.order
+    breakdown = order._get_calculator().get_breakdown(order.discount_code)
+    return {
+        "invoice_id": invoice.invoice_id,
+        "created_at": invoice.created_at.isoformat(),
+        "order_id": order.order_id,
+        "customer_name": order.customer_name,
+        "customer_email": order.customer_email,
+        "lines": [[item.product_name, item.price, item.quantity] for item in order.items],
+        "subtotal": breakdown["subtotal"],
+        "tax": breakdown["tax"],
+        "shipping": breakdown["shipping"],
+        "total": breakdown["total"],
+        "discount_code": order.discount_code,
+        "discount": breakdown["discount"],
+        "promotion": breakdown["promotion"],
+    }
+
+
+def render_record(record: Dict) -> str:
+    """Invoice text identical to Invoice.generate_invoice() at archive time"""
+    created_at = datetime.fromisoformat(record["created_at"])
+    lines = [
+        f"INVOICE #{record['invoice_id']}",
+        f"Date: {created_at.strftime('%Y-%m-%d %H:%M')}",
+        f"Order: {record['order_id']}",
+        f"Customer: {record['customer_name']}",
+        f"Email: {record['customer_email']}",
+        "",
+        "Items:",
+    ]
+    for name, price, quantity in record["lines"]:
+        lines.append(f"  {name}: ${price} x {quantity} = ${price * quantity}")
+    lines.extend(["", f"Subtotal: ${record['subtotal']:.2f}"])
+    # Records archived before reductions were stored have none
+    reductions = {"promotion": record.get("promotion") or 0.0, "discount": record.get("discount") or 0.0}
+    lines.extend(format_reductions(reductions, record.get("discount_code")))
+    lines.extend(
+        [
+            f"Tax: ${record['tax']:.2f}",
+            f"Shipping: ${record['shipping']:.2f}",
+            f"TOTAL: ${record['total']:.2f}",
+        ]
+    )
+    return "\n".join(lines) + "\n"
+
+
+def encode_record(record: Dict) -> bytes:
+    return json.dumps([record[field] for field in RECORD_FIELDS], separators=(",", ":")).encode("utf-8")
+
+
+def decode_record(payload: bytes) -> Dict:
+    return dict(zip(RECORD_FIELDS, json.loads(payload)))
+
+
+def train_dictionary(records: Iterable[Dict], size: int = MAX_DICTIONARY) -> bytes:
+    """Preset dictionary from sample records
+
+    Fragments seen more than once are laid out least common first, because
+    deflate reaches the end of the dictionary with the shortest distances;
+    a sample record goes last to cover the fixed record structure.
+    """
+    counts: Counter = Counter()
+    sample = b""
+    for record in records:
+        sample = encode_record(record)
+        counts.update(FRAGMENT.findall(sample.decode("utf-8")))
+    repeated = [fragment for fragment, count in sorted(counts.items(), key=lambda entry: entry[1]) if count > 1]
+    dictionary = ",".join(repeated).encode("utf-8") + sample
+    return dictionary[max(0, len(dictionary) - min(size, MAX_DICTIONARY)):]
+
+
+class InvoiceArchive:
+    """Append-only file of compressed invoice records with an in-memory id index"""
+
+    def __init__(self, path: str, dictionary: Optional[bytes] = None):
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, "a+b")
+        if exists:
+            self.dictionary = self._read_header()
+        else:
+            self.dictionary = dictionary or b""
+            if len(self.dictionary) > MAX_DICTIONARY:
+                raise ValueError(f"Dictionary larger than {MAX_DICTIONARY} bytes")
+            self._file.write(HEADER.pack(MAGIC, len(self.dictionary)) + self.dictionary)
+            self._file.flush()
+        # invoice_id -> (payload offset, payload length)
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._load_index()
+
+    def _read_header(self) -> bytes:
+        self._file.seek(0)
+        magic, length = HEADER.unpack(self._file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not an invoice archive")
+        return self._file.read(length)
+
+    def _load_index(self):
+        """Index every complete entry, cutting off a torn one at the end"""
+        offset = HEADER.size + len(self.dictionary)
+        self._file.seek(offset)
+        data = self._file.read()
+        position = 0
+        while position + ENTRY.size <= len(data):
+            id_length, payload_length = ENTRY.unpack_from(data, position)
+            start = position + ENTRY.size
+            end = start + id_length + payload_length
+            if end > len(data):
+                break
+            invoice_id = data[start:start + id_length].decode("utf-8")
+            self._index[invoice_id] = (offset + start + id_length, payload_length)
+            position = end
+        if position < len(data):
+            self._file.truncate(offset + position)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, invoice_id: str) -> bool:
+        return invoice_id in self._index
+
+    def ids(self) -> List[str]:
+        return list(self._index)
+
+    def _compress(self, payload: bytes) -> bytes:
+        if self.dictionary:
+            compressor = zlib.compressobj(9, zlib.DEFLATED, WBITS, zdict=self.dictionary)
+        else:
+            compressor = zlib.compressobj(9, zlib.DEFLATED, WBITS)
+        return compressor.compress(payload) + compressor.flush()
+
+    def _decompress(self, payload: bytes) -> bytes:
+        if self.dictionary:
+            decompressor = zlib.decompressobj(WBITS, zdict=self.dictionary)
+        else:
+            decompressor = zlib.decompressobj(WBITS)
+        return decompressor.decompress(payload) + decompressor.flush()
+
+    def add(self, invoice: Invoice):
+        self.add_record(invoice_record(invoice))
+
+    def add_record(self, record: Dict):
+        invoice_id = record["invoice_id"]
+        if invoice_id in self._index:
+            raise ValueError(f"Invoice {invoice_id} is already archived")
+        encoded_id = invoice_id.encode("utf-8")
+        payload = self._compress(encode_record(record))
+        self._file.seek(0, os.SEEK_END)
+        start = self._file.tell() + ENTRY.size + len(encoded_id)
+        self._file.write(ENTRY.pack(len(encoded_id), len(payload)) + encoded_id + payload)
+        self._file.flush()
+        self._index[invoice_id] = (start, len(payload))
+
+    def get_record(self, invoice_id: str) -> Dict:
+        """Decompress a single invoice; raises KeyError for unknown ids"""
+        offset, length = self._index[invoice_id]
+        self._file.seek(offset)
+        return decode_record(self._decompress(self._file.read(length)))
+
+    def render(self, invoice_id: str) -> str:
+        return render_record(self.get_record(invoice_id))
+
+    def stored_bytes(self) -> int:
+        """Size of the compressed payloads, excluding headers and the dictionary"""
+        return sum(length for _, length in self._index.values())
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "InvoiceArchive":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
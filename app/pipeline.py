@@ -0,0 +1,168 @@
+"""
+Pricing pipelines from configuration
+A pipeline is an ordered list of stages (discount, tax, shipping,
+rounding) declared as plain data, e.g. loaded from JSON. Each distinct
+configuration is compiled once into a straight-line Python function with
+its rates and tiers inlined as constants, so pricing an order is a single
+call with no per-step dispatch or attribute lookups. The most recently
+used MAX_COMPILED functions are cached.
+
+Compiled functions take (subtotal, discount_rate) and return a Quote of
+(subtotal, discount, tax, shipping, total), like app.batch_pricing.
+Pipelines have no jurisdiction tax or promotion stages, so orders with a
+tax or promotion engine are rejected rather than priced differently.
+"""
+
+import itertools
+import json
+import math
+from collections import OrderedDict
+from typing import Callable, Dict, List, Sequence
+
+from app.batch_pricing import Quote, discount_rate
+from app.refactored import Order, PriceCalculator, ShippingCalculator
+
+PricingFunction = Callable[[float, float], Quote]
+
+# Same order of operations as PriceCalculator.get_total()
+DEFAULT_PIPELINE: List[Dict] = [
+    {"stage": "discount"},
+    {"stage": "tax"},
+    {"stage": "shipping"},
+]
+
+# (subtotal must exceed, charge), highest first, then the charge below them all
+DEFAULT_SHIPPING_TIERS = [[threshold, charge] for threshold, charge in reversed(ShippingCalculator.TIERS)]
+DEFAULT_SHIPPING_CHARGE = ShippingCalculator.BASE_CHARGE
+
+# Compiled functions by generated source, least recently used first
+MAX_COMPILED = 256
+_compiled: "OrderedDict[str, PricingFunction]" = OrderedDict()
+_compile_numbers = itertools.count()
+
+
+def _number(value, what: str) -> float:
+    """Numbers are the only values inlined into generated code"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{what} must be a finite number")
+    return float(value)
+
+
+def _discount_lines(stage: Dict) -> List[str]:
+    """A fixed `rate`, or the rate passed in for the order's discount code"""
+    rate = repr(_number(stage["rate"], "discount stage: rate")) if "rate" in stage else "rate"
+    return [f"discount = subtotal * {rate}"]
+
+
+def _tax_lines(stage: Dict) -> List[str]:
+    """Tax on the subtotal less any discount applied by an earlier stage"""
+    rate = _number(stage.get("rate", PriceCalculator.TAX_RATE), "tax stage: rate")
+    return [f"tax = (subtotal - discount) * {rate!r}"]
+
+
+def _shipping_lines(stage: Dict) -> List[str]:
+    """Tiered charge on the original subtotal, or on the discounted one with basis=discounted"""
+    basis = stage.get("basis", "subtotal")
+    if basis not in ("subtotal", "discounted"):
+        raise ValueError(f"shipping stage: unknown basis {basis!r}")
+    amount = "subtotal" if basis == "subtotal" else "(subtotal - discount)"
+    tiers = stage.get("tiers", DEFAULT_SHIPPING_TIERS)
+    tiers = [
+        (_number(threshold, "shipping stage: tier threshold"), _number(charge, "shipping stage: tier charge"))
+        for threshold, charge in tiers
+    ]
+    if tiers != sorted(tiers, reverse=True):
+        raise ValueError("shipping stage: tiers must be listed highest threshold first")
+    expression = repr(_number(stage.get("default", DEFAULT_SHIPPING_CHARGE), "shipping stage: default"))
+    for threshold, charge in reversed(tiers):
+        expression = f"{charge!r} if {amount} > {threshold!r} else {expression}"
+    return [f"shipping = {expression}"]
+
+
+def _rounding_lines(stage: Dict) -> List[str]:
+    """Round the components computed so far, and the total"""
+    places = stage.get("places", 2)
+    if isinstance(places, bool) or not isinstance(places, int) or places < 0:
+        raise ValueError("rounding stage: places must be a non-negative integer")
+    return [f"{name} = round({name}, {places})" for name in ("discount", "tax", "shipping")]
+
+
+STAGES: Dict[str, Callable[[Dict], List[str]]] = {
+    "discount": _discount_lines,
+    "tax": _tax_lines,
+    "shipping": _shipping_lines,
+    "rounding": _rounding_lines,
+}
+
+
+def generate_source(config: Sequence[Dict]) -> str:
+    """Python source of the pricing function for a pipeline configuration"""
+    seen = set()
+    body = ["discount = tax = shipping = 0.0"]
+    round_total = None
+    for stage in config:
+        if not isinstance(stage, dict):
+            raise ValueError(f"Pricing stage must be a mapping, not {type(stage).__name__}")
+        name = stage.get("stage")
+        if name not in STAGES:
+            raise ValueError(f"Unknown pricing stage: {name!r}")
+        if name in seen:
+            raise ValueError(f"Pricing stage {name} appears more than once")
+        seen.add(name)
+        body.extend(STAGES[name](stage))
+        if name == "rounding":
+            round_total = stage.get("places", 2)
+
+    body.append("total = subtotal - discount + tax + shipping")
+    if round_total is not None:
+        body.append(f"total = round(total, {round_total})")
+    body.append("return (subtotal, discount, tax, shipping, total)")
+    return "def price(subtotal, rate=0.0):\n" + "".join(f"    {line}\n" for line in body)
+
+
+def compile_pipeline(config: Sequence[Dict]) -> PricingFunction:
+    """Compiled pricing function; configurations generating the same source share one"""
+    source = generate_source(config)
+    function = _compiled.get(source)
+    if function is None:
+        namespace: Dict = {}
+        exec(compile(source, f"<pricing pipeline {next(_compile_numbers)}>", "exec"), namespace)
+        function = _compiled[source] = namespace["price"]
+        while len(_compiled) > MAX_COMPILED:
+            _compiled.popitem(last=False)
+    _compiled.move_to_end(source)
+    return function
+
+
+def _check_priceable(order: Order):
+    if order.tax_engine is not None or order.promotion_engine is not None:
+        raise ValueError(f"Order {order.order_id} uses a tax or promotion engine, which pipelines do not model")
+
+
+class PricingPipeline:
+    """Named pipeline wrapping its compiled function"""
+
+    def __init__(self, name: str, config: Sequence[Dict]):
+        self.name = name
+        self.config = list(config)
+        self.price = compile_pipeline(self.config)
+
+    def price_order(self, order: Order) -> Quote:
+        """Quote a flat-rate order without promotions, with its own discount code"""
+        _check_priceable(order)
+        return self.price(order.calculate_subtotal(), discount_rate(order.discount_code))
+
+    def price_orders(self, orders: Sequence[Order]) -> List[Quote]:
+        price = self.price
+        quotes = []
+        for order in orders:
+            _check_priceable(order)
+            quotes.append(price(order.calculate_subtotal(), discount_rate(order.discount_code)))
+        return quotes
+
+
+def load_pipelines(path: str) -> Dict[str, PricingPipeline]:
+    """Pipelines from a JSON file mapping names to stage lists"""
+    with open(path) as handle:
+        configs = json.load(handle)
+    return {name: PricingPipeline(name, config) for name, config in configs.items()}
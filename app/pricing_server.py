@@ -0,0 +1,193 @@
+"""
+Local pricing service
+An asyncio server on TCP or a Unix socket that coalesces concurrent quote
+requests into micro-batches priced in one call, with a client that keeps
+a single multiplexed connection per process
+
+Wire format (little-endian, every frame prefixed by a u32 body length):
+  request:  u32 request_id, u8 discount code (0 = none), u32 line count,
+            then per line f64 price, u32 quantity
+  response: u32 request_id, f64 subtotal, discount, tax, shipping, total,
+            u32 queue time and u32 service time in microseconds
+"""
+
+import asyncio
+import itertools
+import struct
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.batch_pricing import QUOTE_FIELDS, price_line_sets
+from app.refactored import DiscountCode
+from app.stats import LatencyStats, SampleStats
+
+LENGTH = struct.Struct("<I")
+REQUEST_HEADER = struct.Struct("<IBI")
+LINE = struct.Struct("<dI")
+RESPONSE = struct.Struct("<I5dII")
+
+DISCOUNT_CODES: List[Optional[str]] = [None] + list(DiscountCode.__members__)
+DISCOUNT_IDS = {code: position for position, code in enumerate(DISCOUNT_CODES)}
+
+
+def encode_request(request_id: int, lines: Sequence[Tuple[float, int]], discount_code: Optional[str] = None) -> bytes:
+    body = REQUEST_HEADER.pack(request_id, DISCOUNT_IDS.get(discount_code, 0), len(lines))
+    body += b"".join(LINE.pack(price, quantity) for price, quantity in lines)
+    return LENGTH.pack(len(body)) + body
+
+
+def decode_request(body: bytes) -> Tuple[int, Optional[str], List[Tuple[float, int]]]:
+    request_id, discount_id, count = REQUEST_HEADER.unpack_from(body)
+    lines = list(LINE.iter_unpack(body[REQUEST_HEADER.size:REQUEST_HEADER.size + count * LINE.size]))
+    return request_id, DISCOUNT_CODES[discount_id], lines
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[bytes]:
+    try:
+        (length,) = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+        return await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        return None
+
+
+class PricingServer:
+    """Quote server that prices queued requests in micro-batches"""
+
+    def __init__(self, max_batch_size: int = 256, max_batch_delay: float = 0.001):
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        self.queue_latency = LatencyStats()
+        self.service_latency = LatencyStats()
+        self.batch_sizes = SampleStats()
+        self.batches = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._batcher: Optional[asyncio.Task] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0, path: Optional[str] = None):
+        """Listen on a Unix socket when `path` is given, otherwise on TCP"""
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.ensure_future(self._run_batches())
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=path)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host, port)
+
+    @property
+    def address(self):
+        return self._server.sockets[0].getsockname()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._batcher.cancel()
+        try:
+            await self._batcher
+        except asyncio.CancelledError:
+            pass
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        pending = set()
+        try:
+            while True:
+                body = await read_frame(reader)
+                if body is None:
+                    break
+                future = asyncio.get_running_loop().create_future()
+                self._queue.put_nowait((decode_request(body), future, time.perf_counter()))
+                task = asyncio.ensure_future(self._respond(future, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        finally:
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            writer.close()
+
+    async def _respond(self, future: asyncio.Future, writer: asyncio.StreamWriter):
+        response = await future
+        writer.write(LENGTH.pack(len(response)) + response)
+        await writer.drain()
+
+    async def _run_batches(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Give concurrent requests a moment to join this batch
+            await asyncio.sleep(self.max_batch_delay)
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                self._price_batch(batch)
+            except Exception as error:
+                # Fail this batch's requests and keep serving the next ones
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(error)
+
+    def _price_batch(self, batch: List):
+        started = time.perf_counter()
+        quotes = price_line_sets([request[2] for request, _, _ in batch], [request[1] for request, _, _ in batch])
+        finished = time.perf_counter()
+        service = finished - started
+
+        self.batches += 1
+        self.batch_sizes.record(len(batch))
+        for ((request_id, _, _), future, enqueued), quote in zip(batch, quotes):
+            queued = started - enqueued
+            self.queue_latency.record(queued)
+            self.service_latency.record(service)
+            if not future.cancelled():
+                future.set_result(RESPONSE.pack(request_id, *quote, int(queued * 1e6), int(service * 1e6)))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            "queue": self.queue_latency.summary(),
+            "service": self.service_latency.summary(),
+            "batch_size": {"batches": self.batches, **self.batch_sizes.summary()},
+        }
+
+
+class PricingClient:
+    """Reusable connection that multiplexes concurrent quotes by request id"""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._waiting: Dict[int, asyncio.Future] = {}
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._receiver: Optional[asyncio.Task] = None
+
+    async def connect(self, host: str = "127.0.0.1", port: int = 0, path: Optional[str] = None):
+        if path is not None:
+            self._reader, self._writer = await asyncio.open_unix_connection(path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    async def _receive(self):
+        while True:
+            body = await read_frame(self._reader)
+            if body is None:
+                break
+            request_id, *values = RESPONSE.unpack(body)
+            quote = dict(zip(QUOTE_FIELDS, values[:5]))
+            quote["queue_us"], quote["service_us"] = values[5:]
+            future = self._waiting.pop(request_id, None)
+            if future is not None and not future.done():
+                future.set_result(quote)
+        for future in self._waiting.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Pricing server closed the connection"))
+        self._waiting.clear()
+
+    async def quote(self, lines: Sequence[Tuple[float, int]], discount_code: Optional[str] = None) -> Dict[str, float]:
+        """Price one order's (price, quantity) lines"""
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        self._writer.write(encode_request(request_id, lines, discount_code))
+        await self._writer.drain()
+        return await future
+
+    async def close(self):
+        self._writer.close()
+        await self._receiver
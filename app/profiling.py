@@ -0,0 +1,233 @@
+"""
+Allocation profiling for order and invoice hot paths
+An opt-in mode that wraps the methods of Order, PriceCalculator and
+Invoice while active and uses tracemalloc to attribute memory to them:
+per call, the bytes a method leaves allocated and its allocation
+high-water mark; at the end, the live blocks (objects) and bytes each
+method allocated that are still alive. Reports are plain dicts that can
+be saved as JSON and compared against a baseline.
+
+Per-call net bytes below a few hundred are dominated by interpreter free
+lists and should be read as noise; peaks and live memory are steadier.
+"""
+
+import dis
+import functools
+import json
+import sys
+import tracemalloc
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.refactored import Invoice, Order, PriceCalculator
+
+DEFAULT_CLASSES = (Order, PriceCalculator, Invoice)
+
+# tracemalloc.reset_peak() arrived in Python 3.9; without it peaks are not measured
+HAS_RESET_PEAK = sys.version_info >= (3, 9)
+
+CALIBRATION = "<calibration>"
+
+REPORT_FIELDS = ("calls", "net_bytes", "peak_bytes", "live_blocks", "live_bytes")
+
+
+class MethodStats:
+    """Allocation counters for one method"""
+
+    def __init__(self):
+        self.calls = 0
+        self.net_bytes = 0
+        self.peak_bytes = 0
+        self.live_blocks = 0
+        self.live_bytes = 0
+
+    def to_dict(self) -> Dict[str, Optional[int]]:
+        return {
+            "calls": self.calls,
+            "net_bytes": self.net_bytes,
+            "peak_bytes": self.peak_bytes if HAS_RESET_PEAK else None,
+            "live_blocks": self.live_blocks,
+            "live_bytes": self.live_bytes,
+        }
+
+
+class AllocationProfiler:
+    """Context manager that profiles allocations of the given classes' methods
+
+    Methods are patched on the classes themselves, so every instance is
+    covered while the profiler is active and nothing is left behind after.
+    """
+
+    def __init__(self, classes: Sequence[type] = DEFAULT_CLASSES, frames: int = 32):
+        self.classes = tuple(classes)
+        self.frames = frames
+        self.stats: Dict[str, MethodStats] = {}
+        self._originals: List[Tuple[type, str, object]] = []
+        # Code object of each profiled method -> its report name
+        self._code_names: Dict[object, str] = {}
+        # [current bytes at entry, highest peak seen, nested profiled calls] per active call
+        self._active: List[List[int]] = []
+        self._started_tracing = False
+        # Bytes charged per call by the profiling wrapper itself
+        self.overhead = 0
+
+    def __enter__(self) -> "AllocationProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        for cls in self.classes:
+            for attribute, value in list(vars(cls).items()):
+                function = value.__func__ if isinstance(value, (staticmethod, classmethod)) else value
+                if not callable(function) or not hasattr(function, "__code__"):
+                    continue
+                if attribute.startswith("__") and attribute != "__init__":
+                    continue
+                name = f"{cls.__name__}.{attribute}"
+                self.stats.setdefault(name, MethodStats())
+                self._code_names[function.__code__] = name
+                wrapper = self._wrap(name, function)
+                if isinstance(value, (staticmethod, classmethod)):
+                    wrapper = type(value)(wrapper)
+                self._originals.append((cls, attribute, value))
+                setattr(cls, attribute, wrapper)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        self.overhead = 0
+        self.overhead = self._calibrate()
+
+    def stop(self):
+        """Record what is still alive, then restore the classes"""
+        if tracemalloc.is_tracing():
+            self._collect_live(tracemalloc.take_snapshot())
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        for cls, attribute, value in reversed(self._originals):
+            setattr(cls, attribute, value)
+        self._originals.clear()
+
+    def _wrap(self, name: str, function):
+        stats = self.stats[name]
+        active = self._active
+        profiler = self
+
+        @functools.wraps(function)
+        def profiled(*args, **kwargs):
+            # Bookkeeping is allocated before the baseline reading so it is not charged
+            frame = [0, 0, 0]
+            active.append(frame)
+            current, peak = tracemalloc.get_traced_memory()
+            if len(active) > 1:
+                # The reset below would hide the caller's peak so far
+                active[-2][1] = max(active[-2][1], peak)
+            if HAS_RESET_PEAK:
+                tracemalloc.reset_peak()
+            frame[0] = frame[1] = current
+            try:
+                return function(*args, **kwargs)
+            finally:
+                active.pop()
+                after, peak = tracemalloc.get_traced_memory()
+                peak = max(frame[1], peak)
+                calls = frame[2] + 1
+                stats.calls += 1
+                stats.net_bytes += after - current - calls * profiler.overhead
+                stats.peak_bytes = max(stats.peak_bytes, peak - current)
+                if active:
+                    active[-1][1] = max(active[-1][1], peak)
+                    active[-1][2] += calls
+
+        return profiled
+
+    def _calibrate(self, samples: int = 1000) -> int:
+        """Bytes the wrapper itself leaves behind per call, measured on a no-op"""
+        self.stats[CALIBRATION] = MethodStats()
+        probe = self._wrap(CALIBRATION, lambda: None)
+        for _ in range(samples):
+            probe()
+        calibration = self.stats.pop(CALIBRATION)
+        return calibration.net_bytes // calibration.calls
+
+    def _collect_live(self, snapshot: tracemalloc.Snapshot):
+        """Charge each live allocation to the innermost profiled method on its traceback"""
+        for stats in self.stats.values():
+            stats.live_blocks = stats.live_bytes = 0
+        code_files = {code.co_filename for code in self._code_names}
+        # (filename, line) -> method name, for every line of every profiled method
+        lines: Dict[Tuple[str, int], str] = {}
+        for code, name in self._code_names.items():
+            for line in _code_lines(code):
+                lines.setdefault((code.co_filename, line), name)
+        for statistic in snapshot.statistics("traceback"):
+            for frame in reversed(statistic.traceback):
+                if frame.filename not in code_files:
+                    continue
+                name = lines.get((frame.filename, frame.lineno))
+                if name is not None:
+                    self.stats[name].live_blocks += statistic.count
+                    self.stats[name].live_bytes += statistic.size
+                    break
+
+    def report(self) -> Dict[str, Dict[str, Optional[int]]]:
+        """Counters of every method that was called"""
+        return {name: stats.to_dict() for name, stats in sorted(self.stats.items()) if stats.calls}
+
+
+def _code_lines(code) -> Iterable[int]:
+    """Source lines of a code object, including its comprehensions and nested functions"""
+    for _, line in dis.findlinestarts(code):
+        if line is not None:
+            yield line
+    for constant in code.co_consts:
+        if hasattr(constant, "co_code"):
+            yield from _code_lines(constant)
+
+
+def format_report(report: Dict[str, Dict[str, Optional[int]]]) -> str:
+    lines = [f"{'method':40} " + " ".join(f"{field:>12}" for field in REPORT_FIELDS)]
+    for name, counters in report.items():
+        values = ("-" if counters[field] is None else str(counters[field]) for field in REPORT_FIELDS)
+        lines.append(f"{name:40} " + " ".join(f"{value:>12}" for value in values))
+    return "\n".join(lines) + "\n"
+
+
+def compare_reports(
+    baseline: Dict[str, Dict[str, Optional[int]]],
+    current: Dict[str, Dict[str, Optional[int]]],
+    tolerance: float = 0.10,
+    min_bytes: int = 1024,
+) -> List[str]:
+    """Methods whose allocations grew by more than `tolerance` since the baseline
+
+    Net bytes are compared per call so runs of different sizes stay
+    comparable; growth adding up to less than min_bytes is ignored as noise.
+    """
+    regressions = []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if not before or not before["calls"]:
+            continue
+        for field in ("net_bytes", "peak_bytes", "live_bytes"):
+            if before[field] is None or now[field] is None:
+                continue
+            old, new, scale = before[field], now[field], 1
+            if field == "net_bytes":
+                old, new, scale = old / before["calls"], new / now["calls"], now["calls"]
+            growth = new - old
+            if growth > abs(old) * tolerance and growth * scale >= min_bytes:
+                regressions.append(f"{name}: {field} {old:.0f} -> {new:.0f}")
+    return regressions
+
+
+def save_report(report: Dict, path: str):
+    with open(path, "w") as handle:
+        json.dump(report, handle, indent=2, sort_keys=True)
+
+
+def load_report(path: str) -> Dict:
+    with open(path) as handle:
+        return json.load(handle)
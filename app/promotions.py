@@ -0,0 +1,149 @@
+"""
+Line-level promotions
+Bundles, buy-X-get-Y and tiered quantity breaks, indexed by the products
+they touch so a cart only evaluates rules for the products it contains
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# product_name -> (total quantity, average unit price)
+Cart = Dict[str, Tuple[int, float]]
+
+
+def build_cart(items: Iterable[Dict]) -> Cart:
+    """Merge calculator item dicts into per-product quantity and unit price"""
+    quantities: Dict[str, int] = {}
+    values: Dict[str, float] = {}
+    for item in items:
+        name = item["product"]
+        quantities[name] = quantities.get(name, 0) + item["quantity"]
+        values[name] = values.get(name, 0.0) + item["price"] * item["quantity"]
+    return {name: (quantity, values[name] / quantity) for name, quantity in quantities.items()}
+
+
+class PromotionRule(ABC):
+    """Base class: a rule touches `products` and computes a discount for a cart"""
+
+    def __init__(self, rule_id: str, products: Sequence[str]):
+        if not products:
+            raise ValueError("Promotion must reference at least one product")
+        self.rule_id = rule_id
+        self.products = tuple(products)
+
+    @abstractmethod
+    def discount(self, cart: Cart) -> float:
+        """Amount taken off the cart by this rule"""
+
+
+class BundleRule(PromotionRule):
+    """Each complete set of `products` costs `bundle_price`"""
+
+    def __init__(self, rule_id: str, products: Sequence[str], bundle_price: float):
+        super().__init__(rule_id, products)
+        if bundle_price <= 0:
+            raise ValueError("Bundle price must be positive")
+        self.bundle_price = bundle_price
+
+    def discount(self, cart: Cart) -> float:
+        if not all(product in cart for product in self.products):
+            return 0.0
+        sets = min(cart[product][0] for product in self.products)
+        set_value = sum(cart[product][1] for product in self.products)
+        return max(0.0, set_value - self.bundle_price) * sets
+
+
+class BuyXGetYRule(PromotionRule):
+    """For every `buy` units of a product, `get` units of the reward product are free"""
+
+    def __init__(self, rule_id: str, product: str, buy: int, get: int, reward_product: Optional[str] = None):
+        reward_product = reward_product or product
+        super().__init__(rule_id, (product,) if reward_product == product else (product, reward_product))
+        if buy <= 0 or get <= 0:
+            raise ValueError("Buy and get quantities must be positive")
+        self.product = product
+        self.reward_product = reward_product
+        self.buy = buy
+        self.get = get
+
+    def discount(self, cart: Cart) -> float:
+        if self.product not in cart or self.reward_product not in cart:
+            return 0.0
+        bought, _ = cart[self.product]
+        if self.reward_product == self.product:
+            free_units = bought // (self.buy + self.get) * self.get
+        else:
+            free_units = min(bought // self.buy * self.get, cart[self.reward_product][0])
+        return free_units * cart[self.reward_product][1]
+
+
+class TieredQuantityRule(PromotionRule):
+    """Percentage off a product's line value, by the highest quantity tier reached"""
+
+    def __init__(self, rule_id: str, product: str, tiers: Sequence[Tuple[int, float]]):
+        super().__init__(rule_id, (product,))
+        if any(minimum <= 0 or not 0 < rate <= 1 for minimum, rate in tiers):
+            raise ValueError("Tiers need a positive quantity and a rate in (0, 1]")
+        self.product = product
+        self.tiers = sorted(tiers, reverse=True)
+
+    def discount(self, cart: Cart) -> float:
+        if self.product not in cart:
+            return 0.0
+        quantity, unit_price = cart[self.product]
+        for minimum, rate in self.tiers:
+            if quantity >= minimum:
+                return quantity * unit_price * rate
+        return 0.0
+
+
+class PromotionEngine:
+    """Evaluates only the rules indexed under the cart's products
+
+    Promotions do not stack: rules are applied best-first and a rule is
+    skipped once another applied rule has claimed any of its products.
+    """
+
+    def __init__(self, rules: Iterable[PromotionRule]):
+        self.rules: List[PromotionRule] = list(rules)
+        self._by_product: Dict[str, List[PromotionRule]] = {}
+        for rule in self.rules:
+            for product in set(rule.products):
+                self._by_product.setdefault(product, []).append(rule)
+
+    def candidates(self, cart: Cart) -> List[PromotionRule]:
+        """Rules touching at least one product in the cart, each listed once"""
+        seen = set()
+        found = []
+        for product in cart:
+            for rule in self._by_product.get(product, ()):
+                if id(rule) not in seen:
+                    seen.add(id(rule))
+                    found.append(rule)
+        return found
+
+    def evaluate(self, items: Iterable[Dict]) -> List[Tuple[str, float]]:
+        """Applied promotions as (rule_id, discount), largest first"""
+        cart = build_cart(items)
+        return self._select(cart, self.candidates(cart))
+
+    def evaluate_all_rules(self, items: Iterable[Dict]) -> List[Tuple[str, float]]:
+        """Unindexed evaluation of every rule; same result, used as a baseline"""
+        return self._select(build_cart(items), self.rules)
+
+    @staticmethod
+    def _select(cart: Cart, rules: Iterable[PromotionRule]) -> List[Tuple[str, float]]:
+        offers = [(rule.discount(cart), rule) for rule in rules]
+        offers = [(amount, rule) for amount, rule in offers if amount > 0]
+        offers.sort(key=lambda offer: (-offer[0], offer[1].rule_id))
+
+        claimed = set()
+        applied = []
+        for amount, rule in offers:
+            if claimed.isdisjoint(rule.products):
+                claimed.update(rule.products)
+                applied.append((rule.rule_id, amount))
+        return applied
+
+    def total_discount(self, items: Iterable[Dict]) -> float:
+        return sum(amount for _, amount in self.evaluate(items))
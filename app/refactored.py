@@ -3,9 +3,11 @@ E-Commerce Order Management - AFTER REFACTORING
 Clean code with DRY principle, extracted methods, and better structure
 """
 
+from bisect import bisect_right
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 
 class DiscountCode(Enum):
@@ -16,18 +18,69 @@ class DiscountCode(Enum):
     SAVE30 = 0.3
 
 
+def discount_rate(code: Optional[str]) -> float:
+    """Rate of a discount code; unknown or missing codes give no discount"""
+    member = DiscountCode.__members__.get(code) if code else None
+    return member.value if member else 0.0
+
+
+class OrderStatus(Enum):
+    """Enum for order statuses - replaces free-form status strings"""
+
+    PENDING = "pending"
+    PAID = "paid"
+    SHIPPED = "shipped"
+    DELIVERED = "delivered"
+    CANCELLED = "cancelled"
+
+
+STATUS_TRANSITIONS = {
+    OrderStatus.PENDING: frozenset({OrderStatus.PAID, OrderStatus.CANCELLED}),
+    OrderStatus.PAID: frozenset({OrderStatus.SHIPPED, OrderStatus.CANCELLED}),
+    OrderStatus.SHIPPED: frozenset({OrderStatus.DELIVERED}),
+    OrderStatus.DELIVERED: frozenset(),
+    OrderStatus.CANCELLED: frozenset(),
+}
+
+
+class OrderEvent(Enum):
+    """Enum for order changes reported to listeners"""
+
+    ITEM_ADDED = "item_added"
+    QUANTITY_CHANGED = "quantity_changed"
+    DISCOUNT_APPLIED = "discount_applied"
+    PRICE_CHANGED = "price_changed"
+    STATUS_CHANGED = "status_changed"
+
+
+# Events that can change what the customer is charged
+PRICE_EVENTS = frozenset(
+    {OrderEvent.ITEM_ADDED, OrderEvent.QUANTITY_CHANGED, OrderEvent.DISCOUNT_APPLIED, OrderEvent.PRICE_CHANGED}
+)
+
+
+OrderListener = Callable[["Order", OrderEvent, Dict], None]
+
+
 class ShippingCalculator:
     """Extracted shipping logic into dedicated class"""
 
-    @staticmethod
-    def calculate(subtotal: float) -> float:
+    # (subtotal an order must exceed, charge from there on), lowest threshold first
+    TIERS = ((50, 5.0), (100, 0.0))
+    # Charge at or below the lowest threshold
+    BASE_CHARGE = 10.0
+
+    @classmethod
+    def calculate(cls, subtotal: float) -> float:
         """Single source of truth for shipping calculation"""
-        if subtotal > 100:
-            return 0.0
-        elif subtotal > 50:
-            return 5.0
-        else:
-            return 10.0
+        for threshold, charge in reversed(cls.TIERS):
+            if subtotal > threshold:
+                return charge
+        return cls.BASE_CHARGE
+
+
+# Keys of PriceCalculator.get_breakdown(), in display order
+BREAKDOWN_KEYS = ("subtotal", "promotion", "discount", "tax", "shipping", "total")
 
 
 class PriceCalculator:
@@ -35,9 +88,20 @@ class PriceCalculator:
 
     TAX_RATE = 0.1
 
-    def __init__(self, items: List[Dict]):
+    def __init__(
+        self,
+        items: List[Dict],
+        tax_engine=None,
+        postal_code: Optional[str] = None,
+        promotion_engine=None,
+    ):
         self.items = items
+        self.tax_engine = tax_engine
+        self.postal_code = postal_code
+        self.promotion_engine = promotion_engine
         self._subtotal_cache = None
+        self._line_tax_cache = None
+        self._promotion_cache = None
 
     def get_subtotal(self) -> float:
         """Calculate subtotal once and cache it"""
@@ -46,47 +110,125 @@ class PriceCalculator:
         return self._subtotal_cache
 
     def get_tax(self) -> float:
-        """Calculate tax based on subtotal"""
-        return self.get_subtotal() * self.TAX_RATE
+        """Calculate tax on the subtotal after promotions, as get_breakdown() does"""
+        return self._tax_on(self.get_subtotal() - self.get_promotion_discount())
+
+    def _tax_on(self, taxable_subtotal: float) -> float:
+        """Flat rate by default, jurisdiction rates pro-rated when an engine is set"""
+        if self.tax_engine is None:
+            return taxable_subtotal * self.TAX_RATE
+
+        subtotal = self.get_subtotal()
+        if not subtotal:
+            return 0.0
+        if self._line_tax_cache is None:
+            self._line_tax_cache = sum(self.tax_engine.line_taxes(self.items, self.postal_code))
+        return self._line_tax_cache * (taxable_subtotal / subtotal)
 
     def get_shipping(self) -> float:
         """Calculate shipping using dedicated calculator"""
         return ShippingCalculator.calculate(self.get_subtotal())
 
-    def get_discount(self, code: Optional[str]) -> float:
-        """Calculate discount using enum values"""
-        if not code:
+    def get_promotion_discount(self) -> float:
+        """Line-level promotions, applied before any discount code"""
+        if self.promotion_engine is None:
             return 0.0
+        if self._promotion_cache is None:
+            self._promotion_cache = self.promotion_engine.total_discount(self.items)
+        return self._promotion_cache
 
-        try:
-            discount_rate = DiscountCode[code].value
-            return self.get_subtotal() * discount_rate
-        except KeyError:
+    def get_discount(self, code: Optional[str]) -> float:
+        """Calculate discount using enum values"""
+        rate = discount_rate(code)
+        if not rate:
             return 0.0
+        return (self.get_subtotal() - self.get_promotion_discount()) * rate
 
     def get_total(self, discount_code: Optional[str] = None) -> float:
         """Calculate final total with all components"""
-        subtotal = self.get_subtotal()
-        discount = self.get_discount(discount_code)
-        discounted_subtotal = subtotal - discount
-        tax = discounted_subtotal * self.TAX_RATE
-        shipping = self.get_shipping()
+        return self.get_breakdown(discount_code)["total"]
+
+    def get_breakdown(self, discount_code: Optional[str] = None) -> Dict[str, float]:
+        """Calculate every price component in one pass"""
+        return self.breakdown_from(
+            self.get_subtotal(), self.get_promotion_discount(), discount_rate(discount_code), self._tax_on
+        )
 
-        return discounted_subtotal + tax + shipping
+    @classmethod
+    def breakdown_from(
+        cls,
+        subtotal: float,
+        promotion: float = 0.0,
+        rate: float = 0.0,
+        tax_on: Optional[Callable[[float], float]] = None,
+    ) -> Dict[str, float]:
+        """Single source of truth for combining price components
+
+        Callers that already know the subtotal, promotion and discount rate
+        use this instead of building a calculator; tax_on defaults to the
+        flat rate on the discounted subtotal.
+        """
+        discount = (subtotal - promotion) * rate
+        discounted_subtotal = subtotal - promotion - discount
+        tax = tax_on(discounted_subtotal) if tax_on is not None else discounted_subtotal * cls.TAX_RATE
+        shipping = ShippingCalculator.calculate(subtotal)
+
+        return {
+            "subtotal": subtotal,
+            "promotion": promotion,
+            "discount": discount,
+            "tax": tax,
+            "shipping": shipping,
+            "total": discounted_subtotal + tax + shipping,
+        }
+
+    def append_item(self, item: Dict):
+        """Add a line, extending a cached subtotal instead of recomputing it"""
+        self.items.append(item)
+        subtotal = self._subtotal_cache
+        self.invalidate_cache()
+        if subtotal is not None:
+            # Continues the same left-to-right sum get_subtotal() does over the longer list
+            self._subtotal_cache = subtotal + item["price"] * item["quantity"]
 
     def invalidate_cache(self):
         """Clear cache when items change"""
         self._subtotal_cache = None
+        self._line_tax_cache = None
+        self._promotion_cache = None
+
+
+# Every item line of an order summary starts with this, and no header or totals line does
+SUMMARY_ITEM_PREFIX = "  - "
+
+
+def format_reductions(breakdown: Dict[str, float], discount_code: Optional[str]) -> List[str]:
+    """Summary and invoice lines for the reductions of a breakdown, none when nothing was taken off"""
+    lines = []
+    if breakdown["promotion"]:
+        lines.append(f"Promotion: -${breakdown['promotion']:.2f}")
+    if breakdown["discount"]:
+        lines.append(f"Discount ({discount_code}): -${breakdown['discount']:.2f}")
+    return lines
 
 
 class OrderItem:
     """Extracted item validation and representation"""
 
-    def __init__(self, product_name: str, price: float, quantity: int):
+    def __init__(
+        self,
+        product_name: str,
+        price: float,
+        quantity: int,
+        category: Optional[str] = None,
+        product_id: Optional[int] = None,
+    ):
         self._validate(product_name, price, quantity)
         self.product_name = product_name
         self.price = price
         self.quantity = quantity
+        self.category = category
+        self.product_id = product_id
 
     @staticmethod
     def _validate(product_name: str, price: float, quantity: int):
@@ -98,70 +240,343 @@ class OrderItem:
         if quantity <= 0:
             raise ValueError("Quantity must be positive")
 
+    @staticmethod
+    def _validate_lines(lines: Sequence[Sequence]):
+        """Validate a whole batch of (name, price, quantity[, category[, product_id]]) lines at once"""
+        if not all(line[0] and line[0].strip() for line in lines):
+            raise ValueError("Product name cannot be empty")
+        if lines and min(line[1] for line in lines) <= 0:
+            raise ValueError("Price must be positive")
+        if lines and min(line[2] for line in lines) <= 0:
+            raise ValueError("Quantity must be positive")
+
+    @classmethod
+    def _from_validated(cls, lines: Sequence[Sequence]) -> List["OrderItem"]:
+        """Build items from lines already checked by _validate_lines"""
+        items = []
+        for line in lines:
+            item = cls.__new__(cls)
+            item.product_name = line[0]
+            item.price = line[1]
+            item.quantity = line[2]
+            item.category = line[3] if len(line) > 3 else None
+            item.product_id = line[4] if len(line) > 4 else None
+            items.append(item)
+        return items
+
     def get_line_total(self) -> float:
         """Calculate item total"""
         return self.price * self.quantity
 
     def to_dict(self) -> Dict:
         """Convert to dictionary for compatibility"""
-        return {"product": self.product_name, "price": self.price, "quantity": self.quantity}
+        return {"product": self.product_name, "price": self.price, "quantity": self.quantity, "category": self.category}
 
 
 class Order:
     """Refactored Order class - clean and focused"""
 
-    def __init__(self, order_id: str, customer_name: str, customer_email: str):
+    LINE_CHANGE_LIMIT = 1000
+
+    def __init__(
+        self,
+        order_id: str,
+        customer_name: str,
+        customer_email: str,
+        postal_code: Optional[str] = None,
+        tax_engine=None,
+        created_at: Optional[datetime] = None,
+        promotion_engine=None,
+    ):
         self.order_id = order_id
         self.customer_name = customer_name
         self.customer_email = customer_email
+        self.postal_code = postal_code
+        self.tax_engine = tax_engine
+        self.promotion_engine = promotion_engine
         self.items: List[OrderItem] = []
-        self.created_at = datetime.now()
-        self.status = "pending"
+        self.created_at = created_at or datetime.now()
+        self._status = OrderStatus.PENDING
+        self.discount_code: Optional[str] = None
         self._calculator = None
-
-    def add_item(self, product_name: str, price: float, quantity: int):
+        self._version = 0
+        self._listeners: List[OrderListener] = []
+        # (version, line index) for each line edit, oldest first
+        self._line_changes: List[Tuple[int, int]] = []
+        self._change_log_start = 0
+
+    @property
+    def status(self) -> str:
+        return self._status.value
+
+    @status.setter
+    def status(self, value: Union[str, OrderStatus]):
+        self.transition_to(value)
+
+    def transition_to(self, status: Union[str, OrderStatus]):
+        """Move to a new status, rejecting transitions the state machine forbids"""
+        new_status = OrderStatus(status)
+        if new_status not in STATUS_TRANSITIONS[self._status]:
+            raise ValueError(f"Cannot change status from {self._status.value} to {new_status.value}")
+
+        previous = self._status
+        self._status = new_status
+        self._version += 1
+        self._notify(OrderEvent.STATUS_CHANGED, {"previous": previous, "status": new_status})
+
+    def add_listener(self, listener: OrderListener):
+        """Register a callback invoked as listener(order, event, payload) after each change"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: OrderListener):
+        self._listeners.remove(listener)
+
+    def _notify(self, event: OrderEvent, payload: Dict):
+        for listener in list(self._listeners):
+            listener(self, event, payload)
+
+    @property
+    def version(self) -> int:
+        """Counter bumped on every change to the order"""
+        return self._version
+
+    def add_item(
+        self,
+        product_name: str,
+        price: float,
+        quantity: int,
+        category: Optional[str] = None,
+        product_id: Optional[int] = None,
+    ):
         """Add item using OrderItem class"""
-        item = OrderItem(product_name, price, quantity)
+        item = OrderItem(product_name, price, quantity, category, product_id)
         self.items.append(item)
+        self._version += 1
+        self._record_line_change(len(self.items) - 1)
+        if self._calculator:
+            self._calculator.append_item(item.to_dict())
+        self._notify(OrderEvent.ITEM_ADDED, {"item": item})
+
+    def update_quantity(self, index: int, quantity: int):
+        """Change the quantity of an existing line"""
+        item = self.items[index]
+        OrderItem._validate(item.product_name, item.price, quantity)
+        previous = item.quantity
+        item.quantity = quantity
+        self._version += 1
+        self._record_line_change(index)
+        if self._calculator:
+            self._calculator.items[index]["quantity"] = quantity
+            self._calculator.invalidate_cache()
+        self._notify(OrderEvent.QUANTITY_CHANGED, {"index": index, "previous": previous, "quantity": quantity})
+
+    def reprice_product(self, product_id: int, price: float) -> int:
+        """Apply a catalog price change to every line of the product, returning lines changed"""
+        indexes = [index for index, item in enumerate(self.items) if item.product_id == product_id and item.price != price]
+        if not indexes:
+            return 0
+        OrderItem._validate(self.items[indexes[0]].product_name, price, 1)
+        for index in indexes:
+            self.items[index].price = price
+            if self._calculator:
+                self._calculator.items[index]["price"] = price
         if self._calculator:
             self._calculator.invalidate_cache()
+        self._version += 1
+        for index in indexes:
+            self._record_line_change(index)
+        self._notify(OrderEvent.PRICE_CHANGED, {"product_id": product_id, "price": price, "indexes": indexes})
+        return len(indexes)
+
+    def _record_line_change(self, index: int):
+        self._line_changes.append((self._version, index))
+        if len(self._line_changes) > self.LINE_CHANGE_LIMIT:
+            # Drop the older half; changes before the new floor are no longer known
+            dropped = len(self._line_changes) // 2
+            self._change_log_start = self._line_changes[dropped - 1][0]
+            del self._line_changes[:dropped]
+
+    def changed_lines_since(self, version: int) -> Optional[List[int]]:
+        """Indexes of lines edited after `version`, or None if the log no longer reaches back that far"""
+        if version < self._change_log_start:
+            return None
+        start = bisect_right(self._line_changes, (version, len(self.items)))
+        return sorted({index for _, index in self._line_changes[start:]})
+
+    def set_discount_code(self, code: Optional[str]):
+        """Attach a discount code to the order, or clear it with None"""
+        if code is not None and code not in DiscountCode.__members__:
+            raise ValueError(f"Unknown discount code: {code}")
+        previous = self.discount_code
+        self.discount_code = code
+        self._version += 1
+        self._notify(OrderEvent.DISCOUNT_APPLIED, {"previous": previous, "code": code})
+
+    def to_state(self) -> Dict:
+        """Plain, JSON-friendly copy of the order's data"""
+        return {
+            "order_id": self.order_id,
+            "customer_name": self.customer_name,
+            "customer_email": self.customer_email,
+            "postal_code": self.postal_code,
+            "created_at": self.created_at.isoformat(),
+            "status": self.status,
+            "discount_code": self.discount_code,
+            "version": self._version,
+            "items": [
+                [item.product_name, item.price, item.quantity, item.category, item.product_id] for item in self.items
+            ],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict, tax_engine=None, promotion_engine=None) -> "Order":
+        """Rebuild an order from to_state() output without replaying its history
+
+        Engines are not part of the state and are passed back in here.
+        """
+        order = cls.from_lines(
+            state["order_id"],
+            state["customer_name"],
+            state["customer_email"],
+            state["items"],
+            created_at=datetime.fromisoformat(state["created_at"]),
+            postal_code=state["postal_code"],
+            tax_engine=tax_engine,
+            promotion_engine=promotion_engine,
+        )
+        order._status = OrderStatus(state["status"])
+        order.discount_code = state["discount_code"]
+        order._version = order._change_log_start = state.get("version", 0)
+        return order
+
+    @classmethod
+    def from_lines(
+        cls,
+        order_id: str,
+        customer_name: str,
+        customer_email: str,
+        lines: Sequence[Sequence],
+        created_at: Optional[datetime] = None,
+        postal_code: Optional[str] = None,
+        tax_engine=None,
+        promotion_engine=None,
+    ) -> "Order":
+        """Build an order from (name, price, quantity[, category[, product_id]]) lines in one step"""
+        OrderItem._validate_lines(lines)
+        return cls._from_validated_lines(
+            order_id, customer_name, customer_email, lines, created_at, postal_code, tax_engine, promotion_engine
+        )
+
+    @classmethod
+    def bulk_create(
+        cls,
+        specs: Iterable[Sequence],
+        created_at: Optional[datetime] = None,
+        tax_engine=None,
+        promotion_engine=None,
+    ) -> List["Order"]:
+        """Build many orders from (order_id, name, email, lines[, postal_code]) specs
+
+        All lines are validated in a single pass and every order shares one
+        creation timestamp.
+        """
+        specs = list(specs)
+        OrderItem._validate_lines(list(chain.from_iterable(spec[3] for spec in specs)))
+        created_at = created_at or datetime.now()
+        engines = (tax_engine, promotion_engine)
+        return [
+            cls._from_validated_lines(*spec[:4], created_at, spec[4] if len(spec) > 4 else None, *engines) for spec in specs
+        ]
+
+    @classmethod
+    def _from_validated_lines(
+        cls,
+        order_id: str,
+        customer_name: str,
+        customer_email: str,
+        lines: Sequence[Sequence],
+        created_at: Optional[datetime],
+        postal_code: Optional[str],
+        tax_engine,
+        promotion_engine=None,
+    ) -> "Order":
+        """Create the order with its items and a calculator whose subtotal is already cached"""
+        order = cls(order_id, customer_name, customer_email, postal_code, tax_engine, created_at, promotion_engine)
+        order.items = OrderItem._from_validated(lines)
+        calculator = order._new_calculator()
+        calculator._subtotal_cache = sum(item.price * item.quantity for item in order.items)
+        order._calculator = calculator
+        return order
+
+    def reserve_inventory(self, inventory):
+        """Reserve stock for every line in one batch call"""
+        return inventory.reserve((item.product_name, item.quantity) for item in self.items)
 
     def _get_calculator(self) -> PriceCalculator:
         """Lazy initialization of calculator"""
         if self._calculator is None:
-            items_dict = [item.to_dict() for item in self.items]
-            self._calculator = PriceCalculator(items_dict)
+            self._calculator = self._new_calculator()
         return self._calculator
 
+    def _new_calculator(self) -> PriceCalculator:
+        items_dict = [item.to_dict() for item in self.items]
+        return PriceCalculator(items_dict, self.tax_engine, self.postal_code, self.promotion_engine)
+
     def calculate_subtotal(self) -> float:
         """Delegate to calculator"""
         return self._get_calculator().get_subtotal()
 
     def calculate_tax(self) -> float:
-        """Delegate to calculator"""
-        return self._get_calculator().get_tax()
+        """Delegate to calculator, after the order's own discount code"""
+        return self._get_calculator().get_breakdown(self.discount_code)["tax"]
 
     def calculate_shipping(self) -> float:
         """Delegate to calculator"""
         return self._get_calculator().get_shipping()
 
     def calculate_total(self) -> float:
-        """Delegate to calculator"""
-        return self._get_calculator().get_total()
+        """Delegate to calculator, applying the order's own discount code"""
+        return self._get_calculator().get_total(self.discount_code)
 
     def apply_discount_code(self, code: str) -> float:
         """Delegate to calculator"""
         return self._get_calculator().get_discount(code)
 
     def calculate_total_with_discount(self, discount_code: Optional[str] = None) -> float:
-        """Delegate to calculator"""
-        return self._get_calculator().get_total(discount_code)
+        """Delegate to calculator, falling back to the order's own discount code"""
+        return self._get_calculator().get_total(discount_code or self.discount_code)
 
     def get_order_summary(self) -> str:
         """Generate summary using helper method"""
         calculator = self._get_calculator()
 
-        lines = [
+        lines = self._format_header()
+        lines.extend(self._format_items())
+        lines.extend(self._format_totals(calculator))
+
+        return "\n".join(lines) + "\n"
+
+    def get_summary_delta(self, since_version: Optional[int] = None) -> "SummaryDelta":
+        """Summary lines changed since a version the client holds, or all of them if the log cannot tell"""
+        changed: Optional[Sequence[int]] = None
+        if since_version is not None and since_version <= self._version:
+            changed = self.changed_lines_since(since_version)
+        full = changed is None
+        if changed is None:
+            changed = range(len(self.items))
+        return SummaryDelta(
+            self.order_id,
+            since_version,
+            self._version,
+            self._format_header(),
+            {index: self._format_item(self.items[index]) for index in changed},
+            len(self.items),
+            self._format_totals(self._get_calculator()),
+            full,
+        )
+
+    def _format_header(self) -> List[str]:
+        return [
             f"Order #{self.order_id}",
             f"Customer: {self.customer_name}",
             f"Email: {self.customer_email}",
@@ -169,23 +584,151 @@ class Order:
             "Items:",
         ]
 
-        lines.extend(self._format_items())
-        lines.extend(self._format_totals(calculator))
-
-        return "\n".join(lines) + "\n"
-
     def _format_items(self) -> List[str]:
         """Extract item formatting logic"""
-        return [f"  - {item.product_name}: ${item.price} x {item.quantity} = ${item.get_line_total()}" for item in self.items]
+        return [self._format_item(item) for item in self.items]
+
+    @staticmethod
+    def _format_item(item: OrderItem) -> str:
+        return f"{SUMMARY_ITEM_PREFIX}{item.product_name}: ${item.price} x {item.quantity} = ${item.get_line_total()}"
+
+    def _tax_label(self) -> str:
+        """Flat-rate orders keep the historical label"""
+        return "Tax (10%)" if self.tax_engine is None else "Tax"
 
     def _format_totals(self, calculator: PriceCalculator) -> List[str]:
         """Extract totals formatting logic"""
-        return [
-            f"Subtotal: ${calculator.get_subtotal():.2f}",
-            f"Tax (10%): ${calculator.get_tax():.2f}",
-            f"Shipping: ${calculator.get_shipping():.2f}",
-            f"Total: ${calculator.get_total():.2f}",
+        breakdown = calculator.get_breakdown(self.discount_code)
+        lines = [f"Subtotal: ${breakdown['subtotal']:.2f}"]
+        lines.extend(format_reductions(breakdown, self.discount_code))
+        lines.extend(
+            [
+                f"{self._tax_label()}: ${breakdown['tax']:.2f}",
+                f"Shipping: ${breakdown['shipping']:.2f}",
+                f"Total: ${breakdown['total']:.2f}",
+            ]
+        )
+        return lines
+
+
+class SummaryDelta:
+    """What a client needs to bring its copy of an order summary up to `version`
+
+    Header and totals lines are always sent whole; item lines only when
+    they changed after `since`, unless `full` is set, in which case every
+    item line is included and the client's copy is replaced.
+    """
+
+    def __init__(
+        self,
+        order_id: str,
+        since: Optional[int],
+        version: int,
+        header: List[str],
+        lines: Dict[int, str],
+        line_count: int,
+        totals: List[str],
+        full: bool,
+    ):
+        self.order_id = order_id
+        self.since = since
+        self.version = version
+        self.header = header
+        # item line index -> rendered line
+        self.lines = lines
+        self.line_count = line_count
+        self.totals = totals
+        self.full = full
+
+    def apply(self, summary: Optional[str] = None) -> str:
+        """The up-to-date summary text, patched from the client's copy taken at `since`"""
+        if self.full:
+            items = [self.lines[index] for index in range(self.line_count)]
+        else:
+            if summary is None:
+                raise ValueError("A partial summary delta needs the summary it was taken against")
+            previous = summary.split("\n")[:-1]
+            # The totals block may have changed length since, so item lines are found by their prefix
+            start = end = len(self.header)
+            while end < len(previous) and previous[end].startswith(SUMMARY_ITEM_PREFIX):
+                end += 1
+            items = previous[start:end]
+            del items[self.line_count:]
+            items.extend([""] * (self.line_count - len(items)))
+            for index, line in self.lines.items():
+                items[index] = line
+        return "\n".join(self.header + items + self.totals) + "\n"
+
+
+# (product_name, price, quantity) of a line as last invoiced
+InvoicedLine = Tuple[str, float, int]
+
+INVOICE_TOTALS = BREAKDOWN_KEYS
+
+# Totals that reduce the charge; adjustments show them by their effect on it
+INVOICE_REDUCTIONS = frozenset({"promotion", "discount"})
+
+
+def _signed_amount(amount: float) -> str:
+    return f"{'-' if amount < 0 else '+'}${abs(amount):.2f}"
+
+
+class InvoiceAdjustment:
+    """Credit note or supplementary invoice covering changes made after invoicing"""
+
+    def __init__(
+        self,
+        adjustment_id: str,
+        invoice_id: str,
+        order_id: str,
+        from_version: int,
+        to_version: int,
+        lines: List[Tuple[int, Optional[InvoicedLine], InvoicedLine]],
+        deltas: Dict[str, float],
+    ):
+        self.adjustment_id = adjustment_id
+        self.invoice_id = invoice_id
+        self.order_id = order_id
+        self.from_version = from_version
+        self.to_version = to_version
+        # (line index, line as invoiced or None when added, line now)
+        self.lines = lines
+        self.deltas = deltas
+        self.created_at = datetime.now()
+
+    @property
+    def is_credit_note(self) -> bool:
+        return self.deltas["total"] < 0
+
+    def render(self) -> str:
+        """Text of the credit note or supplementary invoice"""
+        title = "CREDIT NOTE" if self.is_credit_note else "SUPPLEMENTARY INVOICE"
+        lines = [
+            f"{title} #{self.adjustment_id}",
+            f"Date: {self.created_at.strftime('%Y-%m-%d %H:%M')}",
+            f"Invoice: {self.invoice_id}",
+            f"Order: {self.order_id} (version {self.from_version} -> {self.to_version})",
+            "",
+            "Changed items:",
         ]
+        for _, old, new in self.lines:
+            name, price, quantity = new
+            change = price * quantity
+            if old is None:
+                lines.append(f"  {name}: added ${price} x {quantity} = {_signed_amount(change)}")
+            else:
+                change -= old[1] * old[2]
+                lines.append(f"  {name}: ${old[1]} x {old[2]} -> ${price} x {quantity} = {_signed_amount(change)}")
+
+        lines.append("")
+        for key in INVOICE_TOTALS:
+            delta = self.deltas[key]
+            if key in INVOICE_REDUCTIONS:
+                if not delta:
+                    continue
+                delta = -delta
+            lines.append(f"{'TOTAL' if key == 'total' else key.capitalize()}: {_signed_amount(delta)}")
+        return "\n".join(lines) + "\n"
 
 
 class Invoice:
@@ -195,6 +738,59 @@ class Invoice:
         self.invoice_id = invoice_id
         self.order = order
         self.created_at = datetime.now()
+        self._mark_issued()
+
+    def _mark_issued(self):
+        """Remember the order version, lines and totals this invoice was issued against"""
+        self.issued_version = self.order.version
+        self.issued_lines: List[InvoicedLine] = [
+            (item.product_name, item.price, item.quantity) for item in self.order.items
+        ]
+        self.issued_totals = self._current_totals()
+
+    def _current_totals(self) -> Dict[str, float]:
+        """Totals as charged, with the order's own discount code"""
+        breakdown = self.order._get_calculator().get_breakdown(self.order.discount_code)
+        return {key: breakdown[key] for key in INVOICE_TOTALS}
+
+    def reissue(self, adjustment_id: str) -> Optional[InvoiceAdjustment]:
+        """Adjustment for what changed since the last issue, or None if nothing billable did
+
+        Only lines the order logged as edited are compared, falling back to
+        every line when its change log no longer reaches the issued version.
+        The invoice then counts as issued against the current order.
+        """
+        order = self.order
+        if order.version == self.issued_version:
+            return None
+
+        indexes = order.changed_lines_since(self.issued_version)
+        if indexes is None:
+            indexes = range(len(order.items))
+        changed = []
+        for index in indexes:
+            item = order.items[index]
+            line = (item.product_name, item.price, item.quantity)
+            previous = self.issued_lines[index] if index < len(self.issued_lines) else None
+            if line != previous:
+                changed.append((index, previous, line))
+
+        totals = self._current_totals()
+        deltas = {key: totals[key] - self.issued_totals[key] for key in INVOICE_TOTALS}
+        from_version = self.issued_version
+        for index, _, line in changed:
+            if index < len(self.issued_lines):
+                self.issued_lines[index] = line
+            else:
+                self.issued_lines.append(line)
+        self.issued_version = order.version
+        self.issued_totals = totals
+
+        if not changed and not any(deltas.values()):
+            return None
+        return InvoiceAdjustment(
+            adjustment_id, self.invoice_id, order.order_id, from_version, order.version, changed, deltas
+        )
 
     def calculate_invoice_subtotal(self) -> float:
         """Reuse order's calculation"""
@@ -210,7 +806,7 @@ class Invoice:
 
     def generate_invoice(self) -> str:
         """Generate invoice by reusing order data"""
-        calculator = self.order._get_calculator()
+        breakdown = self.order._get_calculator().get_breakdown(self.order.discount_code)
 
         lines = [
             f"INVOICE #{self.invoice_id}",
@@ -225,13 +821,13 @@ class Invoice:
         for item in self.order.items:
             lines.append(f"  {item.product_name}: ${item.price} x {item.quantity} = ${item.get_line_total()}")
 
+        lines.extend(["", f"Subtotal: ${breakdown['subtotal']:.2f}"])
+        lines.extend(format_reductions(breakdown, self.order.discount_code))
         lines.extend(
             [
-                "",
-                f"Subtotal: ${calculator.get_subtotal():.2f}",
-                f"Tax: ${calculator.get_tax():.2f}",
-                f"Shipping: ${calculator.get_shipping():.2f}",
-                f"TOTAL: ${calculator.get_total():.2f}",
+                f"Tax: ${breakdown['tax']:.2f}",
+                f"Shipping: ${breakdown['shipping']:.2f}",
+                f"TOTAL: ${breakdown['total']:.2f}",
             ]
         )
 
@@ -0,0 +1,141 @@
+"""
+In-memory order repository
+Secondary indexes are kept up to date from order events, so lookups by
+id, customer, status, creation time and total are index queries instead
+of full scans
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from app.refactored import PRICE_EVENTS, Order, OrderEvent, OrderStatus
+
+
+class SortedIndex:
+    """Order ids sorted by key, with O(log n) range lookups"""
+
+    def __init__(self):
+        self._keys: List[Any] = []
+        self._ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: Any, order_id: str):
+        position = bisect_right(self._keys, key)
+        self._keys.insert(position, key)
+        self._ids.insert(position, order_id)
+
+    def remove(self, key: Any, order_id: str):
+        start = bisect_left(self._keys, key)
+        end = bisect_right(self._keys, key, start)
+        position = self._ids.index(order_id, start, end)
+        del self._keys[position]
+        del self._ids[position]
+
+    def range(self, low: Any = None, high: Any = None) -> List[str]:
+        """Ids whose key lies in [low, high); None leaves that side open"""
+        start = 0 if low is None else bisect_left(self._keys, low)
+        end = len(self._keys) if high is None else bisect_left(self._keys, high)
+        return self._ids[start:end]
+
+
+class OrderRepository:
+    """Stores orders by id and indexes them by customer, status, created_at and total"""
+
+    def __init__(self):
+        self._orders: Dict[str, Order] = {}
+        self._email_index: Dict[str, Dict[str, None]] = {}
+        self._created_index = SortedIndex()
+        self._status_index: Dict[OrderStatus, SortedIndex] = {status: SortedIndex() for status in OrderStatus}
+        self._total_index = SortedIndex()
+        # Key each order is currently filed under in the total index
+        self._indexed_totals: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._orders
+
+    def __iter__(self) -> Iterator[Order]:
+        return iter(list(self._orders.values()))
+
+    def add(self, order: Order):
+        if order.order_id in self._orders:
+            raise ValueError(f"Order {order.order_id} already exists")
+        self._orders[order.order_id] = order
+        self._created_index.add(order.created_at, order.order_id)
+        self._status_index[OrderStatus(order.status)].add(order.created_at, order.order_id)
+        # Insertion-ordered dict keeps a customer's orders oldest first with O(1) removal
+        self._email_index.setdefault(order.customer_email, {})[order.order_id] = None
+        self._index_total(order)
+        order.add_listener(self._on_order_event)
+
+    def remove(self, order_id: str) -> Order:
+        order = self._orders.pop(order_id)
+        order.remove_listener(self._on_order_event)
+        self._created_index.remove(order.created_at, order_id)
+        self._status_index[OrderStatus(order.status)].remove(order.created_at, order_id)
+        customer_orders = self._email_index[order.customer_email]
+        del customer_orders[order_id]
+        if not customer_orders:
+            del self._email_index[order.customer_email]
+        self._total_index.remove(self._indexed_totals.pop(order_id), order_id)
+        return order
+
+    def get(self, order_id: str) -> Optional[Order]:
+        return self._orders.get(order_id)
+
+    def _index_total(self, order: Order):
+        """(Re)file an order in the total index under its current charged total"""
+        previous = self._indexed_totals.get(order.order_id)
+        if previous is not None:
+            self._total_index.remove(previous, order.order_id)
+        total = order.calculate_total_with_discount()
+        self._indexed_totals[order.order_id] = total
+        self._total_index.add(total, order.order_id)
+
+    def _on_order_event(self, order: Order, event: OrderEvent, payload: Dict):
+        """Keep secondary indexes in step with changes made through the order"""
+        if event in PRICE_EVENTS:
+            self._index_total(order)
+        elif event is OrderEvent.STATUS_CHANGED:
+            self._status_index[payload["previous"]].remove(order.created_at, order.order_id)
+            self._status_index[payload["status"]].add(order.created_at, order.order_id)
+
+    def _resolve(self, order_ids: List[str]) -> List[Order]:
+        return [self._orders[order_id] for order_id in order_ids]
+
+    def created_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Order]:
+        """Orders created in [start, end), oldest first"""
+        return self._resolve(self._created_index.range(start, end))
+
+    def find_by_status(
+        self,
+        status: Union[str, OrderStatus],
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> List[Order]:
+        """Orders in a status created in [created_from, created_to), oldest first"""
+        return self._resolve(self._status_index[OrderStatus(status)].range(created_from, created_to))
+
+    def find_by_customer(self, customer_email: str) -> List[Order]:
+        """Orders placed by a customer, oldest first"""
+        return self._resolve(list(self._email_index.get(customer_email, ())))
+
+    def find_by_total(
+        self,
+        min_total: Optional[float] = None,
+        max_total: Optional[float] = None,
+        free_shipping: Optional[bool] = None,
+    ) -> List[Order]:
+        """Orders with a total in [min_total, max_total), cheapest first"""
+        orders = self._resolve(self._total_index.range(min_total, max_total))
+        if free_shipping is None:
+            return orders
+        return [order for order in orders if (order.calculate_shipping() == 0) == free_shipping]
+
+    def count_by_status(self) -> Dict[str, int]:
+        return {status.value: len(index) for status, index in self._status_index.items()}
@@ -0,0 +1,197 @@
+"""
+Returns and partial refunds
+A ledger records returned quantities per order line and refunds the
+difference between what the customer was charged before and after each
+return. Per-order running totals (kept subtotal and pre-discount line
+tax) are cached, so a return costs time proportional to the lines it
+touches rather than re-pricing the whole order; editing the order drops
+them and they are rebuilt from its current lines.
+
+Policy: the discount code keeps applying, pro rata, to the goods kept;
+shipping is re-tiered on the kept subtotal, so a return that loses free
+shipping is refunded less; shipping already paid is not refunded when
+everything comes back.
+"""
+
+import csv
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional
+
+from app.refactored import BREAKDOWN_KEYS, PRICE_EVENTS, Order, OrderEvent, OrderStatus, PriceCalculator, discount_rate
+
+RETURNABLE_STATUSES = frozenset({OrderStatus.PAID, OrderStatus.SHIPPED, OrderStatus.DELIVERED})
+
+
+class Refund:
+    """What one return gives back; each amount is the drop in that charge"""
+
+    def __init__(self, return_id: Optional[str], order_id: str, lines: Dict[int, int], amounts: Dict[str, float]):
+        self.return_id = return_id
+        self.order_id = order_id
+        # line index -> quantity returned
+        self.lines = lines
+        self.amounts = amounts
+
+    @property
+    def total(self) -> float:
+        return self.amounts["total"]
+
+
+def _kept_items(items: List[Dict], returned: Dict[int, int]) -> List[Dict]:
+    """Order lines with the returned quantities taken off, dropping lines returned in full"""
+    if not returned:
+        return items
+    return [
+        dict(item, quantity=item["quantity"] - returned.get(index, 0))
+        for index, item in enumerate(items)
+        if item["quantity"] > returned.get(index, 0)
+    ]
+
+
+class _OrderReturns:
+    """Running state of one order's returns
+
+    Built from the order's current lines minus what was returned; the
+    ledger marks it stale when the order is edited and builds it again
+    before the next return.
+    """
+
+    __slots__ = ("returned", "kept_units", "kept_subtotal", "kept_line_tax", "charged", "stale")
+
+    def __init__(self, order: Order, returned: Optional[Dict[int, int]] = None, paid_shipping: float = 0.0):
+        items = order._get_calculator().items
+        self.returned: Dict[int, int] = dict(returned or {})
+        for index, quantity in self.returned.items():
+            if index >= len(items) or quantity > items[index]["quantity"]:
+                raise ValueError(f"Line {index} of order {order.order_id} now has fewer units than were returned")
+        kept = _kept_items(items, self.returned)
+        self.kept_units = sum(item["quantity"] for item in kept)
+        self.kept_subtotal = sum(item["price"] * item["quantity"] for item in kept)
+        # Tax on the kept goods before promotions and discounts; only needed with a tax engine
+        self.kept_line_tax = None
+        if order.tax_engine is not None:
+            self.kept_line_tax = sum(order.tax_engine.line_taxes(kept, order.postal_code))
+        self.stale = False
+        self.charged = self.price(order, paid_shipping)
+
+    def price(self, order: Order, paid_shipping: float) -> Dict[str, float]:
+        """Breakdown for the kept goods, using the running totals"""
+        if not self.kept_units:
+            return dict(dict.fromkeys(BREAKDOWN_KEYS, 0.0), shipping=paid_shipping, total=paid_shipping)
+
+        promotion = 0.0
+        if order.promotion_engine is not None:
+            # Promotions depend on the whole cart, so they are re-evaluated on what is kept
+            promotion = order.promotion_engine.total_discount(_kept_items(order._get_calculator().items, self.returned))
+        return PriceCalculator.breakdown_from(
+            self.kept_subtotal,
+            promotion,
+            discount_rate(order.discount_code),
+            None if self.kept_line_tax is None else self._tax_on,
+        )
+
+    def _tax_on(self, taxable_subtotal: float) -> float:
+        return self.kept_line_tax * (taxable_subtotal / self.kept_subtotal)
+
+
+class ReturnsLedger:
+    """Returned quantities and refunds for many orders"""
+
+    def __init__(self):
+        self._orders: Dict[str, _OrderReturns] = {}
+
+    def returned_quantities(self, order_id: str) -> Dict[int, int]:
+        state = self._orders.get(order_id)
+        return dict(state.returned) if state else {}
+
+    def charged(self, order: Order) -> Dict[str, float]:
+        """What the customer is paying for the order after all returns so far"""
+        if order.order_id not in self._orders:
+            return order._get_calculator().get_breakdown(order.discount_code)
+        return dict(self._state(order).charged)
+
+    def record_return(self, order: Order, lines: Dict[int, int], return_id: Optional[str] = None) -> Refund:
+        """Return `lines` (line index -> quantity) of an order and compute the refund"""
+        self._check_returnable(order)
+        state = self._state(order)
+        self._validate(order, state.returned, lines)
+
+        calculator = order._get_calculator()
+        returned_items = [dict(calculator.items[index], quantity=quantity) for index, quantity in lines.items()]
+        for index, quantity in lines.items():
+            state.returned[index] = state.returned.get(index, 0) + quantity
+        state.kept_units -= sum(lines.values())
+        state.kept_subtotal -= sum(item["price"] * item["quantity"] for item in returned_items)
+        if state.kept_line_tax is not None:
+            state.kept_line_tax -= sum(order.tax_engine.line_taxes(returned_items, order.postal_code))
+
+        before = state.charged
+        state.charged = state.price(order, before["shipping"])
+        amounts = {key: before[key] - state.charged[key] for key in BREAKDOWN_KEYS}
+        return Refund(return_id, order.order_id, dict(lines), amounts)
+
+    def _state(self, order: Order) -> _OrderReturns:
+        """Returns state of the order, built on first use and again after the order was edited"""
+        state = self._orders.get(order.order_id)
+        if state is None:
+            state = self._orders[order.order_id] = _OrderReturns(order)
+            order.add_listener(self._on_order_event)
+        elif state.stale:
+            state = self._orders[order.order_id] = _OrderReturns(order, state.returned, state.charged["shipping"])
+        return state
+
+    def _on_order_event(self, order: Order, event: OrderEvent, payload: Dict):
+        if event in PRICE_EVENTS:
+            self._orders[order.order_id].stale = True
+
+    @staticmethod
+    def _check_returnable(order: Order):
+        if order._status not in RETURNABLE_STATUSES:
+            raise ValueError(f"Cannot return items of a {order.status} order")
+
+    @staticmethod
+    def _validate(order: Order, returned: Dict[int, int], lines: Dict[int, int]):
+        if not lines:
+            raise ValueError("A return needs at least one line")
+        for index, quantity in lines.items():
+            if not 0 <= index < len(order.items):
+                raise ValueError(f"Order {order.order_id} has no line {index}")
+            if quantity <= 0:
+                raise ValueError("Quantity must be positive")
+            if quantity > order.items[index].quantity - returned.get(index, 0):
+                raise ValueError(f"Cannot return more of line {index} than was kept")
+
+    def process_records(self, orders: Dict[str, Order], records: Iterable[Dict]) -> List[Refund]:
+        """Apply return records carrying return_id, order_id, line and quantity
+
+        Rows of one return must be contiguous; repeated lines are summed.
+        Every return is checked before any is recorded, so a bad row raises
+        ValueError and leaves the ledger as it was.
+        """
+        returns = []
+        for return_id, rows in groupby(records, key=lambda record: record["return_id"]):
+            rows = list(rows)
+            order = orders.get(rows[0]["order_id"])
+            if order is None:
+                raise ValueError(f"Return {return_id} is for unknown order {rows[0]['order_id']}")
+            lines: Dict[int, int] = {}
+            for row in rows:
+                index = int(row["line"])
+                lines[index] = lines.get(index, 0) + int(row["quantity"])
+            returns.append((order, lines, return_id))
+
+        # Quantities returned per order so far, counting earlier returns in this batch
+        returned: Dict[str, Dict[int, int]] = {}
+        for order, lines, return_id in returns:
+            self._check_returnable(order)
+            if order.order_id not in returned:
+                returned[order.order_id] = dict(self._state(order).returned)
+            self._validate(order, returned[order.order_id], lines)
+            for index, quantity in lines.items():
+                returned[order.order_id][index] = returned[order.order_id].get(index, 0) + quantity
+        return [self.record_return(order, lines, return_id) for order, lines, return_id in returns]
+
+    def process_file(self, orders: Dict[str, Order], path: str) -> List[Refund]:
+        """Apply a CSV return file with a return_id,order_id,line,quantity header"""
+        with open(path, newline="") as handle:
+            return self.process_records(orders, csv.DictReader(handle))
@@ -0,0 +1,254 @@
+"""
+Shadow-mode pricing comparison
+The primary implementation answers every request as before; a sampled
+share of requests is also queued for a background thread that prices
+them with a candidate implementation and records where the two disagree
+and how their latencies compare. The queue is bounded: when the candidate
+falls behind, samples are dropped (the newest, or the oldest to keep the
+freshest) and counted, so shadowing never blocks or slows the request
+path beyond one non-blocking put.
+
+An implementation is any callable taking a ShadowRequest and returning a
+dict of results; order_pricer adapts an Order class such as
+app.example.Order or app.refactored.Order.
+"""
+
+import math
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from app.stats import LatencyStats
+
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+DROP_POLICIES = (DROP_NEWEST, DROP_OLDEST)
+
+
+class ShadowRequest:
+    """One pricing request: (product_name, price, quantity) lines and a discount code"""
+
+    __slots__ = ("order_id", "lines", "discount_code")
+
+    def __init__(self, order_id: str, lines: Sequence[Tuple[str, float, int]], discount_code: Optional[str] = None):
+        self.order_id = order_id
+        self.lines = lines
+        self.discount_code = discount_code
+
+
+Pricer = Callable[[ShadowRequest], Dict[str, Any]]
+
+
+def order_pricer(order_class: type) -> Pricer:
+    """Price requests by building an order of `order_class` for each one"""
+
+    def price(request: ShadowRequest) -> Dict[str, Any]:
+        order = order_class(request.order_id, "shadow", "shadow@example.com")
+        for product_name, price, quantity in request.lines:
+            order.add_item(product_name, price, quantity)
+        return {
+            "subtotal": order.calculate_subtotal(),
+            "discount": order.apply_discount_code(request.discount_code),
+            "shipping": order.calculate_shipping(),
+            "total": order.calculate_total_with_discount(request.discount_code),
+            "summary": order.get_order_summary(),
+        }
+
+    return price
+
+
+class Divergence:
+    """A sampled request whose candidate result differed from the primary one"""
+
+    def __init__(self, request: ShadowRequest, fields: Dict[str, Tuple[Any, Any]], error: Optional[str] = None):
+        self.request = request
+        # field -> (primary value, candidate value)
+        self.fields = fields
+        self.error = error
+
+
+def _same(primary: Any, candidate: Any, tolerance: float) -> bool:
+    if isinstance(primary, (int, float)) and isinstance(candidate, (int, float)):
+        return math.isclose(primary, candidate, rel_tol=tolerance, abs_tol=tolerance)
+    return primary == candidate
+
+
+class ShadowRunner:
+    """Serves requests with `primary` and compares a sample against `candidate` in the background"""
+
+    def __init__(
+        self,
+        primary: Pricer,
+        candidate: Pricer,
+        sample_rate: float = 0.01,
+        queue_size: int = 1000,
+        drop_policy: str = DROP_NEWEST,
+        tolerance: float = 1e-9,
+        keep_divergences: int = 100,
+        rng: Optional[random.Random] = None,
+    ):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("Sample rate must be between 0 and 1")
+        if queue_size <= 0:
+            raise ValueError("Queue size must be positive")
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.primary = primary
+        self.candidate = candidate
+        self.sample_rate = sample_rate
+        self.drop_policy = drop_policy
+        self.tolerance = tolerance
+        self.rng = rng or random.Random()
+        self.primary_latency = LatencyStats()
+        self.candidate_latency = LatencyStats()
+        self.requests = 0
+        self.sampled = 0
+        self.dropped = 0
+        self.compared = 0
+        self.divergent = 0
+        self.errors = 0
+        self.divergences: Deque[Divergence] = deque(maxlen=keep_divergences)
+        self._primary_seconds = 0.0
+        self._candidate_seconds = 0.0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple[ShadowRequest, Dict[str, Any], float]]]" = queue.Queue(queue_size)
+        self._worker = threading.Thread(target=self._run, name="pricing-shadow", daemon=True)
+        self._worker.start()
+
+    def price(self, request: ShadowRequest) -> Dict[str, Any]:
+        """Primary result for the request, sampling it for comparison on the way"""
+        started = time.perf_counter()
+        result = self.primary(request)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.requests += 1
+            if not self._closed and self.sample_rate and self.rng.random() < self.sample_rate:
+                self.sampled += 1
+                self._enqueue((request, result, elapsed))
+        return result
+
+    def _enqueue(self, sample: Tuple[ShadowRequest, Dict[str, Any], float]):
+        """Queue a sample without blocking; called with the lock held and the runner open
+
+        Holding the lock keeps every sample ahead of the stop signal close()
+        queues, so the drop policy below never sees or removes it.
+        """
+        try:
+            self._queue.put_nowait(sample)
+            return
+        except queue.Full:
+            pass
+        self.dropped += 1
+        if self.drop_policy == DROP_OLDEST:
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self._queue.put_nowait(sample)
+            except (queue.Empty, queue.Full):
+                pass
+
+    def _run(self):
+        while True:
+            sample = self._queue.get()
+            try:
+                if sample is None:
+                    return
+                self._compare(*sample)
+            finally:
+                self._queue.task_done()
+
+    def _compare(self, request: ShadowRequest, expected: Dict[str, Any], primary_seconds: float):
+        started = time.perf_counter()
+        try:
+            actual = self.candidate(request)
+        except Exception as error:
+            divergence = Divergence(request, {}, f"{type(error).__name__}: {error}")
+            with self._lock:
+                self.compared += 1
+                self.errors += 1
+                self.divergent += 1
+                self.divergences.append(divergence)
+            return
+        elapsed = time.perf_counter() - started
+
+        fields = {
+            field: (value, actual.get(field))
+            for field, value in expected.items()
+            if not _same(value, actual.get(field), self.tolerance)
+        }
+        with self._lock:
+            self.compared += 1
+            self.primary_latency.record(primary_seconds)
+            self.candidate_latency.record(elapsed)
+            self._primary_seconds += primary_seconds
+            self._candidate_seconds += elapsed
+            if fields:
+                self.divergent += 1
+                self.divergences.append(Divergence(request, fields))
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued sample has been compared, returning False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def recent_divergences(self) -> List[Divergence]:
+        with self._lock:
+            return list(self.divergences)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus latency summaries; latency_ratio is candidate time over primary time"""
+        with self._lock:
+            ratio = self._candidate_seconds / self._primary_seconds if self._primary_seconds else None
+            return {
+                "requests": self.requests,
+                "sampled": self.sampled,
+                "dropped": self.dropped,
+                "compared": self.compared,
+                "divergent": self.divergent,
+                "errors": self.errors,
+                "queued": self._queue.qsize(),
+                "primary_latency": self.primary_latency.summary(),
+                "candidate_latency": self.candidate_latency.summary(),
+                "latency_ratio": ratio,
+            }
+
+    def close(self, timeout: float = 5.0):
+        """Stop the background thread once the samples already queued are compared
+
+        Stops sampling and waits at most `timeout` seconds in all; if the
+        queue is still full by then, the oldest sample is dropped to make
+        room for the stop signal and the thread is left to finish on its own.
+        """
+        # Once closed is set under the lock, no sample can be queued behind the stop signal
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                with self._lock:
+                    self.dropped += 1
+            except queue.Empty:
+                pass
+            # Only the worker takes from the queue now, so there is room
+            self._queue.put_nowait(None)
+        self._worker.join(max(0.0, deadline - time.monotonic()))
+
+    def __enter__(self) -> "ShadowRunner":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
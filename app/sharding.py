@@ -0,0 +1,260 @@
+"""
+Sharded order processing
+Orders are partitioned by order_id over worker processes (standing in
+for nodes) with a consistent-hash ring, so adding a worker moves only the
+orders whose ring segment it takes over. A local coordinator routes each
+call to the owning worker over a pipe and merges per-shard reports.
+"""
+
+import multiprocessing
+from bisect import bisect_right
+from hashlib import blake2b
+from multiprocessing.connection import Connection
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.refactored import Invoice, Order, OrderStatus
+
+# Order methods a shard will run on behalf of the coordinator
+ORDER_METHODS = frozenset(
+    {
+        "add_item",
+        "update_quantity",
+        "set_discount_code",
+        "transition_to",
+        "calculate_subtotal",
+        "calculate_total_with_discount",
+        "get_order_summary",
+    }
+)
+
+# Exceptions re-raised as themselves in the coordinator; anything else becomes RuntimeError
+FORWARDED_ERRORS = {"ValueError": ValueError, "KeyError": KeyError}
+
+
+def _point(key: str) -> int:
+    return int.from_bytes(blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent-hash ring with `replicas` virtual points per node"""
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 64):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str):
+        for replica in range(self.replicas):
+            point = _point(f"{node}#{replica}")
+            position = bisect_right(self._points, point)
+            self._points.insert(position, point)
+            self._owners.insert(position, node)
+
+    def remove(self, node: str):
+        kept = [(point, owner) for point, owner in zip(self._points, self._owners) if owner != node]
+        self._points = [point for point, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    def node_for(self, key: str) -> str:
+        if not self._points:
+            raise ValueError("Hash ring has no nodes")
+        position = bisect_right(self._points, _point(key)) % len(self._points)
+        return self._owners[position]
+
+
+class _Shard:
+    """Worker-side state: the orders this shard owns"""
+
+    def __init__(self):
+        self.orders: Dict[str, Order] = {}
+
+    def create(self, order_id: str, customer_name: str, customer_email: str, postal_code: Optional[str]):
+        if order_id in self.orders:
+            raise ValueError(f"Order {order_id} already exists")
+        self.orders[order_id] = Order(order_id, customer_name, customer_email, postal_code)
+
+    def call(self, order_id: str, method: str, args: Tuple) -> Any:
+        if method not in ORDER_METHODS:
+            raise ValueError(f"Order method {method} cannot be called through a shard")
+        return getattr(self.orders[order_id], method)(*args)
+
+    def invoice(self, order_id: str, invoice_id: str) -> str:
+        return Invoice(invoice_id, self.orders[order_id]).generate_invoice()
+
+    def ids(self) -> List[str]:
+        return list(self.orders)
+
+    def export(self, order_ids: List[str]) -> List[Dict]:
+        """States of orders to migrate; they stay here until discarded"""
+        return [self.orders[order_id].to_state() for order_id in order_ids]
+
+    def load(self, states: List[Dict]):
+        """Take over migrated orders, all or none"""
+        self.orders.update({state["order_id"]: Order.from_state(state) for state in states})
+
+    def discard(self, order_ids: List[str]):
+        """Drop orders another shard has taken over"""
+        for order_id in order_ids:
+            del self.orders[order_id]
+
+    def report(self) -> Dict:
+        by_status: Dict[str, int] = {}
+        gross = net = 0.0
+        for order in self.orders.values():
+            by_status[order.status] = by_status.get(order.status, 0) + 1
+            if order._status is not OrderStatus.CANCELLED:
+                breakdown = order._get_calculator().get_breakdown(order.discount_code)
+                gross += breakdown["subtotal"]
+                # Goods revenue after promotions and discount codes, as in SalesAggregator.net_revenue
+                net += breakdown["subtotal"] - breakdown["promotion"] - breakdown["discount"]
+        return {"orders": len(self.orders), "by_status": by_status, "gross": gross, "net": net}
+
+
+def shard_worker(connection: Connection):
+    """Worker process loop: run (command, args) requests until told to stop"""
+    shard = _Shard()
+    while True:
+        command, args = connection.recv()
+        if command == "stop":
+            connection.send((True, None))
+            break
+        try:
+            connection.send((True, getattr(shard, command)(*args)))
+        except Exception as error:
+            connection.send((False, (type(error).__name__, error.args)))
+    connection.close()
+
+
+class ShardCoordinator:
+    """Routes order operations to the worker owning each order_id"""
+
+    def __init__(self, workers: int = 2, replicas: int = 64):
+        if workers <= 0:
+            raise ValueError("Need at least one worker")
+        self._context = multiprocessing.get_context()
+        self._connections: Dict[str, Connection] = {}
+        self._processes: Dict[str, multiprocessing.Process] = {}
+        self.ring = HashRing(replicas=replicas)
+        for _ in range(workers):
+            self.ring.add(self._start_worker())
+
+    @property
+    def workers(self) -> List[str]:
+        return list(self._connections)
+
+    def _start_worker(self) -> str:
+        name = f"shard-{len(self._processes)}"
+        parent, child = self._context.Pipe()
+        process = self._context.Process(target=shard_worker, args=(child,), name=name, daemon=True)
+        process.start()
+        child.close()
+        self._connections[name] = parent
+        self._processes[name] = process
+        return name
+
+    def _stop_worker(self, worker: str):
+        connection = self._connections.pop(worker)
+        try:
+            connection.send(("stop", ()))
+            connection.recv()
+        except (EOFError, OSError):
+            pass
+        connection.close()
+        self._processes.pop(worker).join(timeout=5)
+
+    @staticmethod
+    def _unpack(reply: Tuple[bool, Any]) -> Any:
+        ok, result = reply
+        if ok:
+            return result
+        name, args = result
+        raise FORWARDED_ERRORS.get(name, RuntimeError)(*args)
+
+    @classmethod
+    def _receive(cls, connection: Connection) -> Any:
+        return cls._unpack(connection.recv())
+
+    def _request(self, worker: str, command: str, *args) -> Any:
+        connection = self._connections[worker]
+        connection.send((command, args))
+        return self._receive(connection)
+
+    def _broadcast(self, command: str, *args) -> Dict[str, Any]:
+        """Send to every worker before waiting on any, so shards work in parallel
+
+        Every reply is read before any error is raised, so none is left in a pipe.
+        """
+        for connection in self._connections.values():
+            connection.send((command, args))
+        replies = {worker: connection.recv() for worker, connection in self._connections.items()}
+        return {worker: self._unpack(reply) for worker, reply in replies.items()}
+
+    def shard_for(self, order_id: str) -> str:
+        return self.ring.node_for(order_id)
+
+    def create_order(self, order_id: str, customer_name: str, customer_email: str, postal_code: Optional[str] = None):
+        self._request(self.shard_for(order_id), "create", order_id, customer_name, customer_email, postal_code)
+
+    def call(self, order_id: str, method: str, *args) -> Any:
+        """Run an allowed Order method on the shard that owns the order"""
+        return self._request(self.shard_for(order_id), "call", order_id, method, args)
+
+    def add_item(self, order_id: str, product_name: str, price: float, quantity: int, category: Optional[str] = None):
+        self.call(order_id, "add_item", product_name, price, quantity, category)
+
+    def total(self, order_id: str, discount_code: Optional[str] = None) -> float:
+        return self.call(order_id, "calculate_total_with_discount", discount_code)
+
+    def invoice(self, order_id: str, invoice_id: str) -> str:
+        return self._request(self.shard_for(order_id), "invoice", order_id, invoice_id)
+
+    def add_worker(self) -> int:
+        """Start another worker and move to it the orders it now owns, returning how many moved
+
+        Orders are copied to the new worker and only dropped from their old
+        shards once every copy has loaded; if one fails, the new worker is
+        stopped and the old shards keep serving everything.
+        """
+        shard_ids = self._broadcast("ids")
+        worker = self._start_worker()
+        ring = HashRing(self._connections, self.ring.replicas)
+        moving = {
+            owner: [order_id for order_id in order_ids if ring.node_for(order_id) == worker]
+            for owner, order_ids in shard_ids.items()
+        }
+        moving = {owner: order_ids for owner, order_ids in moving.items() if order_ids}
+        try:
+            for owner, order_ids in moving.items():
+                self._request(worker, "load", self._request(owner, "export", order_ids))
+        except Exception:
+            self._stop_worker(worker)
+            raise
+        self.ring = ring
+        for owner, order_ids in moving.items():
+            self._request(owner, "discard", order_ids)
+        return sum(len(order_ids) for order_ids in moving.values())
+
+    def report(self) -> Dict:
+        """Order counts and revenue merged across shards, with each shard's order count"""
+        reports = self._broadcast("report")
+        merged: Dict[str, Any] = {"orders": 0, "by_status": {}, "gross": 0.0, "net": 0.0, "shards": {}}
+        for worker, report in reports.items():
+            merged["orders"] += report["orders"]
+            merged["gross"] += report["gross"]
+            merged["net"] += report["net"]
+            merged["shards"][worker] = report["orders"]
+            for status, count in report["by_status"].items():
+                merged["by_status"][status] = merged["by_status"].get(status, 0) + count
+        return merged
+
+    def close(self):
+        for worker in list(self._connections):
+            self._stop_worker(worker)
+
+    def __enter__(self) -> "ShardCoordinator":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
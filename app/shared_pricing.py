@@ -0,0 +1,149 @@
+"""
+Parallel pricing over shared memory
+Line data for a batch of orders is packed once into a columnar
+multiprocessing.shared_memory block; worker processes price their slice
+in place and write quotes into a shared output block, so no Order or
+OrderItem is ever pickled. Only flat-rate orders without promotions can
+be priced this way; the columns carry no tax or promotion data.
+
+Input block layout (native byte order, all columns 8-byte wide):
+  offsets   int64[orders + 1]  first line of each order, plus the end
+  rates     float64[orders]    discount rate of each order
+  prices    float64[lines]
+  quantities int64[lines]
+Output block: float64[orders * 5] of (subtotal, discount, tax, shipping, total)
+"""
+
+import struct
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from operator import mul
+from typing import List, Optional, Sequence
+
+from app.batch_pricing import Quote, discount_rate, quote_subtotal
+from app.refactored import Order
+
+QUOTE = struct.Struct("5d")
+WORD = 8
+
+
+def _column_bounds(orders: int, lines: int):
+    """Byte ranges of offsets, rates, prices and quantities"""
+    sizes = (orders + 1, orders, lines, lines)
+    bounds = []
+    start = 0
+    for size in sizes:
+        bounds.append((start, start + size * WORD))
+        start += size * WORD
+    return bounds
+
+
+def make_executor(workers: int) -> ProcessPoolExecutor:
+    """Process pool whose workers share this process's resource tracker
+
+    Workers started before the tracker would each start their own, which
+    then warns about, and unlinks, blocks they merely attached to.
+    """
+    resource_tracker.ensure_running()
+    return ProcessPoolExecutor(workers)
+
+
+def price_slice(input_name: str, output_name: str, orders: int, lines: int, start: int, end: int):
+    """Worker entry point: price orders [start, end) straight from shared memory"""
+    source = SharedMemory(name=input_name)
+    target = SharedMemory(name=output_name)
+    buffer = source.buf
+    (offsets_at, rates_at, prices_at, quantities_at) = _column_bounds(orders, lines)
+    offsets = buffer[offsets_at[0]:offsets_at[1]].cast("q")
+    rates = buffer[rates_at[0]:rates_at[1]].cast("d")
+    prices = buffer[prices_at[0]:prices_at[1]].cast("d")
+    quantities = buffer[quantities_at[0]:quantities_at[1]].cast("q")
+    try:
+        output = target.buf
+        for position in range(start, end):
+            first, last = offsets[position], offsets[position + 1]
+            subtotal = sum(map(mul, prices[first:last], quantities[first:last]))
+            QUOTE.pack_into(output, position * QUOTE.size, *quote_subtotal(subtotal, rates[position]))
+    finally:
+        # Views must be released before the blocks can be closed
+        for view in (offsets, rates, prices, quantities):
+            view.release()
+        del buffer
+        source.close()
+        target.close()
+
+
+class SharedOrderBatch:
+    """Columnar shared-memory copy of many orders' lines, priced in parallel"""
+
+    def __init__(self, orders: Sequence[Order], discount_codes: Optional[Sequence[Optional[str]]] = None):
+        for order in orders:
+            if order.tax_engine is not None or order.promotion_engine is not None:
+                raise ValueError(f"Order {order.order_id} uses a tax or promotion engine and cannot be priced in a batch")
+        codes = discount_codes if discount_codes is not None else [order.discount_code for order in orders]
+        offsets = array("q", [0])
+        prices = array("d")
+        quantities = array("q")
+        for order in orders:
+            items = order.items
+            prices.extend([item.price for item in items])
+            quantities.extend([item.quantity for item in items])
+            offsets.append(len(prices))
+        rates = array("d", (discount_rate(code) for code in codes))
+
+        self.orders = len(orders)
+        self.lines = len(prices)
+        bounds = _column_bounds(self.orders, self.lines)
+        self._input = SharedMemory(create=True, size=max(bounds[-1][1], 1))
+        self._output = SharedMemory(create=True, size=max(self.orders * QUOTE.size, 1))
+        for (start, end), column in zip(bounds, (offsets, rates, prices, quantities)):
+            self._input.buf[start:end] = column.tobytes()
+
+    def price(self, executor: Optional[Executor] = None, workers: int = 1, chunks_per_worker: int = 4) -> List[Quote]:
+        """Price every order, in-process for one worker or across a process pool
+
+        A caller-supplied executor should come from make_executor().
+        """
+        if workers <= 1 and executor is None:
+            price_slice(self._input.name, self._output.name, self.orders, self.lines, 0, self.orders)
+            return self.results()
+
+        owned = executor is None
+        executor = executor or make_executor(workers)
+        try:
+            chunk = max(1, -(-self.orders // (workers * chunks_per_worker)))
+            futures = [
+                executor.submit(
+                    price_slice,
+                    self._input.name,
+                    self._output.name,
+                    self.orders,
+                    self.lines,
+                    start,
+                    min(start + chunk, self.orders),
+                )
+                for start in range(0, self.orders, chunk)
+            ]
+            for future in futures:
+                future.result()
+        finally:
+            if owned:
+                executor.shutdown()
+        return self.results()
+
+    def results(self) -> List[Quote]:
+        return list(QUOTE.iter_unpack(self._output.buf[: self.orders * QUOTE.size]))
+
+    def close(self):
+        """Free both shared-memory blocks"""
+        for block in (self._input, self._output):
+            block.close()
+            block.unlink()
+
+    def __enter__(self) -> "SharedOrderBatch":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,273 @@
+"""
+Shipment split optimizer
+Assigns each cart line to one of the warehouses that stock it so the sum
+of ShippingCalculator charges over the resulting shipments is minimal.
+
+Shipping never rises with a larger subtotal, so everything leaving one
+warehouse goes as a single shipment and the search is only over which
+warehouse serves each line. That is still exponential, so lines are
+explored largest first by depth-first branch-and-bound, seeded with a
+greedy plan and cut off at a time budget.
+"""
+
+import time
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from app.refactored import Order, ShippingCalculator
+
+# (line value, warehouses that can ship the line)
+CartLine = Tuple[float, Iterable[str]]
+
+# (subtotal a shipment must exceed, charge from there on), lowest threshold first
+SHIPPING_TIERS = ShippingCalculator.TIERS
+FREE_SHIPPING_ABOVE = SHIPPING_TIERS[-1][0]
+
+
+def _suffix_sums(values: Sequence[float]) -> List[float]:
+    sums = [0.0] * (len(values) + 1)
+    for index in range(len(values) - 1, -1, -1):
+        sums[index] = sums[index + 1] + values[index]
+    return sums
+
+
+def _fractional_savings(steps: List[Tuple[float, float]], capacity: float) -> float:
+    """Most (weight, saving) steps can save with `capacity` weight, allowing fractions"""
+    saved = 0.0
+    for weight, saving in sorted(steps, key=lambda step: step[0] / step[1]):
+        if weight <= capacity:
+            capacity -= weight
+            saved += saving
+        else:
+            return saved + saving * capacity / weight
+    return saved
+
+
+class ShipmentPlan:
+    """Chosen warehouse per line, with the shipments and charges it implies
+
+    greedy_cost: cost of the greedy plan a search was seeded with, for
+                 judging what the search bought; None for other plans
+    """
+
+    def __init__(
+        self,
+        assignment: List[str],
+        values: Sequence[float],
+        optimal: bool,
+        nodes: int,
+        greedy_cost: Optional[float] = None,
+    ):
+        self.assignment = assignment
+        self.optimal = optimal
+        self.nodes = nodes
+        self.greedy_cost = greedy_cost
+        self.shipments: Dict[str, List[int]] = {}
+        subtotals: Dict[str, float] = {}
+        for index, warehouse in enumerate(assignment):
+            self.shipments.setdefault(warehouse, []).append(index)
+            subtotals[warehouse] = subtotals.get(warehouse, 0.0) + values[index]
+        self.charges = {warehouse: ShippingCalculator.calculate(subtotal) for warehouse, subtotal in subtotals.items()}
+        self.subtotals = subtotals
+
+    @property
+    def cost(self) -> float:
+        return sum(self.charges.values())
+
+
+class _Search:
+    """Depth-first branch-and-bound state over the lines with a choice of warehouse"""
+
+    def __init__(self, values: Sequence[float], allowed: List[FrozenSet[str]]):
+        self.values = values
+        self.allowed = allowed
+        warehouses = sorted(set().union(*allowed))
+        self.assignment: List[Optional[str]] = [None] * len(values)
+        self.subtotals = dict.fromkeys(warehouses, 0.0)
+        # Lines per warehouse; a float subtotal can drift off zero as lines come and go
+        self.counts = dict.fromkeys(warehouses, 0)
+        for index, options in enumerate(allowed):
+            if len(options) == 1:
+                (warehouse,) = options
+                self.place(index, warehouse)
+
+        # Open lines, largest first, so early choices matter most to the bound
+        self.open_lines = sorted(
+            (index for index, options in enumerate(allowed) if len(options) > 1), key=lambda index: -values[index]
+        )
+        # reachable[w][d]: value of open lines from depth d on that warehouse w could still take
+        self.reachable = {warehouse: [0.0] * (len(self.open_lines) + 1) for warehouse in warehouses}
+        for depth in range(len(self.open_lines) - 1, -1, -1):
+            line = self.open_lines[depth]
+            for warehouse in warehouses:
+                self.reachable[warehouse][depth] = self.reachable[warehouse][depth + 1] + (
+                    values[line] if warehouse in allowed[line] else 0.0
+                )
+        self.remaining = _suffix_sums([values[line] for line in self.open_lines])
+        # No split beats shipping the whole cart at once
+        self.floor = ShippingCalculator.calculate(sum(values))
+        self.nodes = 0
+
+    def place(self, line: int, warehouse: str):
+        self.assignment[line] = warehouse
+        self.subtotals[warehouse] += self.values[line]
+        self.counts[warehouse] += 1
+
+    def unplace(self, line: int):
+        warehouse = self.assignment[line]
+        if warehouse is not None:
+            self.subtotals[warehouse] -= self.values[line]
+            self.counts[warehouse] -= 1
+            self.assignment[line] = None
+
+    def bound(self, depth: int) -> float:
+        """Lower bound on the final charge from warehouses already shipping
+
+        Each warehouse alone may take everything it can still reach, but
+        the tier steps they climb must together fit in the value left.
+        """
+        charges = 0.0
+        steps = []
+        for warehouse, subtotal in self.subtotals.items():
+            if not self.counts[warehouse]:
+                continue
+            charge = ShippingCalculator.calculate(subtotal)
+            charges += charge
+            ceiling = subtotal + self.reachable[warehouse][depth]
+            for threshold, tier_charge in SHIPPING_TIERS:
+                if subtotal <= threshold < ceiling and tier_charge < charge:
+                    steps.append((threshold - subtotal, charge - tier_charge))
+                    charge = tier_charge
+                    subtotal = threshold
+        return max(charges - _fractional_savings(steps, self.remaining[depth]), self.floor)
+
+    def ordered_options(self, depth: int) -> List[str]:
+        """Warehouses already shipping, fullest first, then the rest"""
+        return sorted(self.allowed[self.open_lines[depth]], key=lambda warehouse: (-self.subtotals[warehouse], warehouse))
+
+    def run(self, best: List[str], deadline: float, check_every: int) -> Tuple[List[str], bool]:
+        """Best assignment found from the `best` seed, and whether the search finished"""
+        open_lines = self.open_lines
+        best_cost = ShipmentPlan(best, self.values, False, 0).cost
+        depth = 0
+        options: List[List[str]] = [self.ordered_options(0)] if open_lines else []
+        cursors = [0] * len(open_lines)
+        while depth >= 0 and best_cost > self.floor and open_lines:
+            self.nodes += 1
+            if self.nodes % check_every == 0 and time.perf_counter() > deadline:
+                return best, False
+            line = open_lines[depth]
+            self.unplace(line)
+            if cursors[depth] == len(options[depth]):
+                depth -= 1
+                continue
+
+            self.place(line, options[depth][cursors[depth]])
+            cursors[depth] += 1
+            cost = self.bound(depth + 1)
+            if cost >= best_cost:
+                continue
+            if depth + 1 == len(open_lines):
+                best, best_cost = list(self.assignment), cost
+            else:
+                depth += 1
+                if len(options) <= depth:
+                    options.append([])
+                options[depth] = self.ordered_options(depth)
+                cursors[depth] = 0
+        return best, True
+
+
+class ShipmentOptimizer:
+    """Branch-and-bound search for the cheapest warehouse assignment
+
+    time_budget: seconds to search before returning the best plan found;
+                 the plan reports optimal=False when the search was cut short
+    """
+
+    CLOCK_CHECK_EVERY = 1024
+
+    def __init__(self, time_budget: float = 0.1):
+        self.time_budget = time_budget
+
+    def optimize(self, lines: Sequence[CartLine]) -> ShipmentPlan:
+        values = [value for value, _ in lines]
+        allowed: List[FrozenSet[str]] = [frozenset(warehouses) for _, warehouses in lines]
+        if any(not warehouses for warehouses in allowed):
+            raise ValueError("Every line needs at least one warehouse")
+        if not lines:
+            return ShipmentPlan([], values, True, 0, 0.0)
+
+        search = _Search(values, allowed)
+        seed = self._greedy(values, allowed, search.open_lines, search.assignment, search.subtotals)
+        seed = self._improve(values, allowed, search.open_lines, seed)
+        greedy_cost = ShipmentPlan(seed, values, False, 0).cost
+        best, finished = search.run(seed, time.perf_counter() + self.time_budget, self.CLOCK_CHECK_EVERY)
+        return ShipmentPlan(best, values, finished, search.nodes, greedy_cost)
+
+    @staticmethod
+    def _greedy(values, allowed, open_lines, assignment, subtotals) -> List[str]:
+        """Open the warehouse that can take the most unplaced value, fill it, repeat"""
+        subtotals = dict(subtotals)
+        plan = list(assignment)
+        unplaced = set(open_lines)
+        while unplaced:
+            takeable: Dict[str, float] = {}
+            for line in unplaced:
+                for warehouse in allowed[line]:
+                    takeable[warehouse] = takeable.get(warehouse, 0.0) + values[line]
+            warehouse = max(takeable, key=lambda option: (subtotals[option] + takeable[option], option))
+            for line in [line for line in unplaced if warehouse in allowed[line]]:
+                plan[line] = warehouse
+                subtotals[warehouse] += values[line]
+                unplaced.discard(line)
+        return plan
+
+    @staticmethod
+    def _improve(values, allowed, open_lines, plan) -> List[str]:
+        """Move single lines between warehouses while that helps
+
+        A move must lower the total charge, or keep it and shrink the
+        shortfall of open warehouses below free shipping, so value drifts
+        from warehouses with room to spare towards ones close to the tier.
+        """
+        subtotals: Dict[str, float] = {}
+        counts: Dict[str, int] = {}
+        for line, warehouse in enumerate(plan):
+            subtotals[warehouse] = subtotals.get(warehouse, 0.0) + values[line]
+            counts[warehouse] = counts.get(warehouse, 0) + 1
+
+        def score(subtotal: float, count: int) -> Tuple[float, float]:
+            if not count:
+                return 0.0, 0.0
+            return ShippingCalculator.calculate(subtotal), max(0.0, FREE_SHIPPING_ABOVE - subtotal)
+
+        def combined(first: Tuple[float, float], second: Tuple[float, float]) -> Tuple[float, float]:
+            return first[0] + second[0], first[1] + second[1]
+
+        improved = True
+        while improved:
+            improved = False
+            for line in open_lines:
+                source = plan[line]
+                value = values[line]
+                for target in sorted(allowed[line]):
+                    if target == source:
+                        continue
+                    target_subtotal, target_count = subtotals.get(target, 0.0), counts.get(target, 0)
+                    before = combined(score(subtotals[source], counts[source]), score(target_subtotal, target_count))
+                    after = combined(
+                        score(subtotals[source] - value, counts[source] - 1),
+                        score(target_subtotal + value, target_count + 1),
+                    )
+                    if after[0] < before[0] or (after[0] == before[0] and after[1] < before[1] - 1e-9):
+                        subtotals[source] -= value
+                        counts[source] -= 1
+                        subtotals[target] = target_subtotal + value
+                        counts[target] = target_count + 1
+                        plan[line] = source = target
+                        improved = True
+        return plan
+
+    def optimize_order(self, order: Order, stock_locations: Dict[str, Iterable[str]]) -> ShipmentPlan:
+        """Plan an order's shipments, given the warehouses stocking each product name"""
+        return self.optimize([(item.get_line_total(), stock_locations[item.product_name]) for item in order.items])
@@ -0,0 +1,45 @@
+"""
+Rolling sample statistics
+Bounded windows of recent samples summarized as count, mean and
+percentiles, shared by the services that report on themselves
+"""
+
+from collections import deque
+from typing import Deque, Dict
+
+
+class SampleStats:
+    """Rolling window of unitless samples, such as batch sizes"""
+
+    def __init__(self, window: int = 10000):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, value: float):
+        self._samples.append(value)
+
+    def _summary(self, scale: float, suffix: str) -> Dict[str, float]:
+        if not self._samples:
+            return {"count": 0}
+        ordered = sorted(self._samples)
+
+        def percentile(fraction: float) -> float:
+            return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * scale
+
+        return {
+            "count": len(ordered),
+            f"mean{suffix}": sum(ordered) / len(ordered) * scale,
+            f"p50{suffix}": percentile(0.50),
+            f"p99{suffix}": percentile(0.99),
+        }
+
+    def summary(self) -> Dict[str, float]:
+        """Count plus mean and percentiles"""
+        return self._summary(1, "")
+
+
+class LatencyStats(SampleStats):
+    """Rolling window of latency samples in seconds"""
+
+    def summary(self) -> Dict[str, float]:
+        """Count plus mean and percentiles in milliseconds"""
+        return self._summary(1000, "_ms")
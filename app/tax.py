@@ -0,0 +1,128 @@
+"""
+Jurisdiction-based tax engine
+Postal-code jurisdictions are precompiled into sorted, non-overlapping
+segments so every lookup is a single binary search
+"""
+
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.refactored import PriceCalculator
+
+
+class TaxJurisdiction:
+    """Tax rates for a postal-code prefix or an inclusive postal-code range"""
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        prefix: Optional[str] = None,
+        postal_range: Optional[Tuple[str, str]] = None,
+        category_rates: Optional[Dict[str, float]] = None,
+    ):
+        if (prefix is None) == (postal_range is None):
+            raise ValueError("Jurisdiction needs exactly one of prefix or postal_range")
+        if rate < 0 or any(value < 0 for value in (category_rates or {}).values()):
+            raise ValueError("Tax rates cannot be negative")
+
+        self.name = name
+        self.rate = rate
+        self.prefix = prefix
+        self.postal_range = postal_range
+        self.category_rates = dict(category_rates or {})
+
+    def bounds(self) -> Tuple[str, str]:
+        """Half-open [start, end) interval of normalized postal codes"""
+        if self.prefix is not None:
+            start = normalize_postal_code(self.prefix)
+            if not start:
+                raise ValueError("Prefix cannot be empty")
+            return start, start[:-1] + chr(ord(start[-1]) + 1)
+
+        low, high = (normalize_postal_code(code) for code in self.postal_range)
+        if low > high:
+            raise ValueError(f"Invalid postal range for {self.name}")
+        # high + "\0" is the immediate successor of high, making the range half-open
+        return low, high + "\0"
+
+    def rate_for(self, category: Optional[str]) -> float:
+        return self.category_rates.get(category, self.rate)
+
+
+def normalize_postal_code(code: str) -> str:
+    return "".join(code.split()).upper()
+
+
+class TaxEngine:
+    """Precompiled jurisdiction index with per-category rates"""
+
+    def __init__(self, jurisdictions: Iterable[TaxJurisdiction], default_rate: float = PriceCalculator.TAX_RATE):
+        self.default_rate = default_rate
+        self._starts: List[str] = []
+        self._ends: List[str] = []
+        self._entries: List[TaxJurisdiction] = []
+        self._compile(jurisdictions)
+
+    def _compile(self, jurisdictions: Iterable[TaxJurisdiction]):
+        """Flatten nested intervals so the innermost jurisdiction wins"""
+        intervals = [(*jurisdiction.bounds(), jurisdiction) for jurisdiction in jurisdictions]
+        # Outer intervals first when two share a start
+        intervals.sort(key=lambda interval: interval[1], reverse=True)
+        intervals.sort(key=lambda interval: interval[0])
+
+        stack: List[Tuple[str, TaxJurisdiction]] = []
+        cursor = ""
+        for start, end, jurisdiction in intervals:
+            # Close finished intervals; each parent resumes where its child ended
+            while stack and stack[-1][0] <= start:
+                cursor = self._emit(cursor, stack.pop())
+            if stack:
+                if end > stack[-1][0]:
+                    raise ValueError(f"Jurisdiction {jurisdiction.name} partially overlaps {stack[-1][1].name}")
+                self._emit(cursor, (start, stack[-1][1]))
+            cursor = start
+            stack.append((end, jurisdiction))
+        while stack:
+            cursor = self._emit(cursor, stack.pop())
+
+    def _emit(self, cursor: str, open_interval: Tuple[str, TaxJurisdiction]) -> str:
+        """Record the segment [cursor, end) for a jurisdiction and advance the cursor"""
+        end, jurisdiction = open_interval
+        if cursor < end:
+            self._starts.append(cursor)
+            self._ends.append(end)
+            self._entries.append(jurisdiction)
+        return end
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def find(self, postal_code: Optional[str]) -> Optional[TaxJurisdiction]:
+        """Binary search the compiled segments for a postal code"""
+        if not postal_code:
+            return None
+        code = normalize_postal_code(postal_code)
+        position = bisect_right(self._starts, code) - 1
+        if position >= 0 and code < self._ends[position]:
+            return self._entries[position]
+        return None
+
+    def rate_for(self, postal_code: Optional[str], category: Optional[str] = None) -> float:
+        jurisdiction = self.find(postal_code)
+        if jurisdiction is None:
+            return self.default_rate
+        return jurisdiction.rate_for(category)
+
+    def line_taxes(self, items: List[Dict], postal_code: Optional[str]) -> List[float]:
+        """Tax for every line of an order, resolving the jurisdiction once"""
+        jurisdiction = self.find(postal_code)
+        if jurisdiction is None:
+            rate = self.default_rate
+            return [item["price"] * item["quantity"] * rate for item in items]
+
+        default_rate = jurisdiction.rate
+        category_rates = jurisdiction.category_rates
+        return [
+            item["price"] * item["quantity"] * category_rates.get(item.get("category"), default_rate) for item in items
+        ]
@@ -0,0 +1,191 @@
+"""
+Write-ahead persistence for order mutations
+Concurrent writers share fsyncs (group commit); a background writer
+thread flushes each batch once, trading a small delay for throughput
+"""
+
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.eventlog import CREATED, CLOSED_STATUSES, apply_record, check_engines, encode_event
+from app.refactored import Order, OrderEvent, OrderStatus
+
+# Frame header: payload length and CRC32 of the payload
+FRAME_HEADER = struct.Struct("<II")
+
+
+def encode_frame(record: Dict) -> bytes:
+    payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+    return FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def scan_frames(data: bytes) -> Tuple[List[Dict], int]:
+    """Decode complete frames, returning the records and the end of the last valid one"""
+    records = []
+    offset = 0
+    while offset + FRAME_HEADER.size <= len(data):
+        length, checksum = FRAME_HEADER.unpack_from(data, offset)
+        start = offset + FRAME_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            break
+        records.append(json.loads(payload))
+        offset = start + length
+    return records, offset
+
+
+class WriteAheadLog:
+    """Append-only framed log with group commit
+
+    max_batch_delay: seconds the writer waits for more records before an fsync
+    max_batch_size:  records that trigger an fsync without waiting further
+    wait_for_sync:   block append() until its record is on disk; False trades
+                     the last batch on a crash for lower latency
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_batch_delay: float = 0.002,
+        max_batch_size: int = 512,
+        wait_for_sync: bool = True,
+    ):
+        self.path = path
+        self.max_batch_delay = max_batch_delay
+        self.max_batch_size = max_batch_size
+        self.wait_for_sync = wait_for_sync
+        self.recovered_records = self._recover_file()
+        self.batches = 0
+
+        self._file = open(path, "ab")
+        self._cond = threading.Condition()
+        self._pending: List[bytes] = []
+        self._appended = 0
+        self._durable = 0
+        self._closed = False
+        self._error: Optional[OSError] = None
+        self._writer = threading.Thread(target=self._run, name="wal-writer", daemon=True)
+        self._writer.start()
+
+    def _recover_file(self) -> List[Dict]:
+        """Read intact records and cut off a torn tail left by a crash"""
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as handle:
+            data = handle.read()
+        records, valid_length = scan_frames(data)
+        if valid_length < len(data):
+            with open(self.path, "r+b") as handle:
+                handle.truncate(valid_length)
+                handle.flush()
+                os.fsync(handle.fileno())
+        return records
+
+    def append(self, record: Dict):
+        """Queue a record; with wait_for_sync, return once it is durable"""
+        frame = encode_frame(record)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Write-ahead log is closed")
+            self._pending.append(frame)
+            self._appended += 1
+            sequence = self._appended
+            self._cond.notify_all()
+            if self.wait_for_sync:
+                while self._durable < sequence and self._error is None:
+                    self._cond.wait()
+            if self._error is not None:
+                raise self._error
+
+    def _next_batch(self) -> Tuple[List[bytes], int]:
+        """Wait for records, then linger briefly so concurrent writers share the fsync"""
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_batch_delay
+            while self._pending and len(self._pending) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._pending = self._pending, []
+            return batch, self._appended
+
+    def _run(self):
+        while True:
+            batch, last_sequence = self._next_batch()
+            if not batch:
+                return
+            try:
+                self._file.write(b"".join(batch))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as error:
+                with self._cond:
+                    self._error = error
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._durable = last_sequence
+                self.batches += 1
+                self._cond.notify_all()
+
+    def close(self):
+        """Flush everything queued and stop the writer"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        self._file.close()
+
+
+class DurableOrderStore:
+    """Persists order mutations through a write-ahead log
+
+    Open orders are rebuilt from the log when the store is opened and
+    are available as `orders`; further changes to them are logged again.
+    Every stored order must use the store's tax_engine and
+    promotion_engine, which recovered orders are rebuilt with.
+    """
+
+    def __init__(self, path: str, tax_engine=None, promotion_engine=None, **wal_options):
+        self.tax_engine = tax_engine
+        self.promotion_engine = promotion_engine
+        self._wal = WriteAheadLog(path, **wal_options)
+        self.orders: Dict[str, Order] = {}
+        for record in self._wal.recovered_records:
+            apply_record(self.orders, record, tax_engine, promotion_engine)
+        for order in self.orders.values():
+            order.add_listener(self._on_order_event)
+
+    def attach(self, order: Order):
+        """Durably record the order's current state and every later mutation"""
+        check_engines(order, self.tax_engine, self.promotion_engine)
+        self._wal.append({"type": CREATED, "order_id": order.order_id, "state": order.to_state()})
+        self.orders[order.order_id] = order
+        order.add_listener(self._on_order_event)
+
+    def _on_order_event(self, order: Order, event: OrderEvent, payload: Dict):
+        if OrderStatus(order.status) in CLOSED_STATUSES:
+            order.remove_listener(self._on_order_event)
+            self.orders.pop(order.order_id, None)
+        self._wal.append(encode_event(order, event, payload))
+
+    @property
+    def fsync_count(self) -> int:
+        return self._wal.batches
+
+    def close(self):
+        self._wal.close()
+
+
+def read_log(path: str) -> Iterator[Dict]:
+    """Iterate over the intact records of a log file without modifying it"""
+    with open(path, "rb") as handle:
+        records, _ = scan_frames(handle.read())
+    return iter(records)
@@ -0,0 +1,155 @@
+"""
+Warm-start snapshots of open orders
+A snapshot stores every open order's state together with its priced
+breakdown and rendered summary. Loading one only parses the header index
+and maps the file; totals and summaries are served straight from the
+stored records and an Order is rebuilt the first time something asks for
+the object.
+
+File layout:
+  header:  one JSON line {"format", "created_at", "ids"}
+  offsets: int64 little-endian[len(ids) + 1], where record i spans
+           body[offsets[i]:offsets[i + 1]]
+  body:    one compact JSON record per order, in ids order
+"""
+
+import json
+import mmap
+import os
+import sys
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from app.eventlog import CLOSED_STATUSES
+from app.refactored import Order
+
+FORMAT = "warm-start/1"
+
+
+def snapshot_record(order: Order) -> Dict:
+    calculator = order._get_calculator()
+    return {
+        "state": order.to_state(),
+        "breakdown": calculator.get_breakdown(order.discount_code),
+        "summary": order.get_order_summary(),
+    }
+
+
+def _little_endian(offsets: array) -> array:
+    if sys.byteorder == "big":
+        offsets.byteswap()
+    return offsets
+
+
+def write_snapshot(orders: Iterable[Order], path: str) -> int:
+    """Atomically write every open order to `path`, returning how many were written"""
+    ids = []
+    offsets = array("q", [0])
+    chunks = []
+    for order in orders:
+        if order._status in CLOSED_STATUSES:
+            continue
+        chunk = json.dumps(snapshot_record(order), separators=(",", ":")).encode("utf-8")
+        ids.append(order.order_id)
+        chunks.append(chunk)
+        offsets.append(offsets[-1] + len(chunk))
+
+    header = {"format": FORMAT, "created_at": datetime.now().isoformat(), "ids": ids}
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as handle:
+        handle.write(json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\n")
+        handle.write(_little_endian(offsets).tobytes())
+        handle.writelines(chunks)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+    return len(ids)
+
+
+class WarmStartSnapshot:
+    """Read side of a snapshot; orders are materialized on first access"""
+
+    def __init__(self, path: str, tax_engine=None, promotion_engine=None):
+        self.tax_engine = tax_engine
+        self.promotion_engine = promotion_engine
+        with open(path, "rb") as handle:
+            header = json.loads(handle.readline())
+            if header.get("format") != FORMAT:
+                raise ValueError(f"{path} is not a {FORMAT} snapshot")
+            ids = header["ids"]
+            self._offsets = array("q")
+            self._offsets.frombytes(handle.read((len(ids) + 1) * self._offsets.itemsize))
+            _little_endian(self._offsets)
+            self._body_start = handle.tell()
+            # Records are paged in by the OS as they are read, not at load time
+            self._body: Optional[mmap.mmap] = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self.created_at = datetime.fromisoformat(header["created_at"])
+        self._index: Dict[str, int] = {order_id: position for position, order_id in enumerate(ids)}
+        self._orders: Dict[str, Order] = {}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._index
+
+    def ids(self) -> List[str]:
+        return list(self._index)
+
+    @property
+    def materialized(self) -> int:
+        return len(self._orders)
+
+    def _record(self, order_id: str) -> Dict:
+        if self._body is None:
+            raise RuntimeError("Warm start snapshot is closed; only materialized orders are still available")
+        position = self._index[order_id]
+        start = self._body_start
+        return json.loads(self._body[start + self._offsets[position]:start + self._offsets[position + 1]])
+
+    def breakdown(self, order_id: str) -> Dict[str, float]:
+        """Priced breakdown, from the live order once it has been materialized"""
+        order = self._orders.get(order_id)
+        if order is not None:
+            return order._get_calculator().get_breakdown(order.discount_code)
+        return self._record(order_id)["breakdown"]
+
+    def summary(self, order_id: str) -> str:
+        order = self._orders.get(order_id)
+        if order is not None:
+            return order.get_order_summary()
+        return self._record(order_id)["summary"]
+
+    def order(self, order_id: str) -> Order:
+        """The live Order, rebuilt from its stored state on first access"""
+        order = self._orders.get(order_id)
+        if order is None:
+            state = self._record(order_id)["state"]
+            order = self._orders[order_id] = Order.from_state(state, self.tax_engine, self.promotion_engine)
+        return order
+
+    def get(self, order_id: str) -> Optional[Order]:
+        return self.order(order_id) if order_id in self._index else None
+
+    def orders(self) -> Iterator[Order]:
+        """Every order, materializing the ones not yet accessed"""
+        for order_id in self._index:
+            yield self.order(order_id)
+
+    def release_body(self):
+        """Materialize everything and unmap the snapshot file"""
+        for _ in self.orders():
+            pass
+        self.close()
+
+    def close(self):
+        if self._body is not None:
+            self._body.close()
+            self._body = None
+
+    def __enter__(self) -> "WarmStartSnapshot":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
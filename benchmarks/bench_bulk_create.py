@@ -0,0 +1,66 @@
+"""
+Benchmark: building orders line by line vs. in bulk
+Includes the first total computation, which bulk construction pre-warms
+
+Run from the repository root:
+    python -m benchmarks.bench_bulk_create
+"""
+
+import time
+
+from app.refactored import Order
+
+ORDERS = 2000
+LINES_PER_ORDER = 25
+
+
+def make_specs():
+    return [
+        (
+            f"ORD{number}",
+            "Customer",
+            f"customer{number}@example.com",
+            [(f"Product {line}", 5.0 + line, 1 + line % 3) for line in range(LINES_PER_ORDER)],
+        )
+        for number in range(ORDERS)
+    ]
+
+
+def per_line(specs):
+    orders = []
+    for order_id, name, email, lines in specs:
+        order = Order(order_id, name, email)
+        for line in lines:
+            order.add_item(*line)
+        order.calculate_total()
+        orders.append(order)
+    return orders
+
+
+def bulk(specs):
+    orders = Order.bulk_create(specs)
+    for order in orders:
+        order.calculate_total()
+    return orders
+
+
+def measure(function, specs, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(specs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    specs = make_specs()
+    slow = measure(per_line, specs)
+    fast = measure(bulk, specs)
+    print(f"{ORDERS} orders x {LINES_PER_ORDER} lines")
+    print(f"add_item() per line : {slow * 1000:8.1f} ms")
+    print(f"Order.bulk_create() : {fast * 1000:8.1f} ms  ({slow / fast:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: duplicate checks over a day's worth of orders
+Streams fingerprints (5% retries) through the windowed detector and
+reports throughput, measured vs. target false-positive rate and memory,
+against a linear scan of recent orders as the baseline
+
+Run from the repository root:
+    python -m benchmarks.bench_dedup
+"""
+
+import random
+import sys
+import time
+from hashlib import blake2b
+
+from app.dedup import FINGERPRINT_SIZE, DuplicateDetector
+
+CHECKS = 1000000
+RETRY_SHARE = 0.05
+WINDOW = 600.0
+# One day of CHECKS orders, so the window holds this many
+PER_WINDOW = int(CHECKS * WINDOW / 86400) + 1
+ERROR_RATE = 0.001
+SCAN_CHECKS = 200
+
+
+def fingerprints(rng):
+    recent = []
+    for number in range(CHECKS):
+        if recent and rng.random() < RETRY_SHARE:
+            yield rng.choice(recent)
+            continue
+        fingerprint = blake2b(number.to_bytes(8, "little"), digest_size=FINGERPRINT_SIZE).digest()
+        recent.append(fingerprint)
+        if len(recent) > 100:
+            recent.pop(0)
+        yield fingerprint
+
+
+def main():
+    rng = random.Random(42)
+    stream = list(fingerprints(rng))
+    seconds_per_order = 86400 / CHECKS
+    detector = DuplicateDetector(window=WINDOW, expected_per_window=PER_WINDOW, error_rate=ERROR_RATE)
+
+    start = time.perf_counter()
+    for number, fingerprint in enumerate(stream):
+        detector.check_fingerprint(fingerprint, now=number * seconds_per_order)
+    elapsed = time.perf_counter() - start
+    stats = detector.stats()
+
+    # Baseline: compare against every fingerprint still inside the window
+    window_orders = stream[-PER_WINDOW:]
+    start = time.perf_counter()
+    for fingerprint in stream[:SCAN_CHECKS]:
+        any(fingerprint == other for other in window_orders)
+    scan = (time.perf_counter() - start) / SCAN_CHECKS
+
+    exact_bytes = sum(
+        sys.getsizeof(bucket.exact) + sum(sys.getsizeof(item) for item in bucket.exact) for bucket in detector._buckets
+    )
+    print(f"{CHECKS} orders over a day, {WINDOW:.0f}s window (~{PER_WINDOW} orders), {RETRY_SHARE:.0%} retries")
+    print(f"windowed filters : {elapsed / CHECKS * 1e6:6.2f} us per check  ({CHECKS / elapsed:,.0f} checks/s)")
+    print(f"linear scan      : {scan * 1e6:6.2f} us per check")
+    print(f"duplicates found : {stats['duplicates']}")
+    print(f"false positives  : {stats['false_positive_rate']:.5f} measured vs {ERROR_RATE} target")
+    print(f"memory           : {stats['filter_bytes'] / 1024:.0f} KiB filters + {exact_bytes / 1024:.0f} KiB exact sets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark: recovering open orders from the event log
+Compares a full replay of every event against snapshot + tail replay
+
+Run from the repository root:
+    python -m benchmarks.bench_event_log_recovery
+"""
+
+import tempfile
+import time
+
+from app.eventlog import OrderEventLog
+from app.refactored import Order
+
+ORDERS = 5000
+LINES_PER_ORDER = 5
+
+
+def build_log(directory: str, snapshot_every):
+    log = OrderEventLog(directory, snapshot_every=snapshot_every)
+    log.recover()
+    for number in range(ORDERS):
+        order = Order(f"ORD{number}", "Customer", f"customer{number % 500}@example.com")
+        log.attach(order)
+        for line in range(LINES_PER_ORDER):
+            order.add_item(f"Product {line}", 10 + line, 1)
+        order.update_quantity(0, 2)
+        if number % 10 == 0:
+            order.transition_to("cancelled")
+    log.close()
+    return log.seq
+
+
+def time_recovery(directory: str):
+    start = time.perf_counter()
+    log = OrderEventLog(directory, snapshot_every=None)
+    orders = log.recover()
+    elapsed = time.perf_counter() - start
+    log.close()
+    return elapsed, len(orders)
+
+
+def main():
+    for label, snapshot_every in [("full replay", None), ("snapshot + tail", 10000)]:
+        with tempfile.TemporaryDirectory() as directory:
+            events = build_log(directory, snapshot_every)
+            elapsed, recovered = time_recovery(directory)
+            print(f"{label:<16} events={events:>6}  open orders={recovered:>5}  recovery={elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: invoice archive size and random read latency
+Compares plain text, per-record deflate, and deflate with a trained
+preset dictionary
+
+Run from the repository root:
+    python -m benchmarks.bench_invoice_archive
+"""
+
+import os
+import random
+import tempfile
+import time
+
+from app.invoice_archive import InvoiceArchive, invoice_record, train_dictionary
+from app.refactored import Invoice, Order
+
+INVOICES = 20000
+TRAINING_INVOICES = 1000
+CUSTOMERS = 2000
+PRODUCTS = 300
+READS = 5000
+
+
+def make_invoices(rng):
+    prices = [round(rng.uniform(2, 500), 2) for _ in range(PRODUCTS)]
+    invoices = []
+    for number in range(INVOICES):
+        customer = rng.randrange(CUSTOMERS)
+        order = Order(f"ORD{number:07d}", f"Customer {customer}", f"customer{customer}@example.com")
+        for _ in range(rng.randint(1, 8)):
+            product = rng.randrange(PRODUCTS)
+            order.add_item(f"Product {product}", prices[product], rng.randint(1, 5))
+        invoices.append(Invoice(f"INV{number:07d}", order))
+    return invoices
+
+
+def build(path, invoices, dictionary):
+    start = time.perf_counter()
+    with InvoiceArchive(path, dictionary) as archive:
+        for invoice in invoices:
+            archive.add(invoice)
+        stored = archive.stored_bytes()
+    return stored, time.perf_counter() - start
+
+
+def read_latency(path, ids):
+    with InvoiceArchive(path) as archive:
+        start = time.perf_counter()
+        for invoice_id in ids:
+            archive.render(invoice_id)
+        return (time.perf_counter() - start) / len(ids)
+
+
+def main():
+    rng = random.Random(42)
+    invoices = make_invoices(rng)
+    text_bytes = sum(len(invoice.generate_invoice().encode("utf-8")) for invoice in invoices)
+    dictionary = train_dictionary(invoice_record(invoice) for invoice in invoices[:TRAINING_INVOICES])
+    ids = [invoice.invoice_id for invoice in rng.sample(invoices, READS)]
+
+    print(f"{INVOICES} invoices, dictionary {len(dictionary)} bytes from {TRAINING_INVOICES} samples")
+    print(f"plain text      : {text_bytes / INVOICES:7.1f} bytes/invoice")
+    with tempfile.TemporaryDirectory() as directory:
+        for label, preset in (("deflate        ", b""), ("deflate + dict ", dictionary)):
+            path = os.path.join(directory, f"{len(preset)}.arc")
+            stored, elapsed = build(path, invoices, preset)
+            latency = read_latency(path, ids)
+            print(
+                f"{label}: {stored / INVOICES:7.1f} bytes/invoice  ratio {text_bytes / stored:5.2f}x  "
+                f"write {elapsed / INVOICES * 1e6:6.1f} us  read {latency * 1e6:6.1f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Benchmark: compiled pricing pipeline vs. PriceCalculator method calls
+
+Run from the repository root:
+    python -m benchmarks.bench_pipeline
+"""
+
+import random
+import time
+
+from app.batch_pricing import discount_rate
+from app.pipeline import DEFAULT_PIPELINE, compile_pipeline
+from app.refactored import PriceCalculator
+
+ORDERS = 200000
+
+
+def main():
+    rng = random.Random(42)
+    subtotals = [round(rng.uniform(5, 300), 2) for _ in range(ORDERS)]
+    codes = [rng.choice([None, "SAVE10", "SAVE20", "SAVE30"]) for _ in range(ORDERS)]
+    calculators = []
+    for subtotal in subtotals:
+        calculator = PriceCalculator([])
+        calculator._subtotal_cache = subtotal
+        calculators.append(calculator)
+
+    start = time.perf_counter()
+    expected = [calculator.get_total(code) for calculator, code in zip(calculators, codes)]
+    methods = time.perf_counter() - start
+
+    price = compile_pipeline(DEFAULT_PIPELINE)
+    rates = [discount_rate(code) for code in codes]
+    start = time.perf_counter()
+    actual = [price(subtotal, rate)[4] for subtotal, rate in zip(subtotals, rates)]
+    compiled = time.perf_counter() - start
+    assert actual == expected
+
+    print(f"{ORDERS} orders, subtotals cached")
+    print(f"PriceCalculator.get_total : {methods / ORDERS * 1e9:7.0f} ns per order")
+    print(f"compiled pipeline         : {compiled / ORDERS * 1e9:7.0f} ns per order  ({methods / compiled:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: applying a bulk return file, incremental ledger vs. rebuilding orders
+
+Run from the repository root:
+    python -m benchmarks.bench_returns
+"""
+
+import random
+import time
+from itertools import groupby
+
+from app.refactored import Order
+from app.returns import ReturnsLedger
+
+ORDERS = 5000
+LINES_PER_ORDER = 40
+RETURNS_PER_ORDER = 3
+
+
+def make_orders(rng):
+    orders = {}
+    for number in range(ORDERS):
+        order = Order(f"ORD{number}", "Customer", "customer@example.com")
+        for line in range(LINES_PER_ORDER):
+            order.add_item(f"Product {line}", round(rng.uniform(1, 20), 2), rng.randint(3, 5))
+        order.set_discount_code(rng.choice([None, "SAVE10", "SAVE20"]))
+        order.transition_to("paid")
+        orders[order.order_id] = order
+    return orders
+
+
+def make_records(rng, orders):
+    records = []
+    for order in orders.values():
+        for number in range(RETURNS_PER_ORDER):
+            return_id = f"{order.order_id}-R{number}"
+            for line in rng.sample(range(LINES_PER_ORDER), 2):
+                records.append({"return_id": return_id, "order_id": order.order_id, "line": line, "quantity": 1})
+    return records
+
+
+def rebuild_refunds(orders, records):
+    """Baseline: price a fresh order of the kept goods after every return"""
+    kept = {order_id: [item.quantity for item in order.items] for order_id, order in orders.items()}
+    charged = {order_id: order.calculate_total_with_discount() for order_id, order in orders.items()}
+    refunds = []
+    for _, rows in groupby(records, key=lambda record: record["return_id"]):
+        rows = list(rows)
+        order = orders[rows[0]["order_id"]]
+        for row in rows:
+            kept[order.order_id][row["line"]] -= row["quantity"]
+        rebuilt = Order("REBUILT", order.customer_name, order.customer_email)
+        for item, quantity in zip(order.items, kept[order.order_id]):
+            if quantity:
+                rebuilt.add_item(item.product_name, item.price, quantity)
+        total = rebuilt.calculate_total_with_discount(order.discount_code)
+        refunds.append(charged[order.order_id] - total)
+        charged[order.order_id] = total
+    return refunds
+
+
+def main():
+    rng = random.Random(42)
+    orders = make_orders(rng)
+    records = make_records(rng, orders)
+
+    start = time.perf_counter()
+    rebuild_refunds(orders, records)
+    rebuilt = time.perf_counter() - start
+
+    start = time.perf_counter()
+    refunds = ReturnsLedger().process_records(orders, records)
+    incremental = time.perf_counter() - start
+
+    print(f"{ORDERS} orders x {LINES_PER_ORDER} lines, {len(refunds)} returns of 2 lines")
+    print(f"rebuild order          : {rebuilt / len(refunds) * 1e6:8.1f} us per return")
+    print(
+        f"incremental ledger     : {incremental / len(refunds) * 1e6:8.1f} us per return  "
+        f"({rebuilt / incremental:.0f}x faster)"
+    )
+
+
+if __name__ == "__main__":
+    main()
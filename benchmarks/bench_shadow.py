@@ -0,0 +1,62 @@
+"""
+Benchmark: request-path cost of shadowing
+Prices the same stream of requests with app.example alone and with a
+shadow runner comparing a sample against app.refactored, reporting the
+added per-request time, how many samples were compared or dropped, and
+the candidate/primary latency ratio
+
+Run from the repository root:
+    python -m benchmarks.bench_shadow
+"""
+
+import random
+import time
+
+from app import example, refactored
+from app.shadow import ShadowRequest, ShadowRunner, order_pricer
+
+REQUESTS = 20000
+LINES_PER_REQUEST = 20
+SAMPLE_RATES = (0.01, 0.1, 1.0)
+QUEUE_SIZE = 256
+
+
+def requests(rng):
+    codes = [None, "SAVE10", "SAVE20", "SAVE30"]
+    for number in range(REQUESTS):
+        lines = [
+            (f"SKU-{rng.randrange(1000)}", round(rng.uniform(1, 80), 2), rng.randint(1, 4))
+            for _ in range(LINES_PER_REQUEST)
+        ]
+        yield ShadowRequest(f"ORD{number}", lines, rng.choice(codes))
+
+
+def main():
+    stream = list(requests(random.Random(42)))
+    primary = order_pricer(example.Order)
+    candidate = order_pricer(refactored.Order)
+
+    start = time.perf_counter()
+    for request in stream:
+        primary(request)
+    baseline = (time.perf_counter() - start) / REQUESTS
+    print(f"{REQUESTS} requests of {LINES_PER_REQUEST} lines, queue of {QUEUE_SIZE}")
+    print(f"primary only     : {baseline * 1e6:7.1f} us per request")
+
+    for rate in SAMPLE_RATES:
+        with ShadowRunner(primary, candidate, sample_rate=rate, queue_size=QUEUE_SIZE, rng=random.Random(1)) as runner:
+            start = time.perf_counter()
+            for request in stream:
+                runner.price(request)
+            elapsed = (time.perf_counter() - start) / REQUESTS
+            runner.drain()
+            stats = runner.stats()
+        print(
+            f"sample {rate:>5.0%}     : {elapsed * 1e6:7.1f} us per request ({(elapsed / baseline - 1):+.0%}), "
+            f"{stats['compared']} compared, {stats['dropped']} dropped, {stats['divergent']} divergent, "
+            f"candidate/primary {stats['latency_ratio']:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
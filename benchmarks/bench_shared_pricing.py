@@ -0,0 +1,56 @@
+"""
+Benchmark: parallel pricing with pickled orders vs. shared-memory columns
+
+Run from the repository root:
+    python -m benchmarks.bench_shared_pricing
+"""
+
+import os
+import time
+
+from app.refactored import Order
+from app.shared_pricing import SharedOrderBatch, make_executor
+
+ORDERS = 50000
+LINES_PER_ORDER = 20
+
+
+def price_pickled(orders):
+    return [order.calculate_total_with_discount() for order in orders]
+
+
+def make_orders():
+    lines = [(f"P{line}", 3.0 + line, 1 + line % 4) for line in range(LINES_PER_ORDER)]
+    specs = [(f"ORD{number}", "Customer", "customer@example.com", lines) for number in range(ORDERS)]
+    return Order.bulk_create(specs)
+
+
+def main():
+    orders = make_orders()
+    print(f"{ORDERS} orders x {LINES_PER_ORDER} lines")
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        with make_executor(workers) as executor:
+            # Warm the pool so process start-up is not measured
+            list(executor.map(abs, range(workers)))
+
+            chunk = -(-ORDERS // (workers * 4))
+            start = time.perf_counter()
+            futures = [executor.submit(price_pickled, orders[index:index + chunk]) for index in range(0, ORDERS, chunk)]
+            for future in futures:
+                future.result()
+            pickled = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with SharedOrderBatch(orders) as batch:
+                packed = time.perf_counter() - start
+                batch.price(executor=executor, workers=workers)
+            shared = time.perf_counter() - start
+
+        print(
+            f"workers={workers:<3} pickled={pickled * 1000:8.1f} ms  "
+            f"shared memory={shared * 1000:8.1f} ms (packing {packed * 1000:.1f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
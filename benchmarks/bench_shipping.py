@@ -0,0 +1,48 @@
+"""
+Benchmark: shipment split optimization on multi-warehouse carts
+Compares one shipment per stocking warehouse (no optimization) and the
+greedy seed against branch-and-bound within its time budget
+
+Run from the repository root:
+    python -m benchmarks.bench_shipping
+"""
+
+import random
+import time
+
+from app.shipping import ShipmentOptimizer, ShipmentPlan
+
+CARTS = 20
+WAREHOUSES = [f"WH{number}" for number in range(12)]
+TIME_BUDGET = 0.05
+
+
+def make_cart(rng, lines):
+    return [(round(rng.uniform(0.5, 6), 2), rng.sample(WAREHOUSES, rng.randint(1, 3))) for _ in range(lines)]
+
+
+def main():
+    rng = random.Random(42)
+    optimizer = ShipmentOptimizer(time_budget=TIME_BUDGET)
+    print(f"{CARTS} carts per size, {len(WAREHOUSES)} warehouses, budget {TIME_BUDGET * 1000:.0f} ms")
+    for lines in (100, 200, 500):
+        carts = [make_cart(rng, lines) for _ in range(CARTS)]
+        naive = greedy = optimized = 0.0
+        proven = 0
+        start = time.perf_counter()
+        for cart in carts:
+            values = [value for value, _ in cart]
+            naive += ShipmentPlan([min(warehouses) for _, warehouses in cart], values, False, 0).cost
+            plan = optimizer.optimize(cart)
+            greedy += plan.greedy_cost
+            optimized += plan.cost
+            proven += plan.optimal
+        elapsed = (time.perf_counter() - start) / CARTS
+        print(
+            f"{lines:4d} lines: first warehouse ${naive / CARTS:6.2f}  greedy ${greedy / CARTS:6.2f}  "
+            f"optimized ${optimized / CARTS:6.2f}  ({proven}/{CARTS} proven optimal, {elapsed * 1000:.1f} ms/cart)"
+        )
+
+
+if __name__ == "__main__":
+    main()
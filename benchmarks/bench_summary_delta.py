@@ -0,0 +1,60 @@
+"""
+Benchmark: cart sync by full summary vs. summary delta
+Edits one line of a large cart at a time and compares re-fetching
+get_order_summary() with fetching get_summary_delta() from the client's
+last version, in time per sync and bytes that would go over the wire
+
+Run from the repository root:
+    python -m benchmarks.bench_summary_delta
+"""
+
+import random
+import time
+
+from app.refactored import Order
+
+LINES = 5000
+EDITS = 500
+
+
+def make_order():
+    order = Order("ORD-1", "Ann", "ann@example.com")
+    for number in range(LINES):
+        order.add_item(f"SKU-{number}", round(1 + number % 97 * 0.5, 2), 1 + number % 3)
+    return order
+
+
+def main():
+    rng = random.Random(42)
+    edits = [(rng.randrange(LINES), rng.randint(1, 9)) for _ in range(EDITS)]
+
+    order = make_order()
+    full_bytes = 0
+    start = time.perf_counter()
+    for index, quantity in edits:
+        order.update_quantity(index, quantity)
+        full_bytes += len(order.get_order_summary().encode("utf-8"))
+    full = (time.perf_counter() - start) / EDITS
+
+    order = make_order()
+    summary, version = order.get_order_summary(), order.version
+    delta_bytes = 0
+    start = time.perf_counter()
+    for index, quantity in edits:
+        order.update_quantity(index, quantity)
+        delta = order.get_summary_delta(version)
+        version = delta.version
+        delta_bytes += sum(len(line.encode("utf-8")) + 1 for line in delta.header + delta.totals)
+        delta_bytes += sum(len(line.encode("utf-8")) + 1 for line in delta.lines.values())
+    delta_time = (time.perf_counter() - start) / EDITS
+
+    print(f"{EDITS} single-line edits of a {LINES}-line cart")
+    print(f"full summary : {full * 1e3:7.3f} ms per sync, {full_bytes / EDITS:9.0f} bytes")
+    print(f"summary delta: {delta_time * 1e3:7.3f} ms per sync, {delta_bytes / EDITS:9.0f} bytes")
+    print(f"speedup      : {full / delta_time:.1f}x time, {full_bytes / delta_bytes:.0f}x bytes")
+    # The summary at the first version, patched with one delta, matches the live one
+    assert order.get_summary_delta(make_order().version).apply(summary) == order.get_order_summary()
+
+
+if __name__ == "__main__":
+    main()
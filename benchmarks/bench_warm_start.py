@@ -0,0 +1,79 @@
+"""
+Benchmark: process startup from a warm-start snapshot
+Compares rebuilding every open order through Order()/add_item() and
+re-warming its totals and summary against opening a snapshot and serving
+requests lazily
+
+Run from the repository root:
+    python -m benchmarks.bench_warm_start
+"""
+
+import os
+import random
+import tempfile
+import time
+
+from app.refactored import Order
+from app.warm_start import WarmStartSnapshot, write_snapshot
+
+ORDERS = 50000
+LINES_PER_ORDER = 10
+REQUESTS = 1000
+
+
+def make_lines(rng):
+    def line():
+        return f"Product {rng.randrange(500)}", round(rng.uniform(1, 80), 2), rng.randint(1, 4)
+
+    return [[line() for _ in range(LINES_PER_ORDER)] for _ in range(ORDERS)]
+
+
+def cold_start(all_lines):
+    orders = {}
+    for number, lines in enumerate(all_lines):
+        order = Order(f"ORD{number}", "Customer", "customer@example.com")
+        for name, price, quantity in lines:
+            order.add_item(name, price, quantity)
+        order.calculate_total_with_discount()
+        order.get_order_summary()
+        orders[order.order_id] = order
+    return orders
+
+
+def main():
+    rng = random.Random(42)
+    all_lines = make_lines(rng)
+    requested = [f"ORD{rng.randrange(ORDERS)}" for _ in range(REQUESTS)]
+
+    start = time.perf_counter()
+    orders = cold_start(all_lines)
+    cold = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "warm.snap")
+        start = time.perf_counter()
+        write_snapshot(orders.values(), path)
+        written = time.perf_counter() - start
+        size = os.path.getsize(path)
+
+        start = time.perf_counter()
+        snapshot = WarmStartSnapshot(path)
+        opened = time.perf_counter() - start
+        start = time.perf_counter()
+        for order_id in requested:
+            snapshot.summary(order_id)
+            snapshot.breakdown(order_id)
+        served = time.perf_counter() - start
+        start = time.perf_counter()
+        snapshot.release_body()
+        materialized = time.perf_counter() - start
+
+    print(f"{ORDERS} open orders x {LINES_PER_ORDER} lines, snapshot {size / 1e6:.1f} MB written in {written:.2f}s")
+    print(f"cold rebuild + warm caches : {cold:6.2f} s")
+    print(f"open snapshot              : {opened:6.2f} s  ({cold / opened:.0f}x faster to first request)")
+    print(f"serve {REQUESTS} requests lazily : {served * 1000:6.1f} ms")
+    print(f"materialize every order    : {materialized:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Allocation profile of an invoice run, with an optional regression check
+
+Run from the repository root:
+    python -m benchmarks.profile_invoice_allocations [--save PATH] [--baseline PATH]
+
+Exits with status 1 when --baseline is given and any method regressed.
+"""
+
+import argparse
+import sys
+
+from app.profiling import AllocationProfiler, compare_reports, format_report, load_report, save_report
+from app.refactored import Invoice, Order
+
+ORDERS = 2000
+LINES_PER_ORDER = 8
+
+
+def invoice_run():
+    """Build, price and invoice orders, keeping the output like a worker batch would"""
+    invoices = []
+    for number in range(ORDERS):
+        order = Order(f"ORD{number}", f"Customer {number % 100}", f"customer{number % 100}@example.com")
+        for line in range(LINES_PER_ORDER):
+            order.add_item(f"Product {line}", 5.0 + line, 1 + number % 3)
+        order.get_order_summary()
+        invoices.append(Invoice(f"INV{number}", order).generate_invoice())
+    return invoices
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--save", help="write the report as JSON")
+    parser.add_argument("--baseline", help="compare against a saved report")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    with AllocationProfiler() as profiler:
+        # Still referenced when the profiler stops, so their memory shows up as live
+        invoices = invoice_run()
+    report = profiler.report()
+    print(f"{len(invoices)} orders x {LINES_PER_ORDER} lines (wrapper overhead {profiler.overhead} bytes/call)")
+    print(format_report(report))
+
+    if args.save:
+        save_report(report, args.save)
+    if args.baseline:
+        regressions = compare_reports(load_report(args.baseline), report, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Tests for streaming sales analytics"""
+
+import pytest
+
+from app.analytics import SalesAggregator
+from app.promotions import BuyXGetYRule, PromotionEngine
+from app.refactored import Order
+
+
+def make_order(order_id, lines):
+    order = Order(order_id, "User", "user@example.com")
+    for name, price, quantity in lines:
+        order.add_item(name, price, quantity)
+    return order
+
+
+class TestSalesAggregator:
+    def test_consume_orders(self):
+        aggregator = SalesAggregator(top_orders=2)
+        aggregator.consume_orders(
+            [
+                make_order("A", [("Laptop", 1000, 1), ("Mouse", 25, 2)]),
+                make_order("B", [("Mouse", 25, 1)]),
+                make_order("C", [("Keyboard", 75, 1)]),
+            ],
+            discount_codes={"A": "SAVE10", "C": "BOGUS"},
+        )
+
+        assert aggregator.order_count == 3
+        assert aggregator.gross_revenue == 1150
+        assert aggregator.net_revenue == 1045
+        assert aggregator.free_shipping_share == pytest.approx(1 / 3)
+        assert aggregator.discount_usage == {"SAVE10": 1}
+        assert aggregator.top_products(1) == [("Laptop", 1000)]
+        assert aggregator.top_products(1, by_quantity=True) == [("Mouse", 3)]
+        assert [order_id for order_id, _ in aggregator.top_orders()] == ["A", "C"]
+
+    def test_net_revenue_excludes_promotions_and_stored_codes(self):
+        engine = PromotionEngine([BuyXGetYRule("b1g1", "Mug", 1, 1)])
+        promoted = Order("P", "User", "user@example.com", promotion_engine=engine)
+        promoted.add_item("Mug", 30, 2)
+        coded = make_order("D", [("Mouse", 25, 4)])
+        coded.set_discount_code("SAVE10")
+
+        aggregator = SalesAggregator()
+        aggregator.consume_orders([promoted, coded])
+        assert aggregator.gross_revenue == 160
+        assert aggregator.net_revenue == pytest.approx(30 + 90)
+        assert aggregator.discount_usage == {"SAVE10": 1}
+
+    def test_consume_lines_matches_orders(self):
+        records = [
+            {"order_id": "A", "product": "Laptop", "price": 1000, "quantity": 1, "discount_code": "SAVE20"},
+            {"order_id": "A", "product": "Mouse", "price": 25, "quantity": 2},
+            {"order_id": "B", "product": "Mouse", "price": 25, "quantity": 1},
+        ]
+        from_lines = SalesAggregator()
+        from_lines.consume_lines(records)
+
+        from_orders = SalesAggregator()
+        from_orders.consume_order(make_order("A", [("Laptop", 1000, 1), ("Mouse", 25, 2)]), "SAVE20")
+        from_orders.consume_order(make_order("B", [("Mouse", 25, 1)]))
+
+        assert from_lines.product_revenue == from_orders.product_revenue
+        assert from_lines.discount_amount == from_orders.discount_amount == {"SAVE20": 210}
+        assert from_lines.top_orders() == from_orders.top_orders()
+
+    def test_merge_partial_results(self):
+        orders = [make_order(f"O{index}", [("Item", 10 * (index + 1), 1)]) for index in range(6)]
+        combined = SalesAggregator(top_orders=3)
+        combined.consume_orders(orders)
+
+        left, right = SalesAggregator(top_orders=3), SalesAggregator(top_orders=3)
+        left.consume_orders(orders[:3])
+        right.consume_orders(orders[3:])
+        merged = left.merge(right)
+
+        assert merged.order_count == combined.order_count
+        assert merged.product_revenue == combined.product_revenue
+        assert merged.top_orders() == combined.top_orders()
+        assert merged.free_shipping_orders == combined.free_shipping_orders
@@ -0,0 +1,52 @@
+"""Tests for bulk order construction"""
+
+from datetime import datetime
+
+import pytest
+
+from app.refactored import Order
+
+
+class TestBulkConstruction:
+    def test_from_lines_matches_add_item(self):
+        lines = [("Laptop", 1000, 1), ("Mouse", 25, 2, "accessories")]
+        bulk = Order.from_lines("ORD1", "User", "user@example.com", lines)
+
+        incremental = Order("ORD1", "User", "user@example.com")
+        for line in lines:
+            incremental.add_item(*line)
+
+        assert [item.to_dict() for item in bulk.items] == [item.to_dict() for item in incremental.items]
+        assert bulk.calculate_total() == incremental.calculate_total()
+        assert bulk.get_order_summary() == incremental.get_order_summary()
+
+    def test_bulk_orders_stay_editable(self):
+        order = Order.from_lines("ORD2", "User", "user@example.com", [("Cable", 10, 1)])
+        order.add_item("Charger", 30, 1)
+        order.update_quantity(0, 2)
+        assert order.calculate_subtotal() == 50
+
+    def test_bulk_create_shares_timestamp(self):
+        timestamp = datetime(2024, 5, 1, 9, 30)
+        orders = Order.bulk_create(
+            [
+                ("A", "Ann", "ann@example.com", [("Cable", 10, 1)]),
+                ("B", "Bob", "bob@example.com", [("Lamp", 60, 2)], "10001"),
+            ],
+            created_at=timestamp,
+        )
+        assert [order.created_at for order in orders] == [timestamp, timestamp]
+        assert orders[1].postal_code == "10001"
+        assert orders[1].calculate_total() == 132
+
+    @pytest.mark.parametrize(
+        "line, message",
+        [
+            ((" ", 10, 1), "Product name cannot be empty"),
+            (("Cable", 0, 1), "Price must be positive"),
+            (("Cable", 10, -1), "Quantity must be positive"),
+        ],
+    )
+    def test_batch_validation(self, line, message):
+        with pytest.raises(ValueError, match=message):
+            Order.bulk_create([("A", "Ann", "ann@example.com", [("Lamp", 5, 1)]), ("B", "Bob", "b@x.com", [line])])
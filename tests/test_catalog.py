@@ -0,0 +1,74 @@
+"""Tests for the product catalog"""
+
+import pytest
+
+from app.catalog import ProductCatalog
+from app.eventlog import OrderEventLog
+from app.refactored import Order
+
+
+@pytest.fixture
+def catalog():
+    catalog = ProductCatalog()
+    catalog.add("Laptop", 1000, category="electronics")
+    catalog.add("Mouse", 25)
+    return catalog
+
+
+class TestProductCatalog:
+    def test_lines_reference_shared_product_records(self, catalog):
+        first, second = Order("A", "User", "a@example.com"), Order("B", "User", "b@example.com")
+        mouse = catalog.find("Mouse")
+        catalog.add_to_order(first, mouse.product_id, 1)
+        catalog.add_to_order(second, mouse.product_id, 2)
+
+        assert first.items[0].product_name is second.items[0].product_name
+        assert first.items[0].product_id == mouse.product_id
+        assert catalog.get(0).attributes == {"category": "electronics"}
+
+    def test_bulk_price_refresh_reprices_open_orders_only(self, catalog):
+        laptop, mouse = catalog.find("Laptop"), catalog.find("Mouse")
+        open_order = Order("OPEN", "User", "a@example.com")
+        catalog.add_to_order(open_order, laptop.product_id, 1)
+        catalog.add_to_order(open_order, mouse.product_id, 2)
+        assert open_order.calculate_subtotal() == 1050
+
+        paid_order = Order("PAID", "User", "b@example.com")
+        catalog.add_to_order(paid_order, mouse.product_id, 1)
+        paid_order.transition_to("paid")
+
+        assert catalog.update_prices({mouse.product_id: 20, laptop.product_id: 1000}) == 1
+        assert open_order.calculate_subtotal() == 1040
+        assert paid_order.items[0].price == 25
+        assert catalog.orders_with(mouse.product_id) == [open_order]
+
+    def test_loader_misses_are_cached(self):
+        catalog = ProductCatalog(loader=lambda name: (9.5, {"category": "misc"}) if name == "Cable" else None)
+        assert catalog.find("Cable").price == 9.5
+        assert catalog.find("Cable").product_id == 0
+        assert catalog.find("Unknown") is None
+        assert catalog.find("Unknown") is None
+        assert catalog.loader_calls == 2
+        catalog.add("Unknown", 3.0)
+        assert catalog.find("Unknown").price == 3.0
+
+    def test_orders_built_elsewhere_are_repriced_once_tracked(self, catalog):
+        restored = Order.from_lines("R", "User", "r@example.com", [("Mouse", 25, 2, None, 1)])
+        catalog.track_order(restored)
+        restored.add_item("Laptop", 1000, 1, None, 0)
+
+        assert catalog.update_prices({1: 20, 0: 900}) == 1
+        assert restored.calculate_subtotal() == 940
+
+    def test_repricing_is_event_logged(self, catalog, tmp_path):
+        log = OrderEventLog(str(tmp_path), snapshot_every=None)
+        log.recover()
+        order = Order("ORD1", "User", "user@example.com")
+        log.attach(order)
+        catalog.add_to_order(order, 1, 3)
+        catalog.update_prices({1: 30})
+        log.close()
+
+        recovered = OrderEventLog(str(tmp_path)).recover()["ORD1"]
+        assert recovered.items[0].price == 30
+        assert recovered.items[0].product_id == 1
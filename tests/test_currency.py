@@ -0,0 +1,85 @@
+"""Tests for multi-currency pricing"""
+
+import pytest
+
+from app.currency import ExchangeRateTable, MultiCurrencyPricer
+from app.refactored import Order
+
+
+@pytest.fixture
+def table():
+    return ExchangeRateTable({"EUR": 0.9, "JPY": 150.0, "VND": 25000.0})
+
+
+class TestExchangeRateTable:
+    def test_convert_many_rounds_to_minor_units(self, table):
+        assert table.convert_many([10, 2.5], "EUR") == [9.0, 2.25]
+        assert table.convert_many([1.234], "JPY") == [185.0]
+        assert table.convert(3, "USD") == 3
+
+    def test_unknown_currency(self, table):
+        with pytest.raises(ValueError, match="Unknown currency"):
+            table.convert(1, "XYZ")
+
+    def test_from_csv(self, tmp_path):
+        path = tmp_path / "rates.csv"
+        path.write_text("eur,0.5\nGBP,0.8\n")
+        loaded = ExchangeRateTable.from_csv(str(path))
+        assert loaded.currencies == ["EUR", "GBP", "USD"]
+        assert loaded.rate("EUR") == 0.5
+
+
+class TestMultiCurrencyPricer:
+    def test_quote_matches_base_pricing(self, table):
+        order = Order("ORD1", "User", "user@example.com")
+        order.add_item("Phone", 500, 1)
+
+        quote = MultiCurrencyPricer(table).quote(order, "EUR", "SAVE20")
+        assert quote["total"] == round(order.calculate_total_with_discount("SAVE20") * 0.9, 2)
+        assert quote["discount"] == 90.0
+
+    def test_cache_is_keyed_on_order_version(self, table):
+        order = Order("ORD2", "User", "user@example.com")
+        order.add_item("Mouse", 20, 1)
+        pricer = MultiCurrencyPricer(table)
+
+        first = pricer.quote(order, "EUR")
+        assert pricer.quote(order, "EUR") is first
+
+        order.add_item("Keyboard", 100, 1)
+        second = pricer.quote(order, "EUR")
+        assert second is not first
+        assert second["subtotal"] == 108.0
+        assert second["shipping"] == 0.0
+
+    def test_quote_all_and_convert_lines(self, table):
+        order = Order("ORD3", "User", "user@example.com")
+        order.add_item("Mouse", 20, 2)
+        pricer = MultiCurrencyPricer(table)
+
+        quotes = pricer.quote_all(order, ["USD", "JPY"])
+        assert quotes["USD"]["total"] == 54.0
+        assert quotes["JPY"]["total"] == 8100.0
+        assert pricer.convert_lines(order, "JPY") == [6000.0]
+
+    def test_uses_the_order_discount_code_by_default(self, table):
+        order = Order("ORD4", "User", "user@example.com")
+        order.add_item("Phone", 500, 1)
+        order.set_discount_code("SAVE20")
+
+        assert MultiCurrencyPricer(table).quote(order, "USD")["discount"] == 100.0
+
+    def test_cache_evicts_least_recently_quoted_orders(self, table):
+        pricer = MultiCurrencyPricer(table, max_orders=2)
+        orders = []
+        for number in range(3):
+            order = Order(f"ORD{number}", "User", "user@example.com")
+            order.add_item("Mouse", 20, 1)
+            orders.append(order)
+
+        first = pricer.quote(orders[0], "EUR")
+        pricer.quote(orders[1], "EUR")
+        assert pricer.quote(orders[0], "EUR") is first
+        pricer.quote(orders[2], "EUR")
+
+        assert list(pricer._cache) == ["ORD0", "ORD2"]
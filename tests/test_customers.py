@@ -0,0 +1,49 @@
+"""Tests for incremental customer rollups"""
+
+from datetime import datetime
+
+import pytest
+
+from app.customers import CustomerRollups
+from app.refactored import Order
+
+
+def make_order(order_id, email, price, created_at):
+    order = Order(order_id, "Customer", email)
+    order.created_at = created_at
+    order.add_item("Item", price, 1)
+    return order
+
+
+class TestCustomerRollups:
+    def test_rollups_follow_creates_edits_and_cancellations(self):
+        rollups = CustomerRollups()
+        first = make_order("ORD1", "ann@example.com", 200, datetime(2024, 1, 1))
+        second = make_order("ORD2", "ann@example.com", 20, datetime(2024, 2, 1))
+        rollups.track(first)
+        rollups.track(second)
+
+        stats = rollups.get("ann@example.com")
+        assert stats.order_count == 2
+        assert stats.lifetime_spend == pytest.approx(220 + 32)
+        assert stats.last_order_at == datetime(2024, 2, 1)
+
+        second.add_item("Extra", 100, 1)
+        assert stats.lifetime_spend == pytest.approx(220 + 132)
+
+        first.transition_to("cancelled")
+        assert stats.order_count == 1
+        assert stats.cancelled_count == 1
+        assert stats.lifetime_spend == pytest.approx(132)
+        assert stats.average_order_value == pytest.approx(132)
+
+    def test_top_customers_and_duplicate_tracking(self):
+        rollups = CustomerRollups()
+        rollups.track(make_order("A", "a@example.com", 10, datetime(2024, 1, 1)))
+        big = make_order("B", "b@example.com", 500, datetime(2024, 1, 1))
+        rollups.track(big)
+
+        assert [stats.customer_email for stats in rollups.top_customers(1)] == ["b@example.com"]
+        assert rollups.get("missing@example.com") is None
+        with pytest.raises(ValueError, match="already tracked"):
+            rollups.track(big)
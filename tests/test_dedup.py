@@ -0,0 +1,59 @@
+"""Tests for duplicate order detection"""
+
+import pytest
+
+from app.dedup import BloomFilter, DuplicateDetector, order_fingerprint
+from app.refactored import Order
+
+
+def make_order(order_id, lines=(("Shoes", 60.0, 1), ("Socks", 10.0, 5)), email="ann@example.com", code=None):
+    order = Order(order_id, "Ann", email)
+    for name, price, quantity in lines:
+        order.add_item(name, price, quantity)
+    order.set_discount_code(code)
+    return order
+
+
+class TestOrderFingerprint:
+    def test_same_cart_matches_regardless_of_id_and_line_order(self):
+        first = make_order("A")
+        retry = make_order("B", lines=(("Socks", 10.0, 5), ("Shoes", 60.0, 1)), email=" Ann@Example.com")
+        assert order_fingerprint(first) == order_fingerprint(retry)
+
+    def test_quantity_price_and_code_change_the_fingerprint(self):
+        base = order_fingerprint(make_order("A"))
+        assert order_fingerprint(make_order("A", lines=(("Shoes", 60.0, 2), ("Socks", 10.0, 5)))) != base
+        assert order_fingerprint(make_order("A", lines=(("Shoes", 60.5, 1), ("Socks", 10.0, 5)))) != base
+        assert order_fingerprint(make_order("A", code="SAVE10")) != base
+
+
+class TestDuplicateDetector:
+    def test_flags_retries_within_the_window(self):
+        detector = DuplicateDetector(window=60, slices=3)
+        assert not detector.check(make_order("A"), now=0)
+        assert detector.check(make_order("B"), now=30)
+        assert not detector.check(make_order("C", code="SAVE10"), now=30)
+        # Remembered for at least the window, forgotten once its slice has fully aged out
+        assert detector.check(make_order("D"), now=59)
+        assert not detector.check(make_order("E"), now=81)
+        assert detector.stats()["duplicates"] == 2
+
+    def test_measures_false_positives_without_misreporting(self):
+        detector = DuplicateDetector(expected_per_window=200, error_rate=0.2, slices=1)
+        fingerprints = [order_fingerprint(make_order(str(n), lines=(("Item", 1.0, n + 1),))) for n in range(2000)]
+        assert not any(detector.check_fingerprint(fingerprint, now=0) for fingerprint in fingerprints)
+        assert detector.false_positives > 0
+        assert detector.false_positive_rate == detector.false_positives / 2000
+
+    def test_filter_only_mode_keeps_no_fingerprints(self):
+        detector = DuplicateDetector(exact=False)
+        assert not detector.check(make_order("A"), now=0)
+        assert detector.check(make_order("B"), now=1)
+        assert detector._buckets[0].exact is None
+
+    def test_bloom_filter_sizing(self):
+        bloom = BloomFilter(1000, 0.01)
+        assert bloom.hashes == 7
+        assert 9000 < bloom.size < 10000
+        with pytest.raises(ValueError):
+            BloomFilter(0, 0.01)
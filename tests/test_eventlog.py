@@ -0,0 +1,90 @@
+"""Tests for the event-sourced order log"""
+
+import pytest
+
+from app.eventlog import OrderEventLog
+from app.refactored import Order
+from app.tax import TaxEngine, TaxJurisdiction
+
+
+def make_order(order_id):
+    order = Order(order_id, "User", "user@example.com", postal_code="10001")
+    order.add_item("Laptop", 1000, 1)
+    return order
+
+
+def mutate(order):
+    order.add_item("Mouse", 25, 2)
+    order.update_quantity(1, 3)
+    order.set_discount_code("SAVE10")
+
+
+class TestOrderEventLog:
+    def test_recover_replays_all_mutations(self, tmp_path):
+        log = OrderEventLog(str(tmp_path), snapshot_every=None)
+        assert log.recover() == {}
+        order = make_order("ORD1")
+        log.attach(order)
+        mutate(order)
+        log.close()
+
+        recovered = OrderEventLog(str(tmp_path)).recover()["ORD1"]
+        assert recovered.to_state() == order.to_state()
+        assert recovered.calculate_total_with_discount() == order.calculate_total_with_discount()
+
+    def test_recovered_orders_keep_the_log_tax_engine(self, tmp_path):
+        engine = TaxEngine([TaxJurisdiction("New York", 0.08, postal_range=("10000", "14999"))])
+        log = OrderEventLog(str(tmp_path), snapshot_every=2, tax_engine=engine)
+        log.recover()
+        order = Order("ORD1", "User", "user@example.com", postal_code="10001", tax_engine=engine)
+        order.add_item("Laptop", 1000, 1)
+        log.attach(order)
+        mutate(order)
+        with pytest.raises(ValueError, match="different tax engine"):
+            log.attach(make_order("FLAT"))
+        log.close()
+
+        recovered = OrderEventLog(str(tmp_path), tax_engine=engine).recover()["ORD1"]
+        assert recovered.tax_engine is engine
+        assert recovered.calculate_total_with_discount() == order.calculate_total_with_discount()
+
+    def test_snapshot_limits_replay_and_drops_closed_orders(self, tmp_path):
+        log = OrderEventLog(str(tmp_path), snapshot_every=4)
+        log.recover()
+        open_order, closed_order = make_order("OPEN"), make_order("CLOSED")
+        log.attach(open_order)
+        log.attach(closed_order)
+        mutate(open_order)
+        closed_order.transition_to("cancelled")
+        open_order.transition_to("paid")
+        log.close()
+
+        snapshots = sorted(path.name for path in tmp_path.glob("snapshot-*.json"))
+        segments = sorted(path.name for path in tmp_path.glob("events-*.log"))
+        assert snapshots == ["snapshot-000000000004.json"]
+        assert segments == ["events-000000000005.log"]
+
+        resumed = OrderEventLog(str(tmp_path))
+        recovered = resumed.recover()
+        assert list(recovered) == ["OPEN"]
+        assert recovered["OPEN"].to_state() == open_order.to_state()
+        assert resumed.seq == 7
+
+    def test_torn_tail_is_ignored_and_logging_resumes(self, tmp_path):
+        log = OrderEventLog(str(tmp_path), snapshot_every=None)
+        log.recover()
+        order = make_order("ORD1")
+        log.attach(order)
+        order.add_item("Mouse", 25, 1)
+        log.close()
+        segment = next(tmp_path.glob("events-*.log"))
+        with open(segment, "a") as handle:
+            handle.write('{"type":"item_added","order_id":"OR')
+
+        resumed = OrderEventLog(str(tmp_path), snapshot_every=None)
+        recovered = resumed.recover()["ORD1"]
+        assert len(recovered.items) == 2
+        recovered.add_item("Cable", 5, 1)
+        resumed.close()
+
+        assert len(OrderEventLog(str(tmp_path)).recover()["ORD1"].items) == 3
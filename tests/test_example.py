@@ -211,3 +211,42 @@ class TestRefactoringBenefits:
         calculator = PriceCalculator([item.to_dict()])
         assert calculator.get_subtotal() == 100
         assert calculator.get_tax() == 10
+
+    def test_adding_items_after_pricing_updates_totals(self):
+        """Cached calculator picks up items added after the first calculation"""
+        order = NewOrder("ORD400", "Customer", "customer@email.com")
+        order.add_item("Product", 40, 1)
+        assert order.calculate_subtotal() == 40
+
+        order.add_item("Product 2", 20, 1)
+        assert order.calculate_subtotal() == 60
+        assert order.version == 2
+
+    def test_stored_discount_code_shows_in_summary_and_invoice(self):
+        order = NewOrder("ORD600", "Customer", "customer@email.com")
+        order.add_item("Product", 30, 2)
+        order.set_discount_code("SAVE20")
+
+        summary = order.get_order_summary()
+        assert "Discount (SAVE20): -$12.00\nTax (10%): $4.80\n" in summary
+        assert summary.endswith("Total: $57.80\n")
+        invoice = NewInvoice("INV600", order).generate_invoice()
+        assert "Discount (SAVE20): -$12.00\nTax: $4.80\n" in invoice
+        assert invoice.endswith("TOTAL: $57.80\n")
+
+    def test_quantity_and_discount_code_updates(self):
+        """Orders can be edited in place and remember their discount code"""
+        order = NewOrder("ORD500", "Customer", "customer@email.com")
+        order.add_item("Product", 40, 1)
+        assert order.calculate_total() == 54
+
+        order.update_quantity(0, 3)
+        order.set_discount_code("SAVE10")
+        assert order.calculate_subtotal() == 120
+        assert order.calculate_total_with_discount() == 118.8
+        assert order.calculate_total() == 118.8
+
+        with pytest.raises(ValueError, match="Quantity must be positive"):
+            order.update_quantity(0, 0)
+        with pytest.raises(ValueError, match="Unknown discount code"):
+            order.set_discount_code("FREE")
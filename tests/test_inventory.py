@@ -0,0 +1,83 @@
+"""Tests for inventory reservations"""
+
+import threading
+
+import pytest
+
+from app.inventory import InsufficientStockError, Inventory
+from app.refactored import Order
+
+
+class TestInventory:
+    def test_order_reserves_all_lines(self):
+        inventory = Inventory({"Laptop": 2, "Mouse": 10})
+        order = Order("ORD1", "User", "user@example.com")
+        order.add_item("Laptop", 1000, 1)
+        order.add_item("Mouse", 25, 2)
+        order.add_item("Mouse", 25, 3)
+
+        reservation = order.reserve_inventory(inventory)
+        assert inventory.available("Laptop") == 1
+        assert inventory.available("Mouse") == 5
+
+        inventory.release(reservation)
+        inventory.release(reservation)
+        assert inventory.available("Mouse") == 10
+
+    def test_reservation_is_all_or_nothing(self):
+        inventory = Inventory({"Laptop": 1, "Mouse": 10})
+
+        with pytest.raises(InsufficientStockError) as error:
+            inventory.reserve([("Mouse", 2), ("Laptop", 3), ("Webcam", 1)])
+        assert "Webcam" in error.value.shortages
+
+        with pytest.raises(InsufficientStockError) as error:
+            inventory.reserve([("Mouse", 2), ("Laptop", 3)])
+        assert error.value.shortages == {"Laptop": (3, 1)}
+        assert inventory.available("Mouse") == 10
+
+    def test_concurrent_reservations_never_oversell(self):
+        inventory = Inventory({"A": 500, "B": 500}, stripes=4)
+        successes = []
+
+        def worker():
+            for _ in range(200):
+                try:
+                    successes.append(inventory.reserve([("A", 1), ("B", 2)]))
+                except InsufficientStockError:
+                    pass
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(successes) == 250
+        assert inventory.available("A") == 250
+        assert inventory.available("B") == 0
+
+    def test_concurrent_releases_restock_once(self):
+        inventory = Inventory({"A": 100})
+        reservations = [inventory.reserve([("A", 1)]) for _ in range(100)]
+        barrier = threading.Barrier(4)
+
+        def worker():
+            barrier.wait()
+            for reservation in reservations:
+                inventory.release(reservation)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert inventory.available("A") == 100
+
+    def test_add_product_and_restock(self):
+        inventory = Inventory({})
+        inventory.add_product("Cable", 3)
+        inventory.restock("Cable", 2)
+        assert inventory.available("Cable") == 5
+        assert inventory.available("Missing") == 0
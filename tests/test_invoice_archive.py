@@ -0,0 +1,70 @@
+"""Tests for the compressed invoice archive"""
+
+import os
+
+import pytest
+
+from app.invoice_archive import InvoiceArchive, invoice_record, render_record, train_dictionary
+from app.refactored import Invoice, Order
+
+
+def make_invoice(number):
+    order = Order(f"ORD{number}", f"Customer {number % 7}", f"customer{number % 7}@example.com")
+    order.add_item("Laptop", 999.99, 1)
+    order.add_item(f"Cable {number % 3}", 9.5, number % 4 + 1)
+    return Invoice(f"INV{number}", order)
+
+
+class TestInvoiceArchive:
+    def test_render_matches_generated_invoice(self):
+        invoice = make_invoice(1)
+        assert render_record(invoice_record(invoice)) == invoice.generate_invoice()
+        invoice.order.set_discount_code("SAVE10")
+        assert render_record(invoice_record(invoice)) == invoice.generate_invoice()
+
+    def test_random_access_after_reopen(self, tmp_path):
+        path = str(tmp_path / "invoices.arc")
+        invoices = [make_invoice(number) for number in range(50)]
+        dictionary = train_dictionary(invoice_record(invoice) for invoice in invoices[:20])
+        with InvoiceArchive(path, dictionary) as archive:
+            for invoice in invoices:
+                archive.add(invoice)
+            with pytest.raises(ValueError):
+                archive.add(invoices[0])
+
+        with InvoiceArchive(path) as archive:
+            assert archive.dictionary == dictionary
+            assert len(archive) == 50
+            assert archive.render("INV37") == invoices[37].generate_invoice()
+            assert archive.get_record("INV3")["lines"] == [["Laptop", 999.99, 1], ["Cable 0", 9.5, 4]]
+            with pytest.raises(KeyError):
+                archive.get_record("INV99")
+
+    def test_dictionary_shrinks_records(self, tmp_path):
+        invoices = [make_invoice(number) for number in range(30)]
+        dictionary = train_dictionary(invoice_record(invoice) for invoice in invoices)
+        with InvoiceArchive(str(tmp_path / "plain.arc")) as plain, InvoiceArchive(
+            str(tmp_path / "trained.arc"), dictionary
+        ) as trained:
+            for invoice in invoices:
+                plain.add(invoice)
+                trained.add(invoice)
+            assert trained.stored_bytes() < plain.stored_bytes() * 0.7
+
+    def test_dictionary_size_is_respected(self):
+        records = [invoice_record(make_invoice(number)) for number in range(5)]
+        assert train_dictionary(records, 0) == b""
+        assert len(train_dictionary(records, 64)) == 64
+
+    def test_torn_entry_is_dropped_on_open(self, tmp_path):
+        path = str(tmp_path / "invoices.arc")
+        with InvoiceArchive(path) as archive:
+            archive.add(make_invoice(1))
+            archive.add(make_invoice(2))
+        with open(path, "r+b") as handle:
+            handle.truncate(os.path.getsize(path) - 3)
+
+        with InvoiceArchive(path) as archive:
+            assert archive.ids() == ["INV1"]
+            archive.add(make_invoice(3))
+            assert archive.get_record("INV3")["order_id"] == "ORD3"
@@ -0,0 +1,101 @@
+"""Tests for delta-based invoice reissue"""
+
+import pytest
+
+from app.refactored import Invoice, Order
+
+
+def make_order(lines=(("Widget", 10.0, 2), ("Gadget", 20.0, 1))):
+    order = Order("ORD-1", "Ann", "ann@example.com")
+    for name, price, quantity in lines:
+        order.add_item(name, price, quantity)
+    return order
+
+
+class TestInvoiceReissue:
+    def test_unchanged_order_needs_no_adjustment(self):
+        order = make_order()
+        invoice = Invoice("INV-1", order)
+        assert invoice.reissue("ADJ-1") is None
+        order.transition_to("paid")
+        assert invoice.reissue("ADJ-1") is None
+
+    def test_added_line_gives_supplementary_invoice(self):
+        order = make_order()
+        invoice = Invoice("INV-1", order)
+        order.add_item("Cable", 5.0, 3)
+
+        adjustment = invoice.reissue("ADJ-1")
+        assert not adjustment.is_credit_note
+        assert adjustment.lines == [(2, None, ("Cable", 5.0, 3))]
+        assert adjustment.deltas["subtotal"] == 15.0
+        assert adjustment.deltas["tax"] == pytest.approx(1.5)
+        assert adjustment.deltas["shipping"] == -5.0
+        assert adjustment.deltas["total"] == pytest.approx(11.5)
+        assert "SUPPLEMENTARY INVOICE #ADJ-1" in adjustment.render()
+        assert "Cable: added $5.0 x 3 = +$15.00" in adjustment.render()
+
+    def test_reduced_quantity_gives_credit_note_with_shipping_delta(self):
+        order = make_order((("Widget", 30.0, 4),))
+        invoice = Invoice("INV-1", order)
+        order.update_quantity(0, 1)
+
+        adjustment = invoice.reissue("ADJ-1")
+        assert adjustment.is_credit_note
+        assert adjustment.lines == [(0, ("Widget", 30.0, 4), ("Widget", 30.0, 1))]
+        assert adjustment.deltas["subtotal"] == -90.0
+        assert adjustment.deltas["shipping"] == 10.0
+        text = adjustment.render()
+        assert text.startswith("CREDIT NOTE #ADJ-1")
+        assert "Widget: $30.0 x 4 -> $30.0 x 1 = -$90.00" in text
+        assert "Shipping: +$10.00" in text
+
+    def test_discount_code_change_gives_credit_note(self):
+        order = make_order((("Widget", 30.0, 2),))
+        invoice = Invoice("INV-1", order)
+        assert invoice.issued_totals["total"] == 71.0
+        order.set_discount_code("SAVE20")
+
+        adjustment = invoice.reissue("ADJ-1")
+        assert adjustment.is_credit_note
+        assert adjustment.lines == []
+        assert adjustment.deltas["total"] == pytest.approx(57.8 - 71.0)
+        assert "Discount: -$12.00" in adjustment.render()
+
+    def test_reissue_rebases_on_current_order(self):
+        order = make_order()
+        invoice = Invoice("INV-1", order)
+        order.update_quantity(1, 2)
+        invoice.reissue("ADJ-1")
+        order.update_quantity(0, 1)
+
+        adjustment = invoice.reissue("ADJ-2")
+        assert [index for index, _, _ in adjustment.lines] == [0]
+        assert invoice.issued_lines == [("Widget", 10.0, 1), ("Gadget", 20.0, 2)]
+        assert invoice.issued_totals["total"] == order.calculate_total()
+
+    def test_edit_reverted_before_reissue_is_not_billed(self):
+        order = make_order()
+        invoice = Invoice("INV-1", order)
+        order.update_quantity(0, 5)
+        order.update_quantity(0, 2)
+        assert invoice.reissue("ADJ-1") is None
+
+    def test_truncated_change_log_falls_back_to_all_lines(self):
+        order = make_order()
+        order.LINE_CHANGE_LIMIT = 4
+        invoice = Invoice("INV-1", order)
+        for quantity in range(3, 10):
+            order.update_quantity(1, quantity)
+
+        assert order.changed_lines_since(invoice.issued_version) is None
+        adjustment = invoice.reissue("ADJ-1")
+        assert adjustment.lines == [(1, ("Gadget", 20.0, 1), ("Gadget", 20.0, 9))]
+        assert order.changed_lines_since(order.version) == []
+
+    def test_restored_order_tracks_changes_from_its_version(self):
+        order = Order.from_state(make_order().to_state())
+        invoice = Invoice("INV-1", order)
+        assert order.changed_lines_since(0) is None
+        order.add_item("Cable", 5.0, 1)
+        assert order.changed_lines_since(invoice.issued_version) == [2]
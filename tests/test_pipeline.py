@@ -0,0 +1,91 @@
+"""Tests for compiled pricing pipelines"""
+
+import json
+import random
+
+import pytest
+
+from app import pipeline
+from app.pipeline import DEFAULT_PIPELINE, PricingPipeline, compile_pipeline, generate_source, load_pipelines
+from app.refactored import Order
+from app.tax import TaxEngine, TaxJurisdiction
+
+
+def make_orders(count):
+    rng = random.Random(5)
+    orders = []
+    for number in range(count):
+        order = Order(f"ORD{number}", "Ann", "ann@example.com")
+        for line in range(rng.randint(1, 4)):
+            order.add_item(f"Item {line}", round(rng.uniform(1, 60), 2), rng.randint(1, 3))
+        order.set_discount_code(rng.choice([None, "SAVE10", "SAVE30"]))
+        orders.append(order)
+    return orders
+
+
+class TestPricingPipeline:
+    def test_default_pipeline_matches_price_calculator(self):
+        pipeline = PricingPipeline("default", DEFAULT_PIPELINE)
+        for order, quote in zip(make_orders(50), pipeline.price_orders(make_orders(50))):
+            breakdown = order._get_calculator().get_breakdown(order.discount_code)
+            assert quote == tuple(breakdown[key] for key in ("subtotal", "discount", "tax", "shipping", "total"))
+
+    def test_configured_stages(self):
+        price = compile_pipeline(
+            [
+                {"stage": "discount", "rate": 0.25},
+                {"stage": "shipping", "basis": "discounted", "tiers": [[200, 0], [80, 4.5]], "default": 9},
+                {"stage": "tax", "rate": 0.0825},
+                {"stage": "rounding", "places": 2},
+            ]
+        )
+        assert price(100.0) == (100.0, 25.0, 6.19, 9.0, 90.19)
+        assert price(120.0)[3] == 4.5
+        # A fixed-rate discount ignores the order's code
+        assert price(100.0, 0.5)[1] == 25.0
+
+    def test_identical_configs_share_one_function(self):
+        config = [{"stage": "tax", "rate": 0.2}]
+        assert compile_pipeline(config) is compile_pipeline([dict(config[0])])
+        assert compile_pipeline(config)(10.0) == (10.0, 0.0, 2.0, 0.0, 12.0)
+
+    def test_compiled_functions_are_bounded(self, monkeypatch):
+        monkeypatch.setattr(pipeline, "MAX_COMPILED", 2)
+        first = compile_pipeline([{"stage": "tax", "rate": 0.01}])
+        for rate in (0.02, 0.03):
+            compile_pipeline([{"stage": "tax", "rate": rate}])
+        assert len(pipeline._compiled) <= 2
+        assert compile_pipeline([{"stage": "tax", "rate": 0.01}]) is not first
+
+    @pytest.mark.parametrize(
+        "config",
+        [
+            [{"stage": "surcharge"}],
+            [{"stage": "tax"}, {"stage": "tax"}],
+            [{"stage": "tax", "rate": "0.1; import os"}],
+            [{"stage": "shipping", "tiers": [[50, 5], [100, 0]]}],
+            [{"stage": "rounding", "places": 1.5}],
+            [{"stage": "tax", "rate": object()}],
+            ["tax"],
+        ],
+    )
+    def test_invalid_configs_are_rejected(self, config):
+        with pytest.raises(ValueError):
+            generate_source(config)
+
+    def test_orders_with_a_tax_engine_are_rejected(self):
+        engine = TaxEngine([TaxJurisdiction("New York", 0.08, postal_range=("10000", "14999"))])
+        order = Order("TAXED", "User", "user@example.com", postal_code="10001", tax_engine=engine)
+        order.add_item("Item", 100.0, 1)
+        pipeline = PricingPipeline("default", DEFAULT_PIPELINE)
+        with pytest.raises(ValueError, match="TAXED"):
+            pipeline.price_order(order)
+        with pytest.raises(ValueError, match="TAXED"):
+            pipeline.price_orders([order])
+
+    def test_load_pipelines_from_json(self, tmp_path):
+        path = tmp_path / "pipelines.json"
+        path.write_text(json.dumps({"retail": DEFAULT_PIPELINE + [{"stage": "rounding"}]}))
+        pipelines = load_pipelines(str(path))
+        order = make_orders(1)[0]
+        assert pipelines["retail"].price_order(order)[4] == round(order.calculate_total_with_discount(), 2)
@@ -0,0 +1,87 @@
+"""Tests for the local pricing server"""
+
+import asyncio
+import socket
+import time
+
+import pytest
+
+from app import pricing_server
+from app.batch_pricing import price_line_sets
+from app.pricing_server import PricingClient, PricingServer, decode_request, encode_request
+from app.refactored import PriceCalculator
+
+ORDERS = [([(1000.0, 1), (25.0, 2)], None), ([(500.0, 1)], "SAVE20"), ([(20.0, 1)], "BOGUS"), ([(30.0, 2)], "SAVE10")]
+
+
+def expected_total(lines, code):
+    items = [{"product": "Item", "price": price, "quantity": quantity} for price, quantity in lines]
+    return PriceCalculator(items).get_total(code)
+
+
+async def quote_concurrently(server_options, connect_options, copies=25):
+    server = PricingServer(**server_options)
+    await server.start(**connect_options)
+    if "path" not in connect_options:
+        connect_options = {"port": server.address[1]}
+    client = PricingClient()
+    await client.connect(**connect_options)
+    requests = ORDERS * copies
+    quotes = await asyncio.gather(*(client.quote(lines, code) for lines, code in requests))
+    await client.close()
+    await server.close()
+    return requests, quotes, server
+
+
+class TestBatchPricing:
+    def test_matches_price_calculator(self):
+        quotes = price_line_sets([lines for lines, _ in ORDERS], [code for _, code in ORDERS])
+        assert [quote[4] for quote in quotes] == [expected_total(lines, code) for lines, code in ORDERS]
+
+
+class TestPricingServer:
+    def test_wire_format_round_trip(self):
+        frame = encode_request(7, [(9.99, 3)], "SAVE30")
+        assert decode_request(frame[4:]) == (7, "SAVE30", [(9.99, 3)])
+
+    def test_tcp_requests_are_micro_batched(self):
+        requests, quotes, server = asyncio.run(quote_concurrently({"max_batch_delay": 0.01}, {}))
+
+        assert [quote["total"] for quote in quotes] == [expected_total(lines, code) for lines, code in requests]
+        assert server.batches < len(requests)
+        stats = server.stats()
+        assert stats["queue"]["count"] == len(requests)
+        assert stats["batch_size"]["batches"] == server.batches
+        assert stats["batch_size"]["mean"] == pytest.approx(len(requests) / server.batches)
+        assert all(quote["queue_us"] >= 0 for quote in quotes)
+
+    @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets unavailable")
+    def test_unix_socket(self, tmp_path):
+        path = str(tmp_path / "pricing.sock")
+        requests, quotes, _ = asyncio.run(quote_concurrently({}, {"path": path}, copies=2))
+        assert quotes[1]["discount"] == 100
+        assert len(quotes) == len(requests)
+
+    def test_a_failed_batch_fails_its_requests_and_keeps_the_batcher_running(self, monkeypatch):
+        def flaky(line_sets, codes):
+            if any(lines == [(0.0, 0)] for lines in line_sets):
+                raise ValueError("bad batch")
+            return price_line_sets(line_sets, codes)
+
+        monkeypatch.setattr(pricing_server, "price_line_sets", flaky)
+
+        async def run():
+            server = PricingServer()
+            await server.start()
+            failed = asyncio.get_running_loop().create_future()
+            server._queue.put_nowait(((1, None, [(0.0, 0)]), failed, time.perf_counter()))
+            with pytest.raises(ValueError):
+                await asyncio.wait_for(failed, 5)
+            client = PricingClient()
+            await client.connect(port=server.address[1])
+            quote = await asyncio.wait_for(client.quote([(30.0, 2)], "SAVE10"), 5)
+            await client.close()
+            await server.close()
+            return quote
+
+        assert asyncio.run(run())["total"] == expected_total([(30.0, 2)], "SAVE10")
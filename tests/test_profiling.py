@@ -0,0 +1,57 @@
+"""Tests for the allocation profiler"""
+
+from app.profiling import AllocationProfiler, compare_reports, load_report, save_report
+from app.refactored import Invoice, Order
+
+
+def workload(count=20):
+    kept = []
+    for number in range(count):
+        order = Order(f"ORD{number}", "Ann", "ann@example.com")
+        for line in range(4):
+            order.add_item(f"Item {line}", 10.0, 2)
+        kept.append((order, Invoice(f"INV{number}", order).generate_invoice()))
+    return kept
+
+
+class TestAllocationProfiler:
+    def test_counts_calls_and_restores_methods(self):
+        original = Order.add_item
+        with AllocationProfiler() as profiler:
+            kept = workload()
+        assert Order.add_item is original
+
+        report = profiler.report()
+        assert report["Order.add_item"]["calls"] == 80
+        assert report["Invoice.generate_invoice"]["calls"] == 20
+        assert report["Invoice.generate_invoice"]["peak_bytes"] > 0
+        assert "Order.calculate_total" not in report
+        assert len(kept) == 20
+
+    def test_live_memory_is_charged_to_the_allocating_method(self):
+        with AllocationProfiler() as profiler:
+            kept = workload()
+        report = profiler.report()
+        # Each order's calculator keeps one dict per line
+        assert report["Order._new_calculator"]["live_blocks"] >= 80
+        assert report["Invoice.generate_invoice"]["live_bytes"] >= sum(len(text) for _, text in kept)
+
+    def test_compare_reports_flags_growth(self, tmp_path):
+        baseline = {
+            "Order.add_item": {
+                "calls": 100,
+                "net_bytes": 10000,
+                "peak_bytes": 800,
+                "live_blocks": 5,
+                "live_bytes": 4000,
+            },
+        }
+        path = str(tmp_path / "baseline.json")
+        save_report(baseline, path)
+        assert load_report(path) == baseline
+
+        same_per_call = {"Order.add_item": dict(baseline["Order.add_item"], calls=200, net_bytes=20000)}
+        assert compare_reports(baseline, same_per_call) == []
+
+        grown = {"Order.add_item": dict(baseline["Order.add_item"], peak_bytes=4000, live_bytes=4100)}
+        assert compare_reports(baseline, grown) == ["Order.add_item: peak_bytes 800 -> 4000"]
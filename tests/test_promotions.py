@@ -0,0 +1,86 @@
+"""Tests for the promotion engine"""
+
+import pytest
+
+from app.promotions import BundleRule, BuyXGetYRule, PromotionEngine, PromotionRule, TieredQuantityRule
+from app.refactored import Invoice, Order
+
+
+def items(*lines):
+    return [{"product": name, "price": price, "quantity": quantity} for name, price, quantity in lines]
+
+
+class TestPromotionRules:
+    def test_bundle(self):
+        engine = PromotionEngine([BundleRule("kit", ["Laptop", "Mouse"], 1000)])
+        assert engine.evaluate(items(("Laptop", 1000, 2), ("Mouse", 25, 1))) == [("kit", 25)]
+        assert engine.evaluate(items(("Laptop", 1000, 2))) == []
+
+    def test_buy_x_get_y(self):
+        same = PromotionEngine([BuyXGetYRule("b2g1", "Socks", 2, 1)])
+        assert same.evaluate(items(("Socks", 5, 7))) == [("b2g1", 10)]
+
+        reward = PromotionEngine([BuyXGetYRule("case", "Phone", 1, 1, reward_product="Case")])
+        assert reward.evaluate(items(("Phone", 500, 2), ("Case", 20, 1))) == [("case", 20)]
+
+    def test_tiered_quantity(self):
+        engine = PromotionEngine([TieredQuantityRule("bulk", "Paper", [(10, 0.1), (50, 0.2)])])
+        assert engine.evaluate(items(("Paper", 2, 60))) == [("bulk", pytest.approx(24))]
+        assert engine.evaluate(items(("Paper", 2, 5))) == []
+
+    def test_best_rule_wins_without_stacking(self):
+        engine = PromotionEngine(
+            [
+                TieredQuantityRule("small", "Mouse", [(2, 0.1)]),
+                BundleRule("kit", ["Laptop", "Mouse"], 900),
+                TieredQuantityRule("cable", "Cable", [(1, 0.5)]),
+            ]
+        )
+        cart = items(("Laptop", 1000, 1), ("Mouse", 25, 2), ("Cable", 10, 1))
+        assert engine.evaluate(cart) == [("kit", 125), ("cable", 5)]
+        assert engine.evaluate(cart) == engine.evaluate_all_rules(cart)
+
+    def test_only_candidate_rules_are_considered(self):
+        engine = PromotionEngine([TieredQuantityRule(f"r{n}", f"P{n}", [(1, 0.1)]) for n in range(100)])
+        candidates = engine.candidates({"P7": (1, 10.0), "Other": (1, 5.0)})
+        assert [rule.rule_id for rule in candidates] == ["r7"]
+
+
+class TestPromotionIntegration:
+    def test_promotions_feed_into_order_totals(self):
+        engine = PromotionEngine([BuyXGetYRule("b1g1", "Shirt", 1, 1)])
+        order = Order("ORD1", "User", "user@example.com", promotion_engine=engine)
+        order.add_item("Shirt", 30, 2)
+
+        breakdown = order._get_calculator().get_breakdown("SAVE10")
+        assert breakdown["promotion"] == 30
+        assert breakdown["discount"] == 3
+        # Shipping is still tiered on the undiscounted subtotal
+        assert order.calculate_total_with_discount("SAVE10") == pytest.approx(27 + 2.7 + 5)
+
+        order.add_item("Shirt", 30, 2)
+        assert order._get_calculator().get_promotion_discount() == 60
+
+    def test_summary_and_invoice_lines_add_up(self):
+        engine = PromotionEngine([BuyXGetYRule("b1g1", "Shirt", 1, 1)])
+        order = Order("ORD2", "User", "user@example.com", promotion_engine=engine)
+        order.add_item("Shirt", 30, 2)
+
+        totals = "Subtotal: $60.00\nPromotion: -$30.00\nTax (10%): $3.00\nShipping: $5.00\nTotal: $38.00\n"
+        assert order.get_order_summary().endswith(totals)
+        assert order.calculate_tax() == pytest.approx(3)
+        invoice = Invoice("INV2", order).generate_invoice()
+        assert invoice.endswith("Subtotal: $60.00\nPromotion: -$30.00\nTax: $3.00\nShipping: $5.00\nTOTAL: $38.00\n")
+
+    def test_rebuilt_orders_keep_their_promotion_engine(self):
+        engine = PromotionEngine([BuyXGetYRule("b1g1", "Shirt", 1, 1)])
+        order = Order("ORD3", "User", "user@example.com", promotion_engine=engine)
+        order.add_item("Shirt", 30, 2)
+
+        restored = Order.from_state(order.to_state(), promotion_engine=engine)
+        (bulk,) = Order.bulk_create([("ORD4", "User", "user@example.com", [("Shirt", 30, 2)])], promotion_engine=engine)
+        assert restored.calculate_total() == bulk.calculate_total() == order.calculate_total() == pytest.approx(38)
+
+    def test_rules_must_implement_discount(self):
+        with pytest.raises(TypeError):
+            PromotionRule("abstract", ["Shirt"])
@@ -0,0 +1,112 @@
+"""Tests for the order status machine and the order repository"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.refactored import Order, OrderStatus
+from app.repository import OrderRepository, SortedIndex
+
+
+def make_order(order_id, created_at=None):
+    order = Order(order_id, "User", "user@example.com")
+    if created_at is not None:
+        order.created_at = created_at
+    return order
+
+
+class TestOrderStatus:
+    def test_valid_transitions(self):
+        order = make_order("ORD1")
+        assert order.status == "pending"
+
+        order.transition_to(OrderStatus.PAID)
+        order.status = "shipped"
+        assert order.status == "shipped"
+        assert "Status: shipped" in order.get_order_summary()
+
+    def test_invalid_transitions_are_rejected(self):
+        order = make_order("ORD2")
+        with pytest.raises(ValueError, match="Cannot change status from pending to delivered"):
+            order.transition_to("delivered")
+
+        order.transition_to("cancelled")
+        with pytest.raises(ValueError):
+            order.transition_to("paid")
+        with pytest.raises(ValueError):
+            order.transition_to("unknown")
+
+    def test_listeners_receive_status_changes(self):
+        order = make_order("ORD3")
+        events = []
+        order.add_listener(lambda changed, event, payload: events.append((event.value, payload["status"])))
+
+        order.transition_to("paid")
+        assert events == [("status_changed", OrderStatus.PAID)]
+
+
+class TestSortedIndex:
+    def test_range_and_remove_with_duplicate_keys(self):
+        index = SortedIndex()
+        for key, order_id in [(3, "c"), (1, "a"), (2, "b1"), (2, "b2")]:
+            index.add(key, order_id)
+
+        assert index.range(2, 3) == ["b1", "b2"]
+        index.remove(2, "b2")
+        assert index.range() == ["a", "b1", "c"]
+        assert index.range(low=3) == ["c"]
+
+
+class TestOrderRepository:
+    def test_find_paid_orders_from_last_hour(self):
+        now = datetime(2024, 1, 1, 12, 0)
+        repository = OrderRepository()
+        orders = [make_order(f"ORD{minutes}", now - timedelta(minutes=minutes)) for minutes in (5, 30, 90)]
+        for order in orders:
+            repository.add(order)
+        orders[0].transition_to("paid")
+        orders[2].transition_to("paid")
+
+        recent_paid = repository.find_by_status("paid", created_from=now - timedelta(hours=1))
+        assert [order.order_id for order in recent_paid] == ["ORD5"]
+        assert [order.order_id for order in repository.find_by_status(OrderStatus.PAID)] == ["ORD90", "ORD5"]
+        assert repository.count_by_status()["pending"] == 1
+
+    def test_created_between_and_remove(self):
+        now = datetime(2024, 1, 1, 12, 0)
+        repository = OrderRepository()
+        repository.add(make_order("A", now))
+        repository.add(make_order("B", now + timedelta(minutes=1)))
+
+        assert [order.order_id for order in repository.created_between(now, now + timedelta(minutes=1))] == ["A"]
+
+        removed = repository.remove("A")
+        removed.transition_to("paid")
+        assert "A" not in repository
+        assert repository.find_by_status("paid") == []
+
+        with pytest.raises(ValueError, match="already exists"):
+            repository.add(make_order("B"))
+
+    def test_customer_and_total_indexes_follow_item_changes(self):
+        repository = OrderRepository()
+        small = Order("S", "Ann", "ann@example.com")
+        small.add_item("Cable", 10, 1)
+        large = Order("L", "Ann", "ann@example.com")
+        large.add_item("Monitor", 200, 1)
+        other = Order("O", "Bob", "bob@example.com")
+        other.add_item("Mouse", 60, 1)
+        for order in (small, large, other):
+            repository.add(order)
+
+        assert [order.order_id for order in repository.find_by_customer("ann@example.com")] == ["S", "L"]
+        assert [order.order_id for order in repository.find_by_total(min_total=100, free_shipping=True)] == ["L"]
+
+        # 60 -> 120 subtotal: the order moves up the total index and ships free
+        other.add_item("Keyboard", 60, 1)
+        assert [order.order_id for order in repository.find_by_total(min_total=100, free_shipping=True)] == ["O", "L"]
+        assert [order.order_id for order in repository.find_by_total(max_total=100)] == ["S"]
+
+        repository.remove("S")
+        assert [order.order_id for order in repository.find_by_customer("ann@example.com")] == ["L"]
+        assert repository.find_by_customer("nobody@example.com") == []
@@ -0,0 +1,121 @@
+"""Tests for returns and partial refunds"""
+
+import pytest
+
+from app.refactored import Order
+from app.returns import ReturnsLedger
+from app.tax import TaxEngine, TaxJurisdiction
+
+
+def paid_order(order_id="ORD1", lines=(("Shoes", 60.0, 1), ("Socks", 10.0, 5)), code="SAVE10", **kwargs):
+    order = Order(order_id, "Ann", "ann@example.com", **kwargs)
+    for name, price, quantity in lines:
+        order.add_item(name, price, quantity)
+    order.set_discount_code(code)
+    order.transition_to("paid")
+    return order
+
+
+def rebuilt_total(lines, code="SAVE10"):
+    order = Order("REBUILT", "Ann", "ann@example.com")
+    for name, price, quantity in lines:
+        order.add_item(name, price, quantity)
+    return order.calculate_total_with_discount(code)
+
+
+class TestReturnsLedger:
+    def test_partial_return_matches_rebuilt_order(self):
+        order = paid_order()
+        ledger = ReturnsLedger()
+        charged = order.calculate_total_with_discount()
+
+        refund = ledger.record_return(order, {1: 2}, "RET1")
+        assert refund.amounts["subtotal"] == 20.0
+        assert refund.amounts["discount"] == pytest.approx(2.0)
+        assert refund.total == pytest.approx(charged - rebuilt_total([("Shoes", 60.0, 1), ("Socks", 10.0, 3)]))
+        assert ledger.returned_quantities("ORD1") == {1: 2}
+
+    def test_losing_free_shipping_reduces_refund(self):
+        order = paid_order(lines=(("Shoes", 60.0, 1), ("Boots", 50.0, 1)), code=None)
+        refund = ReturnsLedger().record_return(order, {1: 1})
+        assert refund.amounts["shipping"] == -5.0
+        assert refund.total == pytest.approx(50.0 * 1.1 - 5.0)
+
+    def test_successive_returns_add_up_and_keep_shipping_paid(self):
+        order = paid_order(lines=(("Lamp", 20.0, 2),), code=None)
+        ledger = ReturnsLedger()
+        first = ledger.record_return(order, {0: 1})
+        second = ledger.record_return(order, {0: 1})
+        assert first.total + second.total == pytest.approx(44.0)
+        assert ledger.charged(order)["total"] == 10.0
+        with pytest.raises(ValueError):
+            ledger.record_return(order, {0: 1})
+
+    def test_tax_engine_rates_follow_returned_lines(self):
+        engine = TaxEngine([TaxJurisdiction("Zone", 0.05, prefix="9", category_rates={"food": 0.0})])
+        order = Order("ORD1", "Ann", "ann@example.com", postal_code="90210", tax_engine=engine)
+        order.add_item("Bread", 40.0, 1, "food")
+        order.add_item("Pan", 80.0, 1, "kitchen")
+        order.transition_to("paid")
+        refund = ReturnsLedger().record_return(order, {1: 1})
+        assert refund.amounts["tax"] == pytest.approx(4.0)
+
+    def test_edits_after_a_return_are_priced_into_the_next_one(self):
+        engine = TaxEngine([TaxJurisdiction("Zone", 0.05, prefix="9")])
+        order = paid_order(postal_code="90210", tax_engine=engine)
+        ledger = ReturnsLedger()
+        ledger.record_return(order, {1: 2})
+
+        order.add_item("Hat", 30.0, 1)
+        order.update_quantity(0, 2)
+        assert ledger.charged(order)["subtotal"] == 60.0 * 2 + 10.0 * 3 + 30.0
+
+        refund = ledger.record_return(order, {2: 1})
+        assert refund.amounts["subtotal"] == 30.0
+        assert refund.amounts["tax"] == pytest.approx(30.0 * 0.9 * 0.05)
+        assert ledger.returned_quantities("ORD1") == {1: 2, 2: 1}
+
+    def test_edits_below_the_returned_quantity_are_rejected_on_the_next_return(self):
+        order = paid_order()
+        ledger = ReturnsLedger()
+        ledger.record_return(order, {1: 4})
+        order.update_quantity(1, 2)
+        with pytest.raises(ValueError):
+            ledger.record_return(order, {0: 1})
+
+    @pytest.mark.parametrize("lines", [{}, {5: 1}, {0: 0}, {0: 2}])
+    def test_invalid_returns_are_rejected(self, lines):
+        with pytest.raises(ValueError):
+            ReturnsLedger().record_return(paid_order(), lines)
+
+    def test_pending_orders_cannot_be_returned(self):
+        order = Order("ORD1", "Ann", "ann@example.com")
+        order.add_item("Lamp", 20.0, 1)
+        with pytest.raises(ValueError):
+            ReturnsLedger().record_return(order, {0: 1})
+
+    def test_return_file(self, tmp_path):
+        orders = {order_id: paid_order(order_id) for order_id in ("ORD1", "ORD2")}
+        path = tmp_path / "returns.csv"
+        path.write_text("return_id,order_id,line,quantity\nR1,ORD1,1,1\nR1,ORD1,1,1\nR2,ORD2,0,1\n")
+        refunds = ReturnsLedger().process_file(orders, str(path))
+        assert [(refund.return_id, refund.lines) for refund in refunds] == [("R1", {1: 2}), ("R2", {0: 1})]
+
+    @pytest.mark.parametrize(
+        "rows",
+        [
+            "R1,ORD1,1,2\nR2,ORD9,0,1\n",
+            "R1,ORD1,1,2\nR2,ORD2,7,1\n",
+            # Each return fits on its own, but together they return more socks than were bought
+            "R1,ORD1,1,3\nR2,ORD1,1,3\n",
+        ],
+    )
+    def test_a_bad_row_rejects_the_whole_file(self, tmp_path, rows):
+        orders = {order_id: paid_order(order_id) for order_id in ("ORD1", "ORD2")}
+        path = tmp_path / "returns.csv"
+        path.write_text("return_id,order_id,line,quantity\n" + rows)
+        ledger = ReturnsLedger()
+        with pytest.raises(ValueError):
+            ledger.process_file(orders, str(path))
+        assert ledger.returned_quantities("ORD1") == {}
+        assert ledger.charged(orders["ORD1"]) == orders["ORD1"]._get_calculator().get_breakdown("SAVE10")
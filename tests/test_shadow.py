@@ -0,0 +1,162 @@
+"""Tests for shadow-mode pricing comparison"""
+
+import random
+import threading
+import time
+
+import pytest
+
+from app import example, refactored
+from app.shadow import DROP_OLDEST, ShadowRequest, ShadowRunner, order_pricer
+
+LINES = (("Shoes", 60.0, 1), ("Socks", 10.5, 3))
+
+
+def make_request(order_id="ORD1", lines=LINES, code="SAVE10"):
+    return ShadowRequest(order_id, lines, code)
+
+
+class TestOrderPricer:
+    def test_example_and_refactored_agree(self):
+        request = make_request()
+        assert order_pricer(example.Order)(request) == pytest.approx(order_pricer(refactored.Order)(request))
+
+
+class TestShadowRunner:
+    def test_serves_primary_results_and_finds_no_divergence_between_equal_paths(self):
+        primary = order_pricer(example.Order)
+        with ShadowRunner(primary, order_pricer(refactored.Order), sample_rate=1.0) as runner:
+            for number in range(20):
+                request = make_request(f"ORD{number}", code=("SAVE20" if number % 2 else None))
+                assert runner.price(request) == primary(request)
+            assert runner.drain(timeout=5)
+            stats = runner.stats()
+        assert stats["sampled"] == stats["compared"] == 20
+        assert stats["divergent"] == 0
+        assert stats["candidate_latency"]["count"] == 20
+        assert stats["latency_ratio"] > 0
+
+    def test_records_divergent_fields_and_candidate_errors(self):
+        def candidate(request):
+            if request.discount_code == "SAVE30":
+                raise RuntimeError("boom")
+            return dict(order_pricer(refactored.Order)(request), total=0.0)
+
+        with ShadowRunner(order_pricer(example.Order), candidate, sample_rate=1.0) as runner:
+            runner.price(make_request("A"))
+            runner.price(make_request("B", code="SAVE30"))
+            runner.drain(timeout=5)
+            stats = runner.stats()
+            wrong, failed = runner.recent_divergences()
+        assert stats["divergent"] == 2 and stats["errors"] == 1
+        assert list(wrong.fields) == ["total"]
+        assert wrong.fields["total"][1] == 0.0
+        assert failed.error == "RuntimeError: boom"
+
+    def test_samples_the_configured_share(self):
+        primary = order_pricer(refactored.Order)
+        with ShadowRunner(primary, primary, sample_rate=0.25, rng=random.Random(7)) as runner:
+            for number in range(400):
+                runner.price(make_request(f"ORD{number}"))
+            runner.drain(timeout=5)
+            stats = runner.stats()
+        assert stats["requests"] == 400
+        assert 60 < stats["sampled"] < 140
+        assert stats["compared"] == stats["sampled"]
+
+    @pytest.mark.parametrize("policy, expected_ids", [("drop_newest", ["A", "B"]), (DROP_OLDEST, ["A", "D"])])
+    def test_full_queue_drops_samples_without_blocking(self, policy, expected_ids):
+        release = threading.Event()
+        seen = []
+
+        def candidate(request):
+            release.wait(5)
+            seen.append(request.order_id)
+            return order_pricer(refactored.Order)(request)
+
+        runner = ShadowRunner(order_pricer(refactored.Order), candidate, sample_rate=1.0, queue_size=1, drop_policy=policy)
+        runner.price(make_request("A"))
+        # A is taken by the worker and blocks it; the queue then holds one more sample
+        while runner.stats()["queued"]:
+            time.sleep(0.001)
+        for order_id in "BCD":
+            runner.price(make_request(order_id))
+        release.set()
+        runner.drain(timeout=5)
+        runner.close()
+        assert runner.stats()["dropped"] == 2
+        assert seen == expected_ids
+
+    def test_close_honours_its_timeout_when_the_queue_is_full(self):
+        release = threading.Event()
+        seen = []
+
+        def candidate(request):
+            release.wait(5)
+            seen.append(request.order_id)
+            return order_pricer(refactored.Order)(request)
+
+        runner = ShadowRunner(order_pricer(refactored.Order), candidate, sample_rate=1.0, queue_size=1)
+        runner.price(make_request("A"))
+        while runner.stats()["queued"]:
+            time.sleep(0.001)
+        runner.price(make_request("B"))
+
+        started = time.monotonic()
+        runner.close(timeout=0.2)
+        assert time.monotonic() - started < 1
+        runner.price(make_request("C"))
+        release.set()
+        assert runner.drain(timeout=5)
+        stats = runner.stats()
+        assert seen == ["A"]
+        assert stats["requests"] == 3 and stats["sampled"] == 2 and stats["dropped"] == 1
+
+    def test_counts_requests_from_concurrent_callers(self):
+        pricer = order_pricer(refactored.Order)
+        with ShadowRunner(pricer, pricer, sample_rate=0.5, rng=random.Random(3)) as runner:
+
+            def serve(prefix):
+                for number in range(200):
+                    runner.price(make_request(f"{prefix}{number}"))
+
+            threads = [threading.Thread(target=serve, args=(prefix,)) for prefix in "ABCD"]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            runner.drain(timeout=5)
+            stats = runner.stats()
+        assert stats["requests"] == 800
+        assert stats["sampled"] == stats["compared"] + stats["dropped"]
+
+    @pytest.mark.parametrize("policy", ["drop_newest", DROP_OLDEST])
+    def test_closing_under_load_leaves_nothing_to_drain(self, policy):
+        pricer = order_pricer(refactored.Order)
+        runner = ShadowRunner(pricer, pricer, sample_rate=1.0, queue_size=4, drop_policy=policy)
+        stop = threading.Event()
+
+        def serve(prefix):
+            number = 0
+            while not stop.is_set():
+                runner.price(make_request(f"{prefix}{number}"))
+                number += 1
+
+        threads = [threading.Thread(target=serve, args=(prefix,)) for prefix in "ABC"]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        runner.close()
+        stop.set()
+        for thread in threads:
+            thread.join()
+        assert runner.drain(timeout=5)
+        stats = runner.stats()
+        assert stats["sampled"] == stats["compared"] + stats["dropped"]
+
+    def test_rejects_bad_configuration(self):
+        pricer = order_pricer(refactored.Order)
+        with pytest.raises(ValueError):
+            ShadowRunner(pricer, pricer, sample_rate=1.5)
+        with pytest.raises(ValueError):
+            ShadowRunner(pricer, pricer, drop_policy="block")
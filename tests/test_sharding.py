@@ -0,0 +1,106 @@
+"""Tests for sharded order processing"""
+
+import multiprocessing
+
+import pytest
+
+from app.analytics import SalesAggregator
+from app.refactored import Order
+from app.sharding import HashRing, ShardCoordinator, _Shard
+
+
+@pytest.fixture
+def coordinator():
+    coordinator = ShardCoordinator(workers=2)
+    yield coordinator
+    coordinator.close()
+
+
+def fill(coordinator, count=40):
+    expected = {}
+    for number in range(count):
+        order_id = f"ORD{number}"
+        local = Order(order_id, "Ann", "ann@example.com")
+        coordinator.create_order(order_id, "Ann", "ann@example.com")
+        for line in range(number % 3 + 1):
+            local.add_item(f"Item {line}", 10.0 + number, line + 1)
+            coordinator.add_item(order_id, f"Item {line}", 10.0 + number, line + 1)
+        expected[order_id] = local
+    return expected
+
+
+class TestHashRing:
+    def test_adding_a_node_only_moves_keys_to_it(self):
+        ring = HashRing(["a", "b", "c"])
+        before = {f"key{number}": ring.node_for(f"key{number}") for number in range(2000)}
+        ring.add("d")
+        moved = {key for key, node in before.items() if ring.node_for(key) != node}
+        assert moved and all(ring.node_for(key) == "d" for key in moved)
+        assert len(moved) < 1000
+
+        ring.remove("d")
+        assert all(ring.node_for(key) == node for key, node in before.items())
+
+
+class TestShardCoordinator:
+    def test_routes_calls_to_the_owning_shard(self, coordinator):
+        expected = fill(coordinator)
+        for order_id, order in expected.items():
+            assert coordinator.total(order_id) == order.calculate_total_with_discount()
+        coordinator.call("ORD5", "set_discount_code", "SAVE10")
+        assert coordinator.total("ORD5") == expected["ORD5"].calculate_total_with_discount("SAVE10")
+        assert coordinator.invoice("ORD7", "INV7").startswith("INVOICE #INV7")
+
+    def test_errors_come_back_from_the_worker(self, coordinator):
+        coordinator.create_order("ORD1", "Ann", "ann@example.com")
+        with pytest.raises(ValueError):
+            coordinator.add_item("ORD1", "Lamp", -5, 1)
+        with pytest.raises(ValueError):
+            coordinator.call("ORD1", "reserve_inventory", None)
+        with pytest.raises(KeyError) as error:
+            coordinator.total("missing")
+        assert error.value.args == ("missing",)
+
+    def test_adding_a_worker_rebalances_without_losing_orders(self, coordinator):
+        expected = fill(coordinator)
+        coordinator.call("ORD3", "transition_to", "cancelled")
+        coordinator.call("ORD5", "set_discount_code", "SAVE10")
+        expected["ORD5"].set_discount_code("SAVE10")
+        before = coordinator.report()
+
+        moved = coordinator.add_worker()
+        after = coordinator.report()
+        assert 0 < moved < len(expected)
+        assert after["shards"]["shard-2"] == moved
+        assert after["orders"] == before["orders"] == len(expected)
+        assert after["by_status"] == {"pending": 39, "cancelled": 1}
+        sales = SalesAggregator()
+        sales.consume_orders(order for order_id, order in expected.items() if order_id != "ORD3")
+        assert after["gross"] == pytest.approx(sales.gross_revenue)
+        assert after["net"] == pytest.approx(sales.net_revenue)
+        for order_id, order in expected.items():
+            assert coordinator.call(order_id, "calculate_subtotal") == order.calculate_subtotal()
+
+    def test_a_failed_broadcast_leaves_no_reply_behind(self, coordinator):
+        fill(coordinator, count=10)
+        owner = coordinator.shard_for("ORD1")
+        # Only the owner can export ORD1; the other shard fails
+        with pytest.raises(KeyError):
+            coordinator._broadcast("export", ["ORD1"])
+        assert coordinator._request(owner, "ids") == coordinator._broadcast("ids")[owner]
+        assert coordinator.total("ORD1") > 0
+
+    @pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="Workers must inherit the patched shard")
+    def test_a_failed_migration_keeps_every_order(self, coordinator, monkeypatch):
+        expected = fill(coordinator)
+
+        def load(shard, states):
+            raise ValueError("disk full")
+
+        monkeypatch.setattr(_Shard, "load", load)
+        with pytest.raises(ValueError):
+            coordinator.add_worker()
+        assert coordinator.workers == ["shard-0", "shard-1"]
+        assert coordinator.report()["orders"] == len(expected)
+        for order_id, order in expected.items():
+            assert coordinator.call(order_id, "calculate_subtotal") == order.calculate_subtotal()
@@ -0,0 +1,58 @@
+"""Tests for shared-memory parallel pricing"""
+
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+
+from app.refactored import Order
+from app.shared_pricing import SharedOrderBatch, make_executor
+from app.tax import TaxEngine, TaxJurisdiction
+
+
+def make_orders(count):
+    orders = []
+    for number in range(count):
+        order = Order(f"ORD{number}", "User", "user@example.com")
+        for line in range(number % 4 + 1):
+            order.add_item(f"Item {line}", 7.5 * (line + 1) + number % 13, line + 1)
+        if number % 3 == 0:
+            order.set_discount_code("SAVE20")
+        orders.append(order)
+    return orders
+
+
+def expected(orders):
+    return [order.calculate_total_with_discount() for order in orders]
+
+
+class TestSharedOrderBatch:
+    def test_in_process_pricing_matches_orders(self):
+        orders = make_orders(50)
+        with SharedOrderBatch(orders) as batch:
+            quotes = batch.price()
+        assert [quote[4] for quote in quotes] == expected(orders)
+        assert quotes[0][0] == orders[0].calculate_subtotal()
+
+    def test_process_pool_prices_slices_in_place(self):
+        orders = make_orders(200)
+        with make_executor(2) as executor, SharedOrderBatch(orders, [None] * len(orders)) as batch:
+            quotes = batch.price(executor=executor, workers=2)
+        assert [quote[4] for quote in quotes] == [order._get_calculator().get_total() for order in orders]
+
+    def test_empty_batch(self):
+        with SharedOrderBatch([]) as batch:
+            assert batch.price(workers=2) == []
+
+    def test_blocks_are_released(self):
+        batch = SharedOrderBatch(make_orders(3))
+        batch.price()
+        batch.close()
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=batch._input.name)
+
+    def test_rejects_orders_with_pricing_engines(self):
+        engine = TaxEngine([TaxJurisdiction("New York", 0.08, postal_range=("10000", "14999"))])
+        taxed = Order("TAXED", "User", "user@example.com", postal_code="10001", tax_engine=engine)
+        taxed.add_item("Item", 100.0, 1)
+        with pytest.raises(ValueError, match="TAXED"):
+            SharedOrderBatch(make_orders(2) + [taxed])
@@ -0,0 +1,67 @@
+"""Tests for the shipment split optimizer"""
+
+import itertools
+import random
+
+import pytest
+
+from app.refactored import Order, ShippingCalculator
+from app.shipping import SHIPPING_TIERS, ShipmentOptimizer, ShipmentPlan
+
+
+def brute_force_cost(lines):
+    best = None
+    for choice in itertools.product(*(sorted(warehouses) for _, warehouses in lines)):
+        subtotals = {}
+        for (value, _), warehouse in zip(lines, choice):
+            subtotals[warehouse] = subtotals.get(warehouse, 0) + value
+        cost = sum(ShippingCalculator.calculate(subtotal) for subtotal in subtotals.values())
+        best = cost if best is None else min(best, cost)
+    return best
+
+
+class TestShipmentOptimizer:
+    def test_matches_brute_force_on_small_carts(self):
+        rng = random.Random(7)
+        optimizer = ShipmentOptimizer(time_budget=5)
+        for _ in range(30):
+            lines = [
+                (rng.randint(5, 60), rng.sample("ABCD", rng.randint(1, 3))) for _ in range(rng.randint(1, 8))
+            ]
+            plan = optimizer.optimize(lines)
+            assert plan.optimal
+            assert plan.cost == brute_force_cost(lines)
+
+    def test_optimizer_uses_the_calculator_tiers(self):
+        assert SHIPPING_TIERS is ShippingCalculator.TIERS
+        charges = [ShippingCalculator.calculate(subtotal) for subtotal in (50, 50.01, 100, 100.01)]
+        assert charges == [ShippingCalculator.BASE_CHARGE, 5.0, 5.0, 0.0]
+
+    def test_consolidates_into_free_shipping(self):
+        lines = [(60, ["A"]), (50, ["B"]), (45, ["A", "B"]), (55, ["A", "B"])]
+        plan = ShipmentOptimizer().optimize(lines)
+        assert plan.cost == 0.0
+        assert plan.subtotals["A"] > 100 and plan.subtotals["B"] > 100
+        assert plan.greedy_cost >= plan.cost
+
+    def test_only_searched_plans_carry_a_greedy_cost(self):
+        plan = ShipmentPlan(["A", "B"], [60.0, 70.0], False, 0)
+        assert plan.cost == 10.0
+        assert plan.greedy_cost is None
+
+    def test_time_budget_returns_best_plan_so_far(self):
+        rng = random.Random(3)
+        lines = [(rng.uniform(1, 9), "ABCDEFGH") for _ in range(300)] + [(3, "ABCDEFGH"[n]) for n in range(8)]
+        plan = ShipmentOptimizer(time_budget=0.01).optimize(lines)
+        assert len(plan.assignment) == len(lines)
+        assert all(warehouse == "ABCDEFGH"[number] for number, warehouse in enumerate(plan.assignment[300:]))
+
+    def test_optimize_order_and_validation(self):
+        order = Order("ORD1", "Ann", "ann@example.com")
+        order.add_item("Desk", 80.0, 1)
+        order.add_item("Lamp", 30.0, 1)
+        plan = ShipmentOptimizer().optimize_order(order, {"Desk": ["East"], "Lamp": ["East", "West"]})
+        assert plan.shipments == {"East": [0, 1]}
+        assert plan.cost == 0.0
+        with pytest.raises(ValueError):
+            ShipmentOptimizer().optimize([(10, [])])
@@ -0,0 +1,82 @@
+"""Tests for versioned order summary deltas"""
+
+import pytest
+
+from app.promotions import BuyXGetYRule, PromotionEngine
+from app.refactored import Order
+
+
+def make_order(lines=(("Widget", 10.0, 2), ("Gadget", 20.0, 1)), **kwargs):
+    order = Order("ORD-1", "Ann", "ann@example.com", **kwargs)
+    for name, price, quantity in lines:
+        order.add_item(name, price, quantity)
+    return order
+
+
+class TestSummaryDelta:
+    def test_first_fetch_is_a_full_summary(self):
+        order = make_order()
+        delta = order.get_summary_delta()
+        assert delta.full and delta.version == order.version
+        assert sorted(delta.lines) == [0, 1]
+        assert delta.apply() == order.get_order_summary()
+
+    def test_edits_send_only_changed_lines(self):
+        order = make_order([(f"Item {number}", 1.0 + number, 1) for number in range(50)])
+        summary, version = order.get_order_summary(), order.version
+
+        order.update_quantity(7, 3)
+        order.add_item("Cable", 5.0, 2)
+        delta = order.get_summary_delta(version)
+
+        assert not delta.full
+        assert sorted(delta.lines) == [7, 50]
+        assert delta.lines[7] == "  - Item 7: $8.0 x 3 = $24.0"
+        assert delta.apply(summary) == order.get_order_summary()
+
+    def test_status_and_totals_travel_without_item_lines(self):
+        order = make_order()
+        summary, version = order.get_order_summary(), order.version
+        order.transition_to("paid")
+
+        delta = order.get_summary_delta(version)
+        assert delta.lines == {}
+        assert "Status: paid" in delta.header
+        assert delta.apply(summary) == order.get_order_summary()
+
+    def test_falls_back_to_full_when_the_log_is_truncated(self):
+        order = make_order()
+        version = order.version
+        for quantity in range(Order.LINE_CHANGE_LIMIT + 1):
+            order.update_quantity(0, quantity % 5 + 1)
+        delta = order.get_summary_delta(version)
+        assert delta.full
+        assert delta.apply() == order.get_order_summary()
+
+    def test_unknown_versions_and_restored_orders_get_full_summaries(self):
+        order = make_order()
+        assert order.get_summary_delta(order.version + 5).full
+        restored = Order.from_state(order.to_state())
+        assert restored.get_summary_delta(order.version - 1).full
+        assert not restored.get_summary_delta(order.version).full
+
+    def test_partial_delta_needs_the_previous_summary(self):
+        order = make_order()
+        with pytest.raises(ValueError):
+            order.get_summary_delta(order.version).apply()
+
+    def test_applying_a_discount_code_lengthens_the_totals(self):
+        order = make_order()
+        summary, version = order.get_order_summary(), order.version
+        order.set_discount_code("SAVE10")
+        delta = order.get_summary_delta(version)
+        assert not delta.full
+        assert delta.apply(summary) == order.get_order_summary()
+
+    def test_a_line_that_triggers_a_promotion_lengthens_the_totals(self):
+        order = make_order(promotion_engine=PromotionEngine([BuyXGetYRule("b1g1", "Mug", 1, 1)]))
+        summary, version = order.get_order_summary(), order.version
+        order.add_item("Mug", 8.0, 2)
+        delta = order.get_summary_delta(version)
+        assert "Promotion: -$8.00" in delta.totals
+        assert delta.apply(summary) == order.get_order_summary()
@@ -0,0 +1,68 @@
+"""Tests for the jurisdiction-based tax engine"""
+
+import pytest
+
+from app.refactored import Order, PriceCalculator
+from app.tax import TaxEngine, TaxJurisdiction
+
+
+@pytest.fixture
+def engine():
+    return TaxEngine(
+        [
+            TaxJurisdiction("California", 0.0725, prefix="9", category_rates={"food": 0.0}),
+            TaxJurisdiction("San Francisco", 0.08625, prefix="941"),
+            TaxJurisdiction("New York", 0.08, postal_range=("10000", "14999"), category_rates={"clothing": 0.04}),
+        ]
+    )
+
+
+class TestTaxEngine:
+    def test_innermost_jurisdiction_wins(self, engine):
+        assert engine.find("94110").name == "San Francisco"
+        assert engine.find("90210").name == "California"
+        assert engine.find("95000").name == "California"
+        assert engine.find("12345").name == "New York"
+        assert engine.find("14999").name == "New York"
+        assert engine.find("15000") is None
+
+    def test_default_and_category_rates(self, engine):
+        assert engine.rate_for("60601") == PriceCalculator.TAX_RATE
+        assert engine.rate_for(None) == PriceCalculator.TAX_RATE
+        assert engine.rate_for("10001", "clothing") == 0.04
+        assert engine.rate_for("90210", "food") == 0.0
+        assert engine.rate_for("94110", "food") == 0.08625
+
+    def test_partial_overlap_is_rejected(self):
+        with pytest.raises(ValueError, match="partially overlaps"):
+            TaxEngine(
+                [
+                    TaxJurisdiction("A", 0.05, postal_range=("100", "200")),
+                    TaxJurisdiction("B", 0.05, postal_range=("150", "250")),
+                ]
+            )
+
+    def test_line_taxes(self, engine):
+        items = [
+            {"product": "Shirt", "price": 50, "quantity": 2, "category": "clothing"},
+            {"product": "Lamp", "price": 100, "quantity": 1, "category": None},
+        ]
+        assert engine.line_taxes(items, "10001") == [4.0, 8.0]
+
+
+class TestTaxEngineIntegration:
+    def test_flat_rate_is_default(self):
+        order = Order("ORD1", "User", "user@example.com")
+        order.add_item("Lamp", 100, 1)
+        assert order.calculate_tax() == 10
+        assert "Tax (10%)" in order.get_order_summary()
+
+    def test_order_uses_engine_and_prorates_discount(self, engine):
+        order = Order("ORD2", "User", "user@example.com", postal_code="10001", tax_engine=engine)
+        order.add_item("Shirt", 50, 2, category="clothing")
+        order.add_item("Lamp", 100, 1)
+
+        assert order.calculate_tax() == pytest.approx(12.0)
+        # SAVE10 scales every line's taxable amount by 0.9
+        assert order.calculate_total_with_discount("SAVE10") == pytest.approx(180 + 10.8)
+        assert "Tax: $12.00" in order.get_order_summary()
@@ -0,0 +1,128 @@
+"""Tests for write-ahead persistence with group commit"""
+
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import threading
+
+import pytest
+
+from app.refactored import Order
+from app.tax import TaxEngine, TaxJurisdiction
+from app.wal import DurableOrderStore, WriteAheadLog, encode_frame, read_log
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CRASHING_WRITER = textwrap.dedent(
+    """
+    import sys, threading
+    from app.refactored import Order
+    from app.wal import DurableOrderStore
+
+    store = DurableOrderStore(sys.argv[1], max_batch_delay=0.001)
+    output = threading.Lock()
+
+    def writer(worker):
+        order = Order(f"ORD{worker}", "User", "user@example.com")
+        store.attach(order)
+        line = 0
+        while True:
+            order.add_item(f"Item {line}", 1, 1)
+            line += 1
+            # Acknowledge only after add_item returned, i.e. after the fsync
+            with output:
+                print(f"ORD{worker} {line}", flush=True)
+
+    for worker in range(4):
+        threading.Thread(target=writer, args=(worker,), daemon=True).start()
+    threading.Event().wait()
+    """
+)
+
+
+class TestWriteAheadLog:
+    def test_concurrent_writers_share_fsyncs(self, tmp_path):
+        path = str(tmp_path / "orders.wal")
+        wal = WriteAheadLog(path, max_batch_delay=0.005)
+
+        def writer(worker):
+            for number in range(50):
+                wal.append({"worker": worker, "number": number})
+
+        threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wal.close()
+
+        assert len(list(read_log(path))) == 400
+        assert wal.batches < 400
+
+    def test_torn_tail_is_truncated_on_open(self, tmp_path):
+        path = str(tmp_path / "orders.wal")
+        with open(path, "wb") as handle:
+            handle.write(encode_frame({"n": 1}) + encode_frame({"n": 2})[:-3])
+
+        wal = WriteAheadLog(path)
+        assert wal.recovered_records == [{"n": 1}]
+        wal.append({"n": 3})
+        wal.close()
+        assert [record["n"] for record in read_log(path)] == [1, 3]
+
+    def test_store_recovers_orders(self, tmp_path):
+        path = str(tmp_path / "orders.wal")
+        store = DurableOrderStore(path, wait_for_sync=False)
+        order = Order("ORD1", "User", "user@example.com")
+        order.add_item("Laptop", 1000, 1)
+        store.attach(order)
+        order.add_item("Mouse", 25, 2)
+        order.set_discount_code("SAVE20")
+        cancelled = Order("ORD2", "User", "user@example.com")
+        store.attach(cancelled)
+        cancelled.transition_to("cancelled")
+        store.close()
+
+        reopened = DurableOrderStore(path)
+        assert list(reopened.orders) == ["ORD1"]
+        assert reopened.orders["ORD1"].to_state() == order.to_state()
+        reopened.close()
+
+    def test_store_rebuilds_orders_with_its_tax_engine(self, tmp_path):
+        path = str(tmp_path / "orders.wal")
+        engine = TaxEngine([TaxJurisdiction("New York", 0.08, postal_range=("10000", "14999"))])
+        store = DurableOrderStore(path, tax_engine=engine, wait_for_sync=False)
+        order = Order("ORD1", "User", "user@example.com", postal_code="10001", tax_engine=engine)
+        order.add_item("Laptop", 1000, 1)
+        store.attach(order)
+        with pytest.raises(ValueError, match="different tax engine"):
+            store.attach(Order("ORD2", "User", "user@example.com"))
+        store.close()
+
+        reopened = DurableOrderStore(path, tax_engine=engine)
+        assert reopened.orders["ORD1"].calculate_total() == order.calculate_total() == 1080
+        reopened.close()
+
+    def test_crash_mid_batch_keeps_every_acknowledged_write(self, tmp_path):
+        path = str(tmp_path / "orders.wal")
+        process = subprocess.Popen(
+            [sys.executable, "-c", CRASHING_WRITER, path],
+            cwd=ROOT,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        acknowledged = {}
+        try:
+            for _ in range(400):
+                order_id, lines = process.stdout.readline().split()
+                acknowledged[order_id] = int(lines)
+        finally:
+            process.send_signal(signal.SIGKILL)
+            process.wait()
+
+        store = DurableOrderStore(path)
+        for order_id, lines in acknowledged.items():
+            assert len(store.orders[order_id].items) >= lines
+        store.close()
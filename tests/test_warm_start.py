@@ -0,0 +1,77 @@
+"""Tests for warm-start snapshots"""
+
+import pytest
+
+from app.refactored import Order
+from app.warm_start import WarmStartSnapshot, write_snapshot
+
+
+def make_orders():
+    orders = []
+    for number in range(5):
+        order = Order(f"ORD{number}", "Ann", "ann@example.com")
+        order.add_item("Lamp", 20.0 + number, 2)
+        order.add_item("Bulb", 3.5, number + 1)
+        orders.append(order)
+    orders[1].set_discount_code("SAVE10")
+    orders[2].transition_to("paid")
+    orders[3].transition_to("cancelled")
+    return orders
+
+
+class TestWarmStartSnapshot:
+    def test_serves_totals_and_summaries_without_materializing(self, tmp_path):
+        orders = make_orders()
+        path = str(tmp_path / "warm.snap")
+        assert write_snapshot(orders, path) == 4
+
+        snapshot = WarmStartSnapshot(path)
+        assert snapshot.ids() == ["ORD0", "ORD1", "ORD2", "ORD4"]
+        assert "ORD3" not in snapshot
+        assert snapshot.summary("ORD1") == orders[1].get_order_summary()
+        assert snapshot.breakdown("ORD1")["total"] == orders[1].calculate_total_with_discount()
+        assert snapshot.materialized == 0
+
+    def test_orders_materialize_once_and_stay_live(self, tmp_path):
+        orders = make_orders()
+        path = str(tmp_path / "warm.snap")
+        write_snapshot(orders, path)
+        snapshot = WarmStartSnapshot(path)
+
+        order = snapshot.order("ORD2")
+        assert snapshot.order("ORD2") is order
+        assert order.status == "paid"
+        assert order.version == orders[2].version
+        assert order.calculate_subtotal() == orders[2].calculate_subtotal()
+        assert snapshot.get("missing") is None
+
+        restored = snapshot.order("ORD0")
+        restored.add_item("Shade", 15.0, 1)
+        assert "Shade" in snapshot.summary("ORD0")
+        assert snapshot.breakdown("ORD0")["subtotal"] == orders[0].calculate_subtotal() + 15.0
+        assert snapshot.materialized == 2
+
+    def test_release_body_keeps_every_order(self, tmp_path):
+        path = str(tmp_path / "warm.snap")
+        write_snapshot(make_orders(), path)
+        snapshot = WarmStartSnapshot(path)
+        snapshot.release_body()
+        assert [order.order_id for order in snapshot.orders()] == ["ORD0", "ORD1", "ORD2", "ORD4"]
+
+    def test_only_materialized_orders_survive_close(self, tmp_path):
+        path = str(tmp_path / "warm.snap")
+        write_snapshot(make_orders(), path)
+        with WarmStartSnapshot(path) as snapshot:
+            order = snapshot.order("ORD0")
+        assert snapshot.order("ORD0") is order
+        assert snapshot.summary("ORD0") == order.get_order_summary()
+        with pytest.raises(RuntimeError):
+            snapshot.summary("ORD1")
+        with pytest.raises(RuntimeError):
+            snapshot.order("ORD1")
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "other.json"
+        path.write_text('{"format": "something-else"}\n')
+        with pytest.raises(ValueError):
+            WarmStartSnapshot(str(path))